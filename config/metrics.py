@@ -0,0 +1,232 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+# Границы корзин гистограмм
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Методы, которые попадают в метки как есть; остальные учитываются как OTHER
+METHODS = ("GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE")
+
+# Запросы к БД текущего HTTP-запроса. Переменная контекста видна и в потоках
+# sync_to_async, где асинхронные представления выполняют запросы ORM
+_query_stats = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    __slots__ = ("count", "time")
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.time += time.perf_counter() - start
+
+
+def install_query_recorder(connection, **kwargs):
+    # В начало списка: connection.execute_wrapper() снимает свой обработчик с конца,
+    # даже если соединение открылось внутри него
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Последний элемент - значения больше всех границ (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {total}"
+
+
+class RequestMetrics:
+    """Метрики HTTP-запросов процесса по имени маршрута и методу"""
+
+    histograms = (
+        (
+            "http_request_duration_seconds",
+            "Время обработки запроса, с",
+            DURATION_BUCKETS,
+        ),
+        ("http_request_db_queries", "Число запросов к БД за запрос", QUERIES_BUCKETS),
+        (
+            "http_request_db_duration_seconds",
+            "Время запросов к БД за запрос, с",
+            DURATION_BUCKETS,
+        ),
+        (
+            "http_response_size_bytes",
+            "Размер ответа (кроме потоковых), байт",
+            SIZE_BUCKETS,
+        ),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (маршрут, метод) -> гистограммы в порядке histograms
+        self.series = {}
+        # (маршрут, метод, код ответа) -> число запросов
+        self.responses = {}
+
+    def observe(self, view, method, status, duration, stats, size):
+        key = (view, method)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [
+                    Histogram(buckets) for _, _, buckets in self.histograms
+                ]
+            series[0].observe(duration)
+            series[1].observe(stats.count)
+            series[2].observe(stats.time)
+            if size is not None:
+                series[3].observe(size)
+            status_key = (view, method, status)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+            self.responses.clear()
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus"""
+        with self.lock:
+            series = {
+                key: [
+                    (list(histogram.counts), histogram.sum) for histogram in histograms
+                ]
+                for key, histograms in self.series.items()
+            }
+            responses = dict(self.responses)
+
+        lines = [
+            "# HELP http_requests_total Число запросов",
+            "# TYPE http_requests_total counter",
+        ]
+        for (view, method, status), count in sorted(responses.items()):
+            labels = f'{_labels(view, method)},status="{status}"'
+            lines.append(f"http_requests_total{{{labels}}} {count}")
+
+        for index, (name, description, buckets) in enumerate(self.histograms):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for (view, method), values in sorted(series.items()):
+                histogram = Histogram(buckets)
+                histogram.counts, histogram.sum = values[index]
+                if not any(histogram.counts):
+                    # Например, размер только потоковых ответов
+                    continue
+                lines.extend(histogram.render(name, _labels(view, method)))
+        return "\n".join(lines) + "\n"
+
+
+def _labels(view, method):
+    view = view.replace("\\", "\\\\").replace('"', '\\"')
+    return f'view="{view}",method="{method}"'
+
+
+metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """Собирает время, число и время запросов к БД и размер ответа по маршруту
+    (request.resolver_match.view_name, например retail:chain-list).
+
+    Запросы к БД считаются обработчиком execute_wrappers, который ставится на каждое
+    соединение. Для потоковых ответов учитывается время до начала передачи.
+    Отключается при METRICS_ENABLED=False.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        self.observe(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        self.observe(request, response, time.perf_counter() - start, stats)
+        return response
+
+    def observe(self, request, response, duration, stats):
+        match = request.resolver_match
+        view = match.view_name if match is not None else "unresolved"
+        method = request.method if request.method in METHODS else "OTHER"
+        size = None if response.streaming else len(response.content)
+        metrics.observe(view, method, response.status_code, duration, stats, size)
+
+
+def metrics_view(request):
+    """Метрики для Prometheus. При заданном METRICS_TOKEN требуется заголовок
+    Authorization: Bearer <METRICS_TOKEN>"""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+        received = request.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(received, expected):
+            return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
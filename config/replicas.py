@@ -0,0 +1,128 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_KEY = "db:pin:{}"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Разрешено ли текущему запросу читать с реплик. Вне запросов (команды, консоль)
+# и в запросах на запись все обращения идут в основную БД
+_replicas_allowed = ContextVar("replicas_allowed", default=False)
+
+
+def get_pin_cache():
+    return caches[settings.DB_PIN_CACHE_ALIAS]
+
+
+def get_client_keys(request, response=None):
+    """Ключи клиента для закрепления за основной БД: токен из заголовка Authorization
+    и ключ сессии (в т.ч. новый, выданный в ответе, например после входа в админку)"""
+    values = [request.META.get("HTTP_AUTHORIZATION")]
+    values.append(request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if response is not None and settings.SESSION_COOKIE_NAME in response.cookies:
+        values.append(response.cookies[settings.SESSION_COOKIE_NAME].value)
+    return [
+        PIN_KEY.format(hashlib.md5(value.encode()).hexdigest())
+        for value in values
+        if value
+    ]
+
+
+@contextmanager
+def primary_reads():
+    """Чтение из основной БД внутри блока, в т.ч. в запросе, которому разрешены реплики"""
+    token = _replicas_allowed.set(False)
+    try:
+        yield
+    finally:
+        _replicas_allowed.reset(token)
+
+
+class ReplicaRouter:
+    """Чтение в запросах GET/HEAD/OPTIONS - со случайной реплики из REPLICA_DATABASES,
+    остальное - из основной БД. Запись и миграции - только в основную БД"""
+
+    def db_for_read(self, model, **hints):
+        if settings.REPLICA_DATABASES and _replicas_allowed.get():
+            return random.choice(settings.REPLICA_DATABASES)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Разрешает чтение с реплик для безопасных запросов.
+
+    После успешного запроса на запись клиент на DB_REPLICA_PIN_SECONDS секунд
+    закрепляется за основной БД (read-your-writes): его чтения не попадут на
+    реплику, которая еще не получила записанные данные.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        keys = get_client_keys(request)
+        pinned = keys and get_pin_cache().get_many(keys)
+        token = _replicas_allowed.set(self.use_replicas(request, pinned))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replicas_allowed.reset(token)
+
+        keys = self.get_keys_to_pin(request, response)
+        if keys:
+            get_pin_cache().set_many(
+                dict.fromkeys(keys, True), settings.DB_REPLICA_PIN_SECONDS
+            )
+        return response
+
+    async def __acall__(self, request):
+        keys = get_client_keys(request)
+        pinned = keys and await get_pin_cache().aget_many(keys)
+        token = _replicas_allowed.set(self.use_replicas(request, pinned))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replicas_allowed.reset(token)
+
+        keys = self.get_keys_to_pin(request, response)
+        if keys:
+            await get_pin_cache().aset_many(
+                dict.fromkeys(keys, True), settings.DB_REPLICA_PIN_SECONDS
+            )
+        return response
+
+    def use_replicas(self, request, pinned):
+        return bool(settings.REPLICA_DATABASES) and (
+            request.method in SAFE_METHODS and not pinned
+        )
+
+    def get_keys_to_pin(self, request, response):
+        if not settings.REPLICA_DATABASES or request.method in SAFE_METHODS:
+            return []
+        if response.status_code >= 400:
+            return []
+        return get_client_keys(request, response)
@@ -2,6 +2,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -13,7 +14,8 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 
 DEBUG = os.getenv("DEBUG", False) == "True"
 
-ALLOWED_HOSTS = []
+# Список через запятую, например 127.0.0.1,localhost (нужен при DEBUG=False)
+ALLOWED_HOSTS = [host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host]
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -22,6 +24,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "drf_spectacular",
@@ -30,7 +33,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "config.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "config.replicas.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -59,17 +64,60 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# Соединения с БД. DB_CONN_MAX_AGE - сколько секунд соединение переиспользуется
+# между запросами (0 - новое соединение на каждый запрос, None - без ограничения),
+# DB_CONN_HEALTH_CHECKS - проверка переиспользуемого соединения перед запросом.
+# DB_POOL_ENABLED - пул соединений psycopg (psycopg_pool)
+# вместо постоянных соединений: соединения возвращаются в пул в конце запроса
+DB_CONN_MAX_AGE = os.getenv("DB_CONN_MAX_AGE", "0")
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", False) == "True"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "django.db.backends.postgresql",
         "NAME": os.getenv("POSTGRES_DB"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        "CONN_MAX_AGE": None if DB_CONN_MAX_AGE == "None" else int(DB_CONN_MAX_AGE),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", False) == "True",
     }
 }
 
+if DB_POOL_ENABLED:
+    # Пул несовместим с постоянными соединениями Django
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+    }
+
+# Реплики для чтения: DB_REPLICA_HOSTS - через запятую host или host:port (БД,
+# пользователь и пароль как у основной). Запросы GET читают со случайной реплики
+# (config.replicas), после записи клиент на DB_REPLICA_PIN_SECONDS секунд читает из
+# основной БД. Для нескольких процессов нужен общий кэш закреплений (DB_PIN_CACHE_*)
+REPLICA_DATABASES = []
+for number, address in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    host, _, port = address.strip().partition(":")
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        # В тестах реплика указывает на тестовую БД основной
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ["config.replicas.ReplicaRouter"]
+DB_REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", 5))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -106,7 +154,7 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -114,6 +162,91 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Рендерер и парсер JSON на orjson (вывод совпадает с JSONRenderer). Отдельным
+# представлениям их можно подключить через renderer_classes / parser_classes
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", False) == "True"
+
+if FAST_JSON_ENABLED:
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured(
+            "FAST_JSON_ENABLED=True требует пакет orjson: установите зависимости проекта"
+        )
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "retail.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] = [
+        "retail.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ]
+
+# Размер страницы списка звеньев и его максимальное значение, задаваемое клиентом
+CHAIN_LIST_PAGE_SIZE = int(os.getenv("CHAIN_LIST_PAGE_SIZE", 100))
+CHAIN_LIST_MAX_PAGE_SIZE = int(os.getenv("CHAIN_LIST_MAX_PAGE_SIZE", 1000))
+
+# Кэш ответов списка и карточки звена. Для нескольких процессов нужен общий бэкенд
+# (например, django.core.cache.backends.redis.RedisCache), иначе сброс кэша
+# по сигналам не дойдет до других процессов
+CHAIN_CACHE_ENABLED = os.getenv("CHAIN_CACHE_ENABLED", False) == "True"
+CHAIN_CACHE_ALIAS = "chain"
+
+# Кэш пользователей, найденных по JWT. Короткий срок жизни ограничивает устаревание
+# при изменениях в обход сигналов (queryset.update) и при локальном кэше в нескольких процессах
+AUTH_USER_CACHE_ALIAS = "users"
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 60))
+
+# Кэш закреплений клиентов за основной БД после записи (см. REPLICA_DATABASES)
+DB_PIN_CACHE_ALIAS = "db_pins"
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    CHAIN_CACHE_ALIAS: {
+        "BACKEND": os.getenv(
+            "CHAIN_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CHAIN_CACHE_LOCATION", "chain"),
+        "TIMEOUT": int(os.getenv("CHAIN_CACHE_TIMEOUT", 300)),
+    },
+    AUTH_USER_CACHE_ALIAS: {
+        "BACKEND": os.getenv(
+            "AUTH_USER_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("AUTH_USER_CACHE_LOCATION", "users"),
+    },
+    DB_PIN_CACHE_ALIAS: {
+        "BACKEND": os.getenv(
+            "DB_PIN_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("DB_PIN_CACHE_LOCATION", "db_pins"),
+    },
+}
+
+# Админка: для таблиц больше ADMIN_COUNT_ESTIMATE_THRESHOLD строк число строк
+# без фильтров берется из статистики PostgreSQL, с фильтрами - кэшируется на
+# ADMIN_COUNT_CACHE_TIMEOUT секунд
+ADMIN_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv("ADMIN_COUNT_ESTIMATE_THRESHOLD", 100_000)
+)
+ADMIN_COUNT_CACHE_TIMEOUT = int(os.getenv("ADMIN_COUNT_CACHE_TIMEOUT", 60))
+
+# Метрики запросов по маршрутам (config.metrics) для Prometheus: GET /metrics/.
+# METRICS_TOKEN - токен для заголовка Authorization: Bearer, обязателен при DEBUG=False
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", False) == "True"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+if METRICS_ENABLED and not METRICS_TOKEN and not DEBUG:
+    raise ImproperlyConfigured(
+        "METRICS_ENABLED=True при DEBUG=False требует METRICS_TOKEN"
+    )
+
+# Максимальное количество звеньев в одном запросе пакетного сохранения
+CHAIN_BULK_MAX_ITEMS = int(os.getenv("CHAIN_BULK_MAX_ITEMS", 10000))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "RetailChain",
     "DESCRIPTION": "Платформа торговой сети",
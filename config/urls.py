@@ -8,11 +8,13 @@ from drf_spectacular.views import (
 )
 
 from config import settings
+from config.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("retail/", include("retail.urls", namespace="retail")),
     path("users/", include("users.urls", namespace="users")),
+    path("metrics/", metrics_view, name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "docs/swagger/",
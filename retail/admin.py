@@ -1,10 +1,90 @@
-from django.contrib import admin
+import hashlib
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections, transaction
 from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+
+from retail.cache import invalidate_chain_links
+from retail.models import Contact, DeptRollup, Product, ChainLink
+from retail.rollups import track_dept_rollups
+from retail.search import SEARCH_RANK, search
+
+COUNT_KEY = "admin:count:{}"
+
+
+def estimated_rows(queryset):
+    """Оценка числа строк таблицы планировщиком PostgreSQL (после ANALYZE) или None"""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    return row[0] if row is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Для таблиц больше ADMIN_COUNT_ESTIMATE_THRESHOLD строк число строк без фильтров -
+    оценка планировщика, с фильтрами - COUNT(*), закэшированный на
+    ADMIN_COUNT_CACHE_TIMEOUT секунд. Меньшие таблицы считаются как обычно"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        estimate = estimated_rows(queryset)
+        if estimate is None or estimate < settings.ADMIN_COUNT_ESTIMATE_THRESHOLD:
+            return super().count
+        if not queryset.query.where:
+            return estimate
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = COUNT_KEY.format(
+            hashlib.md5(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+        )
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class TrigramSearchAdmin(admin.ModelAdmin):
+    """Поиск по search_fields (в т.ч. для autocomplete_fields других моделей) через
+    retail.search: по GIN-индексам pg_trgm, а не UPPER(...) LIKE по всей таблице"""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        # Порядок для autocomplete; список звеньев применяет свою сортировку поверх
+        results = search(queryset, search_term, self.search_fields)
+        return results.order_by(f"-{SEARCH_RANK}", "pk"), False
 
-from retail.models import Contact, Product, ChainLink
 
-admin.site.register(Contact)
-admin.site.register(Product)
+@admin.register(Contact)
+class ContactAdmin(TrigramSearchAdmin):
+    search_fields = ("email", "city", "street")
+
+
+@admin.register(Product)
+class ProductAdmin(TrigramSearchAdmin):
+    search_fields = ("name", "model")
 
 
 class DeptFilter(admin.SimpleListFilter):
@@ -18,24 +98,143 @@ class DeptFilter(admin.SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value() == self.__HAS_DEPT_KEY:
-            return queryset.filter(dept__gt=0)
+            return queryset.with_dept()
+
+
+def contact_names(field, country=None):
+    """Значения поля контактов без учета регистра: [(в нижнем регистре, как записано), ...].
+
+    Индекс по lower(field) обходится с переходом к следующему значению (loose index scan):
+    по обращению к индексу на значение вместо DISTINCT по всем контактам. Название
+    берется из первого контакта со значением. Города - в стране country
+    (индекс contact_country_lower_idx)
+    """
+    connection = connections[Contact.objects.all().db]
+    quote = connection.ops.quote_name
+    table, column = quote(Contact._meta.db_table), quote(field)
+    condition, params = "", []
+    if country is not None:
+        condition, params = f"lower({quote('country')}) = %s AND ", [country.lower()]
+    step = (
+        f"SELECT lower({column}), {column} FROM {table} "
+        f"WHERE {condition}lower({column}) > {{}} ORDER BY lower({column}) LIMIT 1"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "WITH RECURSIVE names (key, name) AS ("
+            f"({step.format('%s')}) UNION ALL "
+            f"SELECT next.* FROM names, LATERAL ({step.format('names.key')}) next"
+            ") SELECT key, name FROM names",
+            [*params, "", *params],
+        )
+        return cursor.fetchall()
+
+
+class CountryFilter(admin.SimpleListFilter):
+    """Варианты - страны контактов; значение в нижнем регистре, название - как записано"""
+
+    title = "Страна"
+    parameter_name = "country"
+
+    def lookups(self, request, model_admin):
+        return contact_names("country")
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.in_country(self.value())
+
+
+class CityFilter(admin.SimpleListFilter):
+    """Города показываются после выбора страны"""
+
+    title = "Город"
+    parameter_name = "city"
+
+    def lookups(self, request, model_admin):
+        country = request.GET.get(CountryFilter.parameter_name)
+        if country:
+            return contact_names("city", country)
+        if self.value():
+            return [(self.value(), self.value())]
+        return []
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.in_city(self.value())
+
+
+class LevelFilter(admin.SimpleListFilter):
+    """Варианты - уровни из сводок задолженности (DeptRollup): по строке на уровень
+    вместо DISTINCT по звеньям"""
+
+    title = "Уровень иерархии"
+    parameter_name = "level"
+
+    def lookups(self, request, model_admin):
+        levels = DeptRollup.objects.filter(kind=DeptRollup.Kind.LEVEL).values_list(
+            "key", flat=True
+        )
+        return [(level, level) for level in sorted(levels, key=int)]
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(level=int(self.value()))
+
+
+class SupplierFilter(admin.SimpleListFilter):
+    """Покупатели поставщика. Вариант - только выбранный поставщик (переход по ссылке
+    в колонке "Поставщик"), а не все звенья"""
+
+    title = "Поставщик"
+    parameter_name = "supplier"
+
+    def lookups(self, request, model_admin):
+        if not (self.value() and self.value().isdigit()):
+            return []
+        return ChainLink.objects.filter(pk=self.value()).values_list("pk", "name")
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(supplier_id=int(self.value()))
 
 
 @admin.action(description="Очистить задолженность перед поставщиком")
 def reset_dept(modeladmin, request, queryset: QuerySet):
-    for item in queryset:
-        item.reset_dept_and_save()
+    # Один UPDATE поля dept и метки изменения, без загрузки объектов и изменения creation_date
+    with transaction.atomic(), track_dept_rollups(queryset.exclude(dept=0)):
+        updated = queryset.exclude(dept=0).update(dept=0, modified_at=timezone.now())
+        invalidate_chain_links()
+    modeladmin.message_user(
+        request, f"Задолженность очищена у звеньев: {updated}", messages.SUCCESS
+    )
 
 
 @admin.register(ChainLink)
-class ChainLinkAdmin(admin.ModelAdmin):
+class ChainLinkAdmin(TrigramSearchAdmin):
     list_display = (
         "name",
-        "supplier",
+        "supplier_link",
+        "level",
         "dept",
         "creation_date",
     )
-    list_filter = ("supplier", "contacts__country", "contacts__city", DeptFilter)
+    # Поставщик загружается тем же запросом, что и страница
+    list_select_related = ("supplier",)
+    list_filter = (SupplierFilter, CountryFilter, CityFilter, LevelFilter, DeptFilter)
+    search_fields = ("name",)
+    # Виджеты с поиском вместо списков всех звеньев, продуктов и контактов
+    autocomplete_fields = ("supplier", "products", "contacts")
     actions = [
         reset_dept,
     ]
+
+    @admin.display(description="Поставщик", ordering="supplier")
+    def supplier_link(self, obj):
+        if obj.supplier is None:
+            return "-"
+        return format_html(
+            '<a href="?{}={}">{}</a>',
+            SupplierFilter.parameter_name,
+            obj.supplier_id,
+            obj.supplier,
+        )
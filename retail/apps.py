@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RetailConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "retail"
+
+    def ready(self):
+        import retail.signals  # noqa: F401
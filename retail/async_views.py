@@ -0,0 +1,185 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.utils.http import http_date
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+from rest_framework import generics
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from retail.conditional import make_etag, not_modified
+from retail.filters import ChainLinkFilter
+from retail.models import ChainLink, Contact, Product
+from retail.paginators import ChainLinkCursorPagination
+from retail.search import TrigramSearchFilter
+from retail.serializers import (
+    ChainLinkSerializer,
+    ChainLinkValuesSerializer,
+    ContactSerializer,
+    ContactValuesSerializer,
+    ProductSerializer,
+    ProductValuesSerializer,
+)
+
+
+class AsyncAPIView(generics.GenericAPIView):
+    """Представление DRF с асинхронными обработчиками (async def get).
+
+    Аутентификация, права и фильтры (в них бывают синхронные запросы к БД и кэшу)
+    выполняются через sync_to_async, данные читаются асинхронным ORM. Под ASGI
+    (config.asgi) такие представления не занимают поток воркера на весь запрос.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(
+                self, request.method.lower(), self.http_method_not_allowed
+            )
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def afilter_queryset(self, queryset):
+        # Фильтры ленивые, но сторонние backends могут обращаться к БД синхронно
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+
+class AsyncValuesListAPIView(AsyncAPIView):
+    """Асинхронный список из строк values() (см. ValuesListMixin)"""
+
+    values_serializer_class = None
+
+    async def get(self, request, *args, **kwargs):
+        serializer_class = self.values_serializer_class
+        queryset = serializer_class.values(
+            await self.afilter_queryset(self.get_queryset())
+        )
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, self)
+            return self.get_paginated_response(serializer_class(page, many=True).data)
+        rows = [row async for row in queryset]
+        return Response(serializer_class(rows, many=True).data)
+
+
+class AsyncContactListAPIView(AsyncValuesListAPIView):
+    queryset = Contact.objects.all()
+    serializer_class = ContactSerializer
+    values_serializer_class = ContactValuesSerializer
+    filter_backends = [TrigramSearchFilter]
+    search_fields = ("city", "street", "email")
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Получение списка контактов (async)",
+        description="Асинхронная версия GET /retail/contacts/.",
+        responses={
+            200: OpenApiResponse(
+                response=ContactSerializer(many=True), description="Успешный ответ"
+            ),
+            401: OpenApiResponse(description="Необходима авторизация"),
+        },
+    )
+    async def get(self, request, *args, **kwargs):
+        return await super().get(request, *args, **kwargs)
+
+
+class AsyncProductListAPIView(AsyncValuesListAPIView):
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
+    values_serializer_class = ProductValuesSerializer
+    filter_backends = [TrigramSearchFilter]
+    search_fields = ("name", "model")
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Получение списка продуктов (async)",
+        description="Асинхронная версия GET /retail/products/.",
+        responses={
+            200: OpenApiResponse(
+                response=ProductSerializer(many=True), description="Успешный ответ"
+            ),
+            401: OpenApiResponse(description="Необходима авторизация"),
+        },
+    )
+    async def get(self, request, *args, **kwargs):
+        return await super().get(request, *args, **kwargs)
+
+
+class AsyncChainLinkListAPIView(AsyncValuesListAPIView):
+    """Асинхронная версия списка звеньев: те же фильтры, поиск, пагинация и ETag.
+    Условный запрос проверяется по ETag загруженной страницы; кэш ответов
+    (CHAIN_CACHE_ENABLED) используется только синхронной версией"""
+
+    serializer_class = ChainLinkSerializer
+    values_serializer_class = ChainLinkValuesSerializer
+    pagination_class = ChainLinkCursorPagination
+    filter_backends = [ChainLinkFilter, TrigramSearchFilter]
+    search_fields = ("name",)
+
+    @extend_schema(
+        summary="Получение списка звеньев цепочки поставки (async)",
+        description="Асинхронная версия GET /retail/chain/list/ с теми же параметрами.",
+        responses={
+            200: OpenApiResponse(
+                response=ChainLinkSerializer(many=True), description="Успешный ответ"
+            ),
+            304: OpenApiResponse(description="Страница не изменилась"),
+            401: OpenApiResponse(description="Необходима авторизация"),
+        },
+    )
+    async def get(self, request, *args, **kwargs):
+        response = await super().get(request, *args, **kwargs)
+        paginator = self.paginator
+        response["ETag"] = make_etag(
+            [(row["id"], row["modified_at"]) for row in paginator.page],
+            (paginator.has_next, paginator.has_previous),
+            request.accepted_renderer.format,
+        )
+        return not_modified(request, response)
+
+    def get_queryset(self):
+        return ChainLink.objects.order_by("id")
+
+
+class AsyncChainLinkRetrieveAPIView(AsyncAPIView):
+    serializer_class = ChainLinkSerializer
+
+    @extend_schema(
+        summary="Получение звена цепочки поставки (async)",
+        description="Асинхронная версия GET /retail/chain/<pk>/.",
+        responses={
+            200: OpenApiResponse(
+                response=ChainLinkSerializer, description="Успешный ответ"
+            ),
+            304: OpenApiResponse(description="Звено не изменилось"),
+            401: OpenApiResponse(description="Необходима авторизация"),
+            404: OpenApiResponse(description="Указанное звено не существует"),
+        },
+    )
+    async def get(self, request, pk):
+        # Звено с id продуктов и контактов одним запросом
+        row = await ChainLinkValuesSerializer.values(
+            ChainLink.objects.filter(pk=pk)
+        ).afirst()
+        if row is None:
+            raise NotFound()
+
+        response = Response(ChainLinkValuesSerializer(row).data)
+        response["ETag"] = make_etag(
+            [(row["id"], row["modified_at"])], (), request.accepted_renderer.format
+        )
+        response["Last-Modified"] = http_date(row["modified_at"].timestamp())
+        return not_modified(request, response)
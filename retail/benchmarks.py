@@ -0,0 +1,66 @@
+import statistics
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+HOST = "localhost"
+
+
+class RequestBenchmarkCommand(BaseCommand):
+    """Основа команд, которые замеряют время запросов к API через WSGIHandler:
+    запрос проходит все middleware и сигналы начала и конца запроса, как на сервере"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--url", default="/retail/chain/list/?page_size=10")
+        parser.add_argument(
+            "--user", help="Имя пользователя для JWT (по умолчанию - первый активный)"
+        )
+
+    def get_environ(self, options):
+        users = User.objects.filter(is_active=True).order_by("pk")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+        user = users.first()
+        if user is None:
+            raise CommandError("Нет пользователя для авторизации запросов")
+
+        path, _, query = options["url"].partition("?")
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "HTTP_HOST": HOST,
+            "HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}",
+        }
+        setup_testing_defaults(environ)
+        return environ
+
+    def run_requests(self, handler, environ, requests):
+        """Время каждого запроса, мс"""
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers: None)
+            b"".join(response)
+            response.close()
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError(
+                    f"Ответ {response.status_code}: {response.content[:200]!r}"
+                )
+        return timings
+
+    def report(self, title, timings, extra=""):
+        """Выводит среднее, p50 и p95 и возвращает p50"""
+        timings = sorted(timings)
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f"  {title}: среднее {statistics.mean(timings):.2f} мс, "
+            f"p50 {statistics.median(timings):.2f} мс, p95 {p95:.2f} мс{extra}"
+        )
+        return statistics.median(timings)
@@ -0,0 +1,147 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from config.replicas import primary_reads
+from retail.conditional import not_modified
+
+LIST_VERSION_KEY = "chain:list_version"
+DETAIL_VERSION_KEY = "chain:detail_version"
+LINK_VERSION_KEY = "chain:link_version:{}"
+HITS_KEY = "chain:hits"
+MISSES_KEY = "chain:misses"
+# Заголовки, которые сохраняются вместе с содержимым ответа
+CACHED_HEADERS = ("ETag", "Last-Modified")
+
+
+def get_cache():
+    return caches[settings.CHAIN_CACHE_ALIAS]
+
+
+def _new_version():
+    return uuid4().hex
+
+
+def _get_versions(*keys):
+    """Текущие версии по ключам. Отсутствующая (вытесненная) версия создается заново,
+    поэтому старые ответы в кэше не могут снова стать актуальными"""
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _invalidate(pks):
+    cache = get_cache()
+    if pks is None:
+        cache.set_many(
+            {LIST_VERSION_KEY: _new_version(), DETAIL_VERSION_KEY: _new_version()},
+            timeout=None,
+        )
+        return
+    cache.set(LIST_VERSION_KEY, _new_version(), timeout=None)
+    cache.delete_many([LINK_VERSION_KEY.format(pk) for pk in pks])
+
+
+def invalidate_chain_links(pks=None):
+    """Сбрасывает закэшированные ответы списка и указанных звеньев (всех, если pks=None).
+
+    Сброс выполняется сразу и повторно после фиксации транзакции, чтобы
+    параллельный запрос не успел закэшировать данные до коммита.
+    """
+    if not settings.CHAIN_CACHE_ENABLED:
+        return
+    pks = None if pks is None else list(pks)
+    _invalidate(pks)
+    transaction.on_commit(lambda: _invalidate(pks))
+
+
+def _count(key):
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_cache_stats():
+    stats = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = stats.get(HITS_KEY, 0), stats.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+class CachedResponseMixin:
+    """Кэширует отрендеренные ответы GET представлений звеньев.
+
+    Ключ строится из версии данных, формата ответа и адреса запроса с отсортированными
+    параметрами (включая курсор страницы). Проверка прав выполняется до обращения к кэшу.
+    """
+
+    def get_cache_versions(self):
+        return _get_versions(LIST_VERSION_KEY)
+
+    def get_response_cache_key(self, request):
+        params = sorted(request.query_params.lists())
+        address = f"{request.get_host()}{request.path}?{params}"
+        digest = hashlib.md5(address.encode()).hexdigest()
+        versions = ":".join(self.get_cache_versions())
+        return f"chain:response:{versions}:{request.accepted_renderer.format}:{digest}"
+
+    def get(self, request, *args, **kwargs):
+        self.response_cache_key = None
+        if not settings.CHAIN_CACHE_ENABLED:
+            return super().get(request, *args, **kwargs)
+
+        self.response_cache_key = self.get_response_cache_key(request)
+        cached = get_cache().get(self.response_cache_key)
+        if cached is None:
+            _count(MISSES_KEY)
+            # Ответ для кэша читается из основной БД: отстающая реплика сохранила бы
+            # старые данные под новой версией, и их получил бы и записавший клиент
+            with primary_reads():
+                return super().get(request, *args, **kwargs)
+
+        _count(HITS_KEY)
+        content, content_type, headers = cached
+        response = HttpResponse(content, content_type=content_type, headers=headers)
+        response["X-Cache"] = "HIT"
+        self.response_cache_key = None
+        # Условный запрос проверяется по сохраненным ETag / Last-Modified без БД
+        return not_modified(request, response)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "response_cache_key", None)
+        if key and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            headers = {
+                header: response[header]
+                for header in CACHED_HEADERS
+                if header in response
+            }
+            get_cache().set(key, (response.content, response["Content-Type"], headers))
+            response["X-Cache"] = "MISS"
+        return response
+
+
+class CachedLinkResponseMixin(CachedResponseMixin):
+    """Ответ по одному звену сбрасывается только при изменении этого звена"""
+
+    def get_cache_versions(self):
+        return _get_versions(
+            DETAIL_VERSION_KEY, LINK_VERSION_KEY.format(self.kwargs[self.lookup_field])
+        )
@@ -0,0 +1,114 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+CONDITIONAL_HEADERS = (
+    "HTTP_IF_NONE_MATCH",
+    "HTTP_IF_MODIFIED_SINCE",
+    "HTTP_IF_MATCH",
+    "HTTP_IF_UNMODIFIED_SINCE",
+)
+
+
+def is_conditional(request):
+    return any(header in request.META for header in CONDITIONAL_HEADERS)
+
+
+def make_etag(rows, extra=(), fmt=""):
+    """ETag по id и меткам изменения звеньев ответа (и признакам вроде наличия
+    соседних страниц, которые тоже влияют на содержимое)"""
+    value = ";".join(f"{pk}:{modified_at.isoformat()}" for pk, modified_at in rows)
+    digest = hashlib.md5(f"{fmt}|{value}|{extra!r}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request, response):
+    """Ответ 304, если заголовки If-None-Match / If-Modified-Since совпадают с ответом"""
+    last_modified = response.get("Last-Modified")
+    return get_conditional_response(
+        request,
+        etag=response.get("ETag"),
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+        response=response,
+    )
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для GET представлений звеньев.
+
+    Для условного запроса сначала выполняется легкий запрос id и меток изменения
+    (get_version_rows) без связей M2M и сериализации; при совпадении ETag
+    возвращается 304. Для остальных запросов ETag вычисляется по уже загруженным
+    звеньям (version_rows задается в get_object / paginate_queryset).
+    """
+
+    # Last-Modified передается только там, где максимальная метка изменения
+    # однозначно описывает ответ (звено, но не страница списка)
+    send_last_modified = False
+
+    def get_version_rows(self):
+        """Пары (id, modified_at) строк ответа и дополнительные признаки или None.
+
+        Строки выбираются из filter_queryset(get_queryset()), как и в ответе, но
+        только id, метки изменения и ключи сортировки: для звена по lookup_field -
+        одна строка (None, если звена нет), для списка - страница пагинатора
+        с признаками соседних страниц.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            row = (
+                queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                .values_list("id", "modified_at")
+                .first()
+            )
+            return None if row is None else ([row], ())
+
+        if self.pagination_class is None:
+            return list(queryset.values_list("id", "modified_at")), ()
+        # Ключи сортировки курсора (в т.ч. ранг поиска) нужны пагинатору в строках
+        paginator = self.pagination_class()
+        queryset = queryset.values(
+            "id",
+            "modified_at",
+            *getattr(paginator, "ordering_fields", None) or (),
+            *queryset.query.annotation_select,
+        )
+        rows = paginator.paginate_queryset(queryset, self.request, view=self)
+        return (
+            [(row["id"], row["modified_at"]) for row in rows],
+            (paginator.has_next, paginator.has_previous),
+        )
+
+    def get_validators(self, rows, extra=()):
+        etag = make_etag(rows, extra, self.request.accepted_renderer.format)
+        last_modified = None
+        if self.send_last_modified and rows:
+            last_modified = max(modified_at for _, modified_at in rows)
+        return etag, last_modified
+
+    def get(self, request, *args, **kwargs):
+        self.version_rows, self.version_extra = None, ()
+        if is_conditional(request):
+            version = self.get_version_rows()
+            if version is not None:
+                etag, last_modified = self.get_validators(*version)
+                response = get_conditional_response(
+                    request,
+                    etag=etag,
+                    last_modified=last_modified and int(last_modified.timestamp()),
+                )
+                if response is not None:
+                    response["ETag"] = etag
+                    return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200 and self.version_rows is not None:
+            etag, last_modified = self.get_validators(
+                self.version_rows, self.version_extra
+            )
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
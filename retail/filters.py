@@ -0,0 +1,97 @@
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+
+class ChainLinkFilterSerializer(serializers.Serializer):
+    """Параметры фильтрации списка звеньев. Все параметры необязательные"""
+
+    country = serializers.CharField(
+        allow_blank=True, help_text="Страна контакта звена (без учета регистра)"
+    )
+    city = serializers.CharField(
+        allow_blank=True, help_text="Город контакта звена (без учета регистра)"
+    )
+    supplier = serializers.IntegerField(min_value=1, help_text="id поставщика")
+    product = serializers.IntegerField(
+        min_value=1, help_text="id продукта, который поставляет звено"
+    )
+    level = serializers.IntegerField(min_value=0, help_text="Уровень иерархии")
+    dept_min = serializers.DecimalField(
+        max_digits=15, decimal_places=2, help_text="Задолженность не меньше"
+    )
+    dept_max = serializers.DecimalField(
+        max_digits=15, decimal_places=2, help_text="Задолженность не больше"
+    )
+    has_dept = serializers.BooleanField(
+        help_text="true - только звенья с задолженностью, false - без задолженности"
+    )
+    created_after = serializers.DateTimeField(help_text="Дата создания не раньше")
+    created_before = serializers.DateTimeField(help_text="Дата создания не позже")
+
+
+class ChainLinkFilter(BaseFilterBackend):
+    """Фильтры списка звеньев по параметрам запроса (ChainLinkFilterSerializer).
+
+    Под каждым фильтром есть индекс: Lower(country) и Lower(city) контактов и индексы
+    таблиц связей для country, city и product, индекс внешнего ключа supplier,
+    (level, id), dept, creation_date и частичный индекс звеньев с задолженностью.
+    Неверные значения параметров дают ответ 400 с ошибками по параметрам.
+    """
+
+    serializer_class = ChainLinkFilterSerializer
+
+    # Тип параметра в схеме OpenAPI по полю сериализатора
+    schema_types = {
+        serializers.IntegerField: {"type": "integer"},
+        serializers.DecimalField: {"type": "string", "format": "decimal"},
+        serializers.BooleanField: {"type": "boolean"},
+        serializers.DateTimeField: {"type": "string", "format": "date-time"},
+        serializers.CharField: {"type": "string"},
+    }
+
+    def get_filters(self, request):
+        serializer = self.serializer_class(data=request.query_params, partial=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def filter_queryset(self, request, queryset, view):
+        filters = self.get_filters(request)
+
+        if filters.get("country"):
+            queryset = queryset.in_country(filters["country"])
+        if filters.get("city"):
+            queryset = queryset.in_city(filters["city"])
+        if "product" in filters:
+            queryset = queryset.with_product(filters["product"])
+
+        lookups = {
+            "supplier": "supplier_id",
+            "level": "level",
+            "dept_min": "dept__gte",
+            "dept_max": "dept__lte",
+            "created_after": "creation_date__gte",
+            "created_before": "creation_date__lte",
+        }
+        conditions = {
+            lookup: filters[name] for name, lookup in lookups.items() if name in filters
+        }
+        if conditions:
+            queryset = queryset.filter(**conditions)
+
+        if filters.get("has_dept") is True:
+            queryset = queryset.with_dept()
+        elif filters.get("has_dept") is False:
+            queryset = queryset.filter(dept__lte=0)
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": str(field.help_text),
+                "schema": self.schema_types[type(field)],
+            }
+            for name, field in self.serializer_class().fields.items()
+        ]
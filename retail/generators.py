@@ -0,0 +1,251 @@
+import datetime
+import random
+from bisect import bisect_left
+from decimal import Decimal
+from itertools import accumulate, islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from retail.cache import invalidate_chain_links
+from retail.importers import copy_rows
+from retail.models import ChainLink, Contact, Product
+from retail.rollups import rebuild_dept_rollups
+
+# Страны с весами и города страны (первые города крупнее)
+COUNTRIES = (
+    (
+        "Россия",
+        60,
+        ("Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань"),
+    ),
+    ("Китай", 15, ("Шанхай", "Шэньчжэнь", "Гуанчжоу")),
+    ("Беларусь", 10, ("Минск", "Гомель", "Брест")),
+    ("Казахстан", 10, ("Алматы", "Астана")),
+    ("Южная Корея", 5, ("Сеул", "Пусан")),
+)
+STREETS = ("Ленина", "Мира", "Садовая", "Советская", "Центральная", "Заводская")
+PRODUCT_NAMES = (
+    "Телевизор",
+    "Смартфон",
+    "Ноутбук",
+    "Планшет",
+    "Холодильник",
+    "Пылесос",
+    "Микроволновая печь",
+    "Наушники",
+)
+BRANDS = ("Samsung", "LG", "Xiaomi", "Haier", "Sony", "Philips")
+SURNAMES = ("Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов")
+
+# Звено по уровню: 0 - завод, 1 - розничная сеть, ниже - индивидуальные предприниматели
+LINK_NAMES = ("Завод", "Розничная сеть")
+# Сколько продуктов (от и до) поставляет звено по уровню: заводы выпускают больше
+PRODUCTS_PER_LINK = ((5, 20), (3, 10))
+TRADER_PRODUCTS = (1, 5)
+# Даты создания звеньев распределены по последним трем годам
+CREATED_SPAN = 3 * 365 * 24 * 3600
+
+# Порядок значений в строках звеньев и контактов для COPY
+LINK_COLUMNS = (
+    "id",
+    "name",
+    "supplier_id",
+    "dept",
+    "creation_date",
+    "level",
+    "path",
+    "modified_at",
+)
+CONTACT_COLUMNS = ("id", "email", "country", "city", "street", "house_number")
+
+
+def reserve_ids(model, count):
+    """Выделяет count значений из последовательности первичного ключа таблицы"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+            "FROM generate_series(1, %s)",
+            [model._meta.db_table, count],
+        )
+        return [pk for (pk,) in cursor.fetchall()]
+
+
+def analyze(*models):
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+
+class NetworkGenerator:
+    """Генерирует сеть поставок: factories заводов и depth уровней звеньев под ними.
+
+    У каждого звена в среднем fan_out прямых покупателей (от половины до полутора).
+    Популярность продуктов и городов убывает по закону Ципфа, задолженность есть
+    у доли debt_share звеньев с поставщиком. Звенья, контакты и строки связей M2M
+    загружаются уровень за уровнем пакетами по batch_size через COPY (только
+    PostgreSQL) с id, заранее выделенными из последовательностей, поэтому уровень,
+    путь и даты звена вычисляются здесь же. Сигналы при этом не отправляются.
+    Одинаковый seed на пустой БД дает одинаковую сеть.
+    """
+
+    def __init__(
+        self,
+        factories,
+        depth,
+        fan_out,
+        products=1000,
+        debt_share=0.3,
+        seed=0,
+        batch_size=5000,
+    ):
+        self.factories = factories
+        self.depth = depth
+        self.fan_out = fan_out
+        self.products = products
+        self.debt_share = debt_share
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.counts = {"links": 0, "contacts": 0, "products": 0}
+
+    def generate(self, rebuild_rollups=True, progress=None):
+        """Создает сеть одной транзакцией. Возвращает число созданных звеньев,
+        контактов и продуктов. progress(уровень, звеньев) вызывается после уровня"""
+        self.now = timezone.now()
+        with transaction.atomic():
+            self.product_ids = self.create_products()
+            # Вес продукта с рангом r - 1/r
+            self.product_weights = list(
+                accumulate(1 / rank for rank in range(1, len(self.product_ids) + 1))
+            )
+
+            parents = None
+            for level in range(self.depth + 1):
+                if level == 0:
+                    specs = ((None, "") for _ in range(self.factories))
+                else:
+                    specs = self.children_of(parents)
+                # Покупатели последнего уровня не нужны
+                parents = [] if level < self.depth else None
+                created = 0
+                while batch := list(islice(specs, self.batch_size)):
+                    links = self.create_links(level, batch)
+                    created += len(links)
+                    if parents is not None:
+                        parents.extend(links)
+                if progress is not None:
+                    progress(level, created)
+                if not parents:
+                    break
+
+            # Статистика планировщика для загруженных таблиц, иначе пересборка сводок
+            # и первые запросы к сети планируются как для пустых таблиц
+            analyze(
+                ChainLink,
+                Contact,
+                ChainLink.contacts.through,
+                ChainLink.products.through,
+            )
+            if rebuild_rollups:
+                rebuild_dept_rollups()
+            invalidate_chain_links()
+        return self.counts
+
+    def children_of(self, parents):
+        """(id поставщика, путь) для покупателей каждого звена предыдущего уровня"""
+        low = self.fan_out // 2
+        high = 2 * self.fan_out - low
+        for pk, path in parents:
+            child_path = f"{path}{pk}/"
+            for _ in range(self.random.randint(low, high)):
+                yield pk, child_path
+
+    def create_products(self):
+        start = datetime.date(2015, 1, 1)
+        products = [
+            Product(
+                name=self.random.choice(PRODUCT_NAMES),
+                model=f"{self.random.choice(BRANDS)} {number}",
+                release_date=start + datetime.timedelta(self.random.randrange(3650)),
+            )
+            for number in range(1, self.products + 1)
+        ]
+        products = Product.objects.bulk_create(products, batch_size=self.batch_size)
+        self.counts["products"] += len(products)
+        return [product.pk for product in products]
+
+    def create_links(self, level, specs):
+        """Создает звенья уровня с контактами и продуктами. Возвращает [(id, путь)]"""
+        rnd = self.random
+        link_ids = reserve_ids(ChainLink, len(specs))
+        links, contacts, contact_links, product_links = [], [], [], []
+        low, high = (
+            PRODUCTS_PER_LINK[level]
+            if level < len(PRODUCTS_PER_LINK)
+            else TRADER_PRODUCTS
+        )
+        for pk, (supplier_id, path) in zip(link_ids, specs):
+            self.counts["links"] += 1
+            number = self.counts["links"]
+            if level < len(LINK_NAMES):
+                name = f"{LINK_NAMES[level]} {number}"
+            else:
+                name = f"ИП {rnd.choice(SURNAMES)} {number}"
+            dept = Decimal(0)
+            if supplier_id is not None and rnd.random() < self.debt_share:
+                dept = Decimal(rnd.randrange(1, 10_000_000)) / 100
+            created = self.now - datetime.timedelta(seconds=rnd.randrange(CREATED_SPAN))
+            links.append((pk, name, supplier_id, dept, created, level, path, created))
+
+            # У заводов бывает по два контакта
+            for _ in range(rnd.randint(1, 2) if level == 0 else 1):
+                contacts.append(self.make_contact())
+                contact_links.append(pk)
+            product_links.extend(
+                (pk, product_id)
+                for product_id in self.pick_products(rnd.randint(low, high))
+            )
+
+        contact_ids = reserve_ids(Contact, len(contacts))
+        copy_rows(ChainLink, LINK_COLUMNS, links)
+        copy_rows(
+            Contact,
+            CONTACT_COLUMNS,
+            ((pk, *contact) for pk, contact in zip(contact_ids, contacts)),
+        )
+        copy_rows(
+            ChainLink.contacts.through,
+            ("chainlink_id", "contact_id"),
+            zip(contact_links, contact_ids),
+        )
+        copy_rows(
+            ChainLink.products.through, ("chainlink_id", "product_id"), product_links
+        )
+        return [(pk, path) for pk, _, _, _, _, _, path, _ in links]
+
+    def make_contact(self):
+        rnd = self.random
+        number = self.counts["contacts"] = self.counts["contacts"] + 1
+        country, _, cities = rnd.choices(
+            COUNTRIES, weights=[weight for _, weight, _ in COUNTRIES]
+        )[0]
+        city = rnd.choices(
+            cities, weights=[1 / rank for rank in range(1, len(cities) + 1)]
+        )[0]
+        return (
+            f"contact{number}@example.com",
+            country,
+            city,
+            rnd.choice(STREETS),
+            rnd.randint(1, 200),
+        )
+
+    def pick_products(self, count):
+        """Разные продукты с распределением Ципфа"""
+        count = min(count, len(self.product_ids))
+        total = self.product_weights[-1]
+        picked = {}
+        while len(picked) < count:
+            index = bisect_left(self.product_weights, self.random.random() * total)
+            picked[self.product_ids[index]] = None
+        return list(picked)
@@ -0,0 +1,114 @@
+import csv
+import json
+
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from retail.models import Contact, Product
+from retail.serializers import ContactSerializer, ProductSerializer
+
+# Импортируемые таблицы: модель и сериализатор для проверки строк
+IMPORT_TARGETS = {
+    "products": (Product, ProductSerializer),
+    "contacts": (Contact, ContactSerializer),
+}
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def read_rows(stream, fmt):
+    """Построчно читает CSV (с заголовком) или NDJSON, возвращая (номер строки, данные)"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Пустые ячейки считаются отсутствующими, чтобы применились значения по умолчанию
+            yield reader.line_num, {key: value for key, value in row.items() if value}
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as exc:
+            yield line_number, {"__error__": str(exc)}
+
+
+def import_rows(target, rows, chunk_size=5000, report=None):
+    """Проверяет и загружает строки пакетами по chunk_size.
+
+    Каждый пакет записывается отдельной транзакцией: через COPY в PostgreSQL,
+    иначе через bulk_create. Строки с ошибками не загружаются и, если передан
+    report, записываются в него в формате NDJSON. Возвращает (загружено, ошибок).
+    """
+    model, serializer_class = IMPORT_TARGETS[target]
+    serializer = serializer_class()
+    imported = failed = 0
+
+    chunk = []
+    for line_number, data in rows:
+        errors = None
+        if isinstance(data, dict) and "__error__" in data:
+            errors = {"non_field_errors": [data["__error__"]]}
+        else:
+            try:
+                chunk.append(model(**serializer.run_validation(data)))
+            except ValidationError as exc:
+                errors = exc.detail
+
+        if errors is not None:
+            failed += 1
+            if report is not None:
+                report.write(
+                    json.dumps(
+                        {"line": line_number, "errors": errors}, ensure_ascii=False
+                    )
+                    + "\n"
+                )
+
+        if len(chunk) >= chunk_size:
+            imported += _load(model, chunk)
+            chunk = []
+
+    if chunk:
+        imported += _load(model, chunk)
+    return imported, failed
+
+
+def copy_rows(model, columns, rows):
+    """Загружает строки (значения в порядке columns) в таблицу модели через COPY.
+
+    Данные передаются в формате CSV: каждое значение в кавычках с удвоением
+    кавычек внутри, поэтому запятые, переводы строк и обратная косая черта
+    сохраняются как есть, а None записывается без кавычек и становится NULL.
+    """
+    sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ", ".join(connection.ops.quote_name(column) for column in columns),
+    )
+    with connection.cursor() as cursor, cursor.cursor.copy(sql) as copy:
+        for row in rows:
+            copy.write(",".join(map(_csv_value, row)) + "\n")
+
+
+def _csv_value(value):
+    return "" if value is None else '"{}"'.format(str(value).replace('"', '""'))
+
+
+def _load(model, objects):
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    with transaction.atomic():
+        if connection.vendor != "postgresql":
+            model.objects.bulk_create(objects)
+        else:
+            copy_rows(
+                model,
+                [field.column for field in fields],
+                (
+                    [
+                        field.get_db_prep_save(getattr(obj, field.attname), connection)
+                        for field in fields
+                    ]
+                    for obj in objects
+                ),
+            )
+    return len(objects)
@@ -0,0 +1,76 @@
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from retail.benchmarks import HOST, RequestBenchmarkCommand
+
+
+class Command(RequestBenchmarkCommand):
+    help = (
+        "Измеряет время запроса к API с новым соединением с БД на каждый запрос "
+        "и с переиспользованием соединения (CONN_MAX_AGE или пул psycopg)"
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--conn-max-age",
+            type=int,
+            default=None,
+            help="CONN_MAX_AGE для замера с постоянным соединением "
+            "(по умолчанию из настроек, если там 0 - 60)",
+        )
+
+    def measure(self, title, handler, environ, requests):
+        """Замер с числом открытых соединений. По сигналам начала и конца запроса
+        Django закрывает или возвращает в пул соединения"""
+        opened = []
+
+        def on_connect(**kwargs):
+            opened.append(kwargs["connection"].alias)
+
+        connection_created.connect(on_connect)
+        try:
+            timings = self.run_requests(handler, environ, requests)
+        finally:
+            connection_created.disconnect(on_connect)
+            connection.close()
+        return self.report(title, timings, f", новых соединений {len(opened)}")
+
+    def handle(self, *args, **options):
+        environ = self.get_environ(options)
+        settings_dict = connection.settings_dict
+        requests = options["requests"]
+        self.stdout.write(f"{requests} запросов GET {options['url']}:")
+
+        with override_settings(ALLOWED_HOSTS=[HOST]):
+            handler = WSGIHandler()
+            # Прогрев: импорты, кэши схемы и пользователя
+            self.run_requests(handler, environ, 5)
+            connection.close()
+
+            if "pool" in settings_dict.get("OPTIONS", {}):
+                # Без пула в том же процессе не сравнить: пул задается при запуске
+                self.measure("пул psycopg", handler, environ, requests)
+                self.stdout.write(
+                    "  Для сравнения запустите команду с DB_POOL_ENABLED=False"
+                )
+                return
+
+            conn_max_age = options["conn_max_age"]
+            if conn_max_age is None:
+                conn_max_age = settings_dict["CONN_MAX_AGE"] or 60
+            previous = settings_dict["CONN_MAX_AGE"]
+            try:
+                settings_dict["CONN_MAX_AGE"] = 0
+                before = self.measure(
+                    "новое соединение на запрос", handler, environ, requests
+                )
+                settings_dict["CONN_MAX_AGE"] = conn_max_age
+                after = self.measure(
+                    f"CONN_MAX_AGE={conn_max_age}", handler, environ, requests
+                )
+            finally:
+                settings_dict["CONN_MAX_AGE"] = previous
+        self.stdout.write(f"  p50 быстрее в {before / after:.1f} раза")
@@ -0,0 +1,82 @@
+import io
+import timeit
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from retail.parsers import ORJSONParser
+from retail.renderers import ORJSONRenderer
+
+
+def make_payload(links, raw=False):
+    """Страница списка звеньев. raw - задолженность и даты объектами Python
+    (как в строках values()), иначе строками, как их отдает сериализатор"""
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    results = []
+    for pk in range(1, links + 1):
+        dept = Decimal(pk * 7919 % 10**7) / 100
+        creation_date = created + timedelta(seconds=pk * 37, microseconds=pk)
+        results.append(
+            {
+                "id": pk,
+                "name": f"Звено {pk}",
+                "dept": dept if raw else f"{dept:.2f}",
+                "creation_date": (
+                    creation_date
+                    if raw
+                    else creation_date.isoformat().replace("+00:00", "Z")
+                ),
+                "level": pk % 5,
+                "path": "/".join(str(i) for i in range(1, pk % 5 + 1)),
+                "supplier": pk // 2 or None,
+                "products": [pk % 100 + 1, pk % 300 + 1],
+                "contacts": [pk % 50 + 1],
+            }
+        )
+    return {"next": None, "previous": None, "results": results}
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость JSONRenderer/JSONParser и ORJSONRenderer/ORJSONParser"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--links", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def measure(self, func):
+        return min(timeit.repeat(func, number=1, repeat=self.repeat)) * 1000
+
+    def handle(self, *args, **options):
+        self.repeat = options["repeat"]
+        for raw in (False, True):
+            payload = make_payload(options["links"], raw=raw)
+            content = JSONRenderer().render(payload)
+            if ORJSONRenderer().render(payload) != content:
+                raise CommandError("Вывод ORJSONRenderer отличается от JSONRenderer")
+
+            title = "объекты Python" if raw else "строки сериализатора"
+            self.stdout.write(
+                f"{options['links']} звеньев ({title}), {len(content)} байт, мс:"
+            )
+            results = [
+                (
+                    "render",
+                    self.measure(lambda: JSONRenderer().render(payload)),
+                    self.measure(lambda: ORJSONRenderer().render(payload)),
+                )
+            ]
+            if not raw:
+                results.append(
+                    (
+                        "parse",
+                        self.measure(lambda: JSONParser().parse(io.BytesIO(content))),
+                        self.measure(lambda: ORJSONParser().parse(io.BytesIO(content))),
+                    )
+                )
+            for name, drf, fast in results:
+                self.stdout.write(
+                    f"  {name}: json {drf:.1f}, orjson {fast:.1f}, x{drf / fast:.1f}"
+                )
@@ -0,0 +1,94 @@
+import timeit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test.utils import override_settings
+
+from config.metrics import QueryStats, _query_stats, metrics, record_query
+from retail.benchmarks import HOST, RequestBenchmarkCommand
+
+MIDDLEWARE = "config.metrics.MetricsMiddleware"
+
+
+class Command(RequestBenchmarkCommand):
+    help = "Сравнивает время запросов к API с MetricsMiddleware и без нее"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=3,
+            help="Замеры чередуются, в итог идет лучший p50 каждого варианта",
+        )
+
+    def measure_parts(self):
+        """Собственные затраты: учет одного запроса и обертка одного запроса к БД, мкс"""
+        stats = QueryStats()
+        observe = min(
+            timeit.repeat(
+                lambda: metrics.observe("benchmark", "GET", 200, 0.01, stats, 1000),
+                number=10000,
+                repeat=5,
+            )
+        )
+        token = _query_stats.set(stats)
+        try:
+            wrapper = min(
+                timeit.repeat(
+                    lambda: record_query(lambda *args: None, "", (), False, {}),
+                    number=10000,
+                    repeat=5,
+                )
+            )
+        finally:
+            _query_stats.reset(token)
+        return observe * 100, wrapper * 100
+
+    def handle(self, *args, **options):
+        environ = self.get_environ(options)
+        requests = options["requests"]
+        middleware = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE]
+        self.stdout.write(f"{requests} запросов GET {options['url']}:")
+
+        # Постоянное соединение, чтобы разброс времени подключения не скрывал разницу
+        previous = connection.settings_dict["CONN_MAX_AGE"]
+        connection.settings_dict["CONN_MAX_AGE"] = None
+        try:
+            with override_settings(ALLOWED_HOSTS=[HOST], MIDDLEWARE=middleware):
+                plain = WSGIHandler()
+            with override_settings(
+                ALLOWED_HOSTS=[HOST],
+                MIDDLEWARE=[MIDDLEWARE, *middleware],
+                METRICS_ENABLED=True,
+            ):
+                handlers = {"без метрик": plain, "с метриками": WSGIHandler()}
+                results = {title: [] for title in handlers}
+                for handler in handlers.values():
+                    # Прогрев
+                    self.run_requests(handler, environ, 5)
+                for _ in range(options["rounds"]):
+                    for title, handler in handlers.items():
+                        results[title].append(
+                            self.run_requests(handler, environ, requests)
+                        )
+        finally:
+            connection.settings_dict["CONN_MAX_AGE"] = previous
+            connection.close()
+            metrics.reset()
+
+        p50 = {}
+        for title, rounds in results.items():
+            best = min(rounds, key=lambda timings: sorted(timings)[len(timings) // 2])
+            p50[title] = self.report(title, best)
+        overhead = p50["с метриками"] - p50["без метрик"]
+        self.stdout.write(
+            f"  Разница p50: {overhead * 1000:.0f} мкс "
+            f"({overhead / p50['без метрик'] * 100:.1f}%)"
+        )
+        observe, wrapper = self.measure_parts()
+        metrics.reset()
+        self.stdout.write(
+            f"  Учет запроса {observe:.1f} мкс, обертка запроса к БД {wrapper:.2f} мкс"
+        )
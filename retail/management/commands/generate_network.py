@@ -0,0 +1,75 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+from retail.generators import NetworkGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует сеть поставок: заводы, розничные сети и ИП с продуктами, "
+        "контактами и задолженностью. Сеть около 1 млн звеньев: "
+        "--factories 100 --depth 4 --fan-out 10"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--factories", type=int, default=10)
+        parser.add_argument(
+            "--depth", type=int, default=3, help="Число уровней под заводами"
+        )
+        parser.add_argument(
+            "--fan-out", type=int, default=5, help="Среднее число покупателей звена"
+        )
+        parser.add_argument(
+            "--products", type=int, default=1000, help="Размер каталога продуктов"
+        )
+        parser.add_argument(
+            "--debt-share",
+            type=float,
+            default=0.3,
+            help="Доля звеньев с задолженностью перед поставщиком",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--skip-rollups",
+            action="store_true",
+            help="Не пересобирать сводки задолженности (rebuild_dept_rollups)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Генерация сети поддерживается только для PostgreSQL")
+        for name in ("factories", "products", "batch_size"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} должно быть больше 0")
+        if options["depth"] < 0 or options["fan_out"] < 0:
+            raise CommandError("--depth и --fan-out не могут быть отрицательными")
+        if not 0 <= options["debt_share"] <= 1:
+            raise CommandError("--debt-share должно быть от 0 до 1")
+
+        generator = NetworkGenerator(
+            factories=options["factories"],
+            depth=options["depth"],
+            fan_out=options["fan_out"],
+            products=options["products"],
+            debt_share=options["debt_share"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        start = time.perf_counter()
+
+        def progress(level, created):
+            self.stdout.write(
+                f"  уровень {level}: {created} звеньев "
+                f"({time.perf_counter() - start:.1f} с)"
+            )
+
+        counts = generator.generate(
+            rebuild_rollups=not options["skip_rollups"], progress=progress
+        )
+        self.stdout.write(
+            f"Создано звеньев: {counts['links']}, контактов: {counts['contacts']}, "
+            f"продуктов: {counts['products']} за {time.perf_counter() - start:.1f} с"
+        )
@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management import BaseCommand, CommandError
+
+from retail.importers import IMPORT_FORMATS, IMPORT_TARGETS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = "Потоковый импорт продуктов или контактов из CSV или NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=IMPORT_TARGETS)
+        parser.add_argument("path", help="Путь к файлу или - для stdin")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, default=None)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--errors", default=None, help="Файл отчета об ошибочных строках (NDJSON)"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("ndjson" if path.endswith(".ndjson") else "csv")
+
+        try:
+            source = (
+                sys.stdin
+                if path == "-"
+                else open(path, encoding="utf-8-sig", newline="")
+            )
+        except OSError as exc:
+            raise CommandError(exc)
+
+        report = (
+            open(options["errors"], "w", encoding="utf-8")
+            if options["errors"]
+            else None
+        )
+        try:
+            imported, failed = import_rows(
+                options["target"],
+                read_rows(source, fmt),
+                chunk_size=options["chunk_size"],
+                report=report,
+            )
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if report is not None:
+                report.close()
+
+        self.stdout.write(f"Загружено: {imported}, с ошибками: {failed}")
@@ -0,0 +1,14 @@
+from django.core.management import BaseCommand
+
+from retail.rollups import rebuild_dept_rollups
+
+
+class Command(BaseCommand):
+    help = "Заново строит сводки задолженности (после загрузки данных в обход ORM)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        groups = rebuild_dept_rollups(chunk_size=options["chunk_size"])
+        self.stdout.write(f"Групп в сводках: {groups}")
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from retail.rollups import refresh_dept_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит в сводки задолженности журнал изменений и пересчитывает группы, "
+        "из которых ушли все звенья с минимумом или максимумом (периодически)"
+    )
+
+    def handle(self, *args, **options):
+        changes, groups = refresh_dept_rollups()
+        self.stdout.write(
+            f"Перенесено изменений: {changes}, пересчитано групп: {groups}"
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:47
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retail", "0007_alter_chainlink_contacts_alter_chainlink_products"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                django.db.models.functions.text.Lower("country"),
+                name="contact_country_lower_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+def fill_level_and_path(apps, schema_editor):
+    """Рассчитывает уровень и путь существующих звеньев обходом от заводов"""
+    ChainLink = apps.get_model("retail", "ChainLink")
+
+    children = {}
+    for pk, supplier_id in ChainLink.objects.values_list("pk", "supplier_id"):
+        children.setdefault(supplier_id, []).append(pk)
+
+    changed = []
+    queue = [(pk, 0, "") for pk in children.get(None, [])]
+    while queue:
+        pk, level, path = queue.pop()
+        if level:
+            changed.append(ChainLink(pk=pk, level=level, path=path))
+        for child in children.get(pk, []):
+            queue.append((child, level + 1, f"{path}{pk}/"))
+
+    ChainLink.objects.bulk_update(changed, ["level", "path"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retail", "0008_contact_country_lower_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chainlink",
+            name="level",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Уровень иерархии"
+            ),
+        ),
+        migrations.AddField(
+            model_name="chainlink",
+            name="path",
+            field=models.TextField(
+                blank=True,
+                default="",
+                editable=False,
+                verbose_name="Цепочка поставщиков",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chainlink",
+            index=models.Index(fields=["level", "id"], name="chainlink_level_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="chainlink",
+            index=models.Index(
+                fields=["path"],
+                name="chainlink_path_idx",
+                opclasses=["text_pattern_ops"],
+            ),
+        ),
+        migrations.RunPython(fill_level_and_path, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retail", "0009_chainlink_level_path"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chainlink",
+            name="modified_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Дата изменения",
+            ),
+        ),
+    ]
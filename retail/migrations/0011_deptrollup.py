@@ -0,0 +1,145 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:05
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def fill_dept_rollups(apps, schema_editor):
+    """Строит сводки задолженности по существующим звеньям"""
+    ChainLink = apps.get_model("retail", "ChainLink")
+    DeptRollup = apps.get_model("retail", "DeptRollup")
+
+    links = {}
+    for pk, dept, level, path in ChainLink.objects.values_list(
+        "pk", "dept", "level", "path"
+    ):
+        groups = {("subtree", str(pk), ""), ("level", str(level), "")}
+        groups.update(("subtree", ancestor, "") for ancestor in path.split("/")[:-1])
+        links[pk] = (dept, groups)
+
+    contacts = (
+        ChainLink.contacts.through.objects.annotate(
+            country=Lower("contact__country"), city=Lower("contact__city")
+        )
+        .values_list("chainlink_id", "country", "city")
+        .distinct()
+    )
+    for pk, country, city in contacts:
+        if country:
+            links[pk][1].add(("country", country, ""))
+            if city:
+                links[pk][1].add(("city", country, city))
+
+    rollups = {}
+    for dept, groups in links.values():
+        for group in groups:
+            total, count, low, high = rollups.get(group, (Decimal(0), 0, dept, dept))
+            rollups[group] = (total + dept, count + 1, min(low, dept), max(high, dept))
+
+    DeptRollup.objects.bulk_create(
+        [
+            DeptRollup(
+                kind=kind,
+                key=key,
+                city=city,
+                total=total,
+                count=count,
+                min_dept=low,
+                max_dept=high,
+            )
+            for (kind, key, city), (total, count, low, high) in rollups.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retail", "0010_chainlink_modified_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeptRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("subtree", "Поддерево звена"),
+                            ("level", "Уровень иерархии"),
+                            ("country", "Страна контакта"),
+                            ("city", "Город контакта"),
+                        ],
+                        max_length=10,
+                        verbose_name="Вид",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255, verbose_name="Группа")),
+                (
+                    "city",
+                    models.CharField(default="", max_length=100, verbose_name="Город"),
+                ),
+                (
+                    "total",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=20, verbose_name="Сумма"
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество звеньев"
+                    ),
+                ),
+                (
+                    "min_dept",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=15,
+                        null=True,
+                        verbose_name="Минимум",
+                    ),
+                ),
+                (
+                    "max_dept",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=15,
+                        null=True,
+                        verbose_name="Максимум",
+                    ),
+                ),
+                (
+                    "stale",
+                    models.BooleanField(
+                        default=False, verbose_name="Требует пересчета"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Сводка задолженности",
+                "verbose_name_plural": "Сводки задолженности",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "key", "city"), name="deptrollup_group_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_dept_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:20
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ("chainlink", "name", "chainlink_name_trgm_idx"),
+    ("contact", "city", "contact_city_trgm_idx"),
+    ("contact", "street", "contact_street_trgm_idx"),
+    ("contact", "email", "contact_email_trgm_idx"),
+    ("product", "name", "product_name_trgm_idx"),
+    ("product", "model", "product_model_trgm_idx"),
+]
+
+
+def trigram_index(field, name):
+    return django.contrib.postgres.indexes.GinIndex(
+        fields=[field], name=name, opclasses=["gin_trgm_ops"]
+    )
+
+
+def check_trigram_available(apps, schema_editor):
+    """pg_trgm входит в contrib PostgreSQL, но на сервере его может не быть"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            raise RuntimeError(
+                "Для поиска нужно расширение PostgreSQL pg_trgm: установите на сервер "
+                "БД пакет contrib (например, postgresql-contrib) и повторите migrate"
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retail", "0011_deptrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_trigram_available, migrations.RunPython.noop),
+        TrigramExtension(),
+        *(
+            migrations.AddIndex(model_name=model_name, index=trigram_index(field, name))
+            for model_name, field, name in TRIGRAM_INDEXES
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:24
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retail", "0012_search_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chainlink",
+            index=models.Index(fields=["dept"], name="chainlink_dept_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="chainlink",
+            index=models.Index(fields=["creation_date"], name="chainlink_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="chainlink",
+            index=models.Index(
+                condition=models.Q(("dept__gt", 0)),
+                fields=["id"],
+                name="chainlink_has_dept_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                django.db.models.functions.text.Lower("city"),
+                name="contact_city_lower_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retail", "0013_chainlink_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeptRollupChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("subtree", "Поддерево звена"),
+                            ("level", "Уровень иерархии"),
+                            ("country", "Страна контакта"),
+                            ("city", "Город контакта"),
+                        ],
+                        max_length=10,
+                        verbose_name="Вид",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255, verbose_name="Группа")),
+                (
+                    "city",
+                    models.CharField(default="", max_length=100, verbose_name="Город"),
+                ),
+                (
+                    "total",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Изменение суммы",
+                    ),
+                ),
+                (
+                    "count",
+                    models.IntegerField(default=0, verbose_name="Изменение количества"),
+                ),
+                (
+                    "min_added",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=15,
+                        null=True,
+                        verbose_name="Минимум добавленных",
+                    ),
+                ),
+                (
+                    "max_added",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=15,
+                        null=True,
+                        verbose_name="Максимум добавленных",
+                    ),
+                ),
+                (
+                    "min_removed",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=15,
+                        null=True,
+                        verbose_name="Минимум ушедших",
+                    ),
+                ),
+                (
+                    "max_removed",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=15,
+                        null=True,
+                        verbose_name="Максимум ушедших",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изменение сводки задолженности",
+                "verbose_name_plural": "Изменения сводок задолженности",
+            },
+        ),
+    ]
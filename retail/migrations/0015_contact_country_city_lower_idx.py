@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:01
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retail", "0014_deptrollupchange"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="contact",
+            name="contact_country_lower_idx",
+        ),
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                django.db.models.functions.text.Lower("country"),
+                django.db.models.functions.text.Lower("city"),
+                name="contact_country_lower_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+def fill_extreme_counts(apps, schema_editor):
+    """Считает число звеньев с минимумом и максимумом в существующих сводках"""
+    DeptRollup = apps.get_model("retail", "DeptRollup")
+    ChainLink = apps.get_model("retail", "ChainLink")
+    Contact = apps.get_model("retail", "Contact")
+
+    quote = schema_editor.connection.ops.quote_name
+    rollups = quote(DeptRollup._meta.db_table)
+    links = quote(ChainLink._meta.db_table)
+    through = quote(ChainLink.contacts.through._meta.db_table)
+    contacts = quote(Contact._meta.db_table)
+    with_contacts = (
+        f"{links} l JOIN {through} t ON t.chainlink_id = l.id "
+        f"JOIN {contacts} c ON c.id = t.contact_id"
+    )
+    # Строки (ключ, город, задолженность) по видам групп, как в retail.rollups
+    sources = {
+        "subtree": "SELECT unnest(string_to_array(l.path || l.id, '/')), '', l.dept "
+        f"FROM {links} l",
+        "level": f"SELECT l.level::text, '', l.dept FROM {links} l",
+        "country": "SELECT key, '', dept FROM (SELECT DISTINCT l.id, "
+        f"lower(c.country) AS key, l.dept FROM {with_contacts} "
+        "WHERE c.country <> '') AS rows",
+        "city": "SELECT key, city, dept FROM (SELECT DISTINCT l.id, "
+        "lower(c.country) AS key, lower(c.city) AS city, l.dept "
+        f"FROM {with_contacts} WHERE c.country <> '' AND c.city <> '') AS rows",
+    }
+    with schema_editor.connection.cursor() as cursor:
+        for kind, source in sources.items():
+            cursor.execute(
+                f"UPDATE {rollups} r SET min_count = s.min_count, "
+                "max_count = s.max_count FROM (SELECT r.id, "
+                "COUNT(*) FILTER (WHERE g.dept = r.min_dept) AS min_count, "
+                "COUNT(*) FILTER (WHERE g.dept = r.max_dept) AS max_count "
+                f"FROM {rollups} r JOIN ({source}) AS g (key, city, dept) "
+                "ON r.key = g.key AND r.city = g.city WHERE r.kind = %s "
+                "GROUP BY r.id) s WHERE r.id = s.id",
+                [kind],
+            )
+    # Крайние значения, которых уже нет в группе (журнал еще не перенесен),
+    # пересчитывает команда refresh_dept_rollups
+    DeptRollup.objects.filter(count__gt=0, min_count=0).update(stale=True)
+    DeptRollup.objects.filter(count__gt=0, max_count=0).update(stale=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("retail", "0015_contact_country_city_lower_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deptrollup",
+            name="max_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Звеньев с максимумом"
+            ),
+        ),
+        migrations.AddField(
+            model_name="deptrollup",
+            name="min_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Звеньев с минимумом"
+            ),
+        ),
+        migrations.AddField(
+            model_name="deptrollupchange",
+            name="max_added_count",
+            field=models.IntegerField(
+                default=0, verbose_name="Звеньев с максимумом добавленных"
+            ),
+        ),
+        migrations.AddField(
+            model_name="deptrollupchange",
+            name="max_removed_count",
+            field=models.IntegerField(
+                default=0, verbose_name="Звеньев с максимумом ушедших"
+            ),
+        ),
+        migrations.AddField(
+            model_name="deptrollupchange",
+            name="min_added_count",
+            field=models.IntegerField(
+                default=0, verbose_name="Звеньев с минимумом добавленных"
+            ),
+        ),
+        migrations.AddField(
+            model_name="deptrollupchange",
+            name="min_removed_count",
+            field=models.IntegerField(
+                default=0, verbose_name="Звеньев с минимумом ушедших"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="deptrollup",
+            index=models.Index(
+                condition=models.Q(("stale", True)),
+                fields=["id"],
+                name="deptrollup_stale_idx",
+            ),
+        ),
+        migrations.RunPython(fill_extreme_counts, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,20 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.functions import Concat, Lower, Substr
+from django.dispatch import Signal
+from django.utils import timezone
 
 NULLABLE = {"blank": True, "null": True}
 
+SUPPLIER_CYCLE_ERROR = "Поставщик не может входить в цепочку поставки звена"
+
+# Условие "есть задолженность" (частичный индекс chainlink_has_dept_idx)
+HAS_DEPT = models.Q(dept__gt=0)
+
+# Отправляется после массового изменения уровня и пути звеньев поддерева
+subtree_changed = Signal()
+
 
 class Contact(models.Model):
     # chain = models.ForeignKey("Chain", related_name="contacts", on_delete=models.SET_NULL, **NULLABLE)
@@ -17,10 +30,48 @@ class Contact(models.Model):
     def __str__(self):
         return f"{self.email}: {self.country}, {self.city}, {self.street}, {self.house_number}"
 
+    def save(self, *args, **kwargs):
+        from retail.rollups import track_dept_rollups
+
+        update_fields = kwargs.get("update_fields")
+        if self.pk is None or (
+            update_fields is not None and not {"country", "city"} & set(update_fields)
+        ):
+            return super().save(*args, **kwargs)
+
+        # Страна и город определяют сводки задолженности связанных звеньев
+        with track_dept_rollups(ChainLink.objects.filter(contacts=self.pk)):
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Контакт"
         verbose_name_plural = "Контакты"
         ordering = ["pk"]
+        indexes = [
+            # Фильтр звеньев по стране без учета регистра; город - для вариантов
+            # городов страны в фильтре админки (retail.admin.contact_names)
+            models.Index(
+                Lower("country"), Lower("city"), name="contact_country_lower_idx"
+            ),
+            # Фильтр звеньев по городу без учета регистра
+            models.Index(Lower("city"), name="contact_city_lower_idx"),
+            # Поиск ?search= (retail.search), расширение pg_trgm
+            GinIndex(
+                fields=["city"],
+                name="contact_city_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["street"],
+                name="contact_street_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["email"],
+                name="contact_email_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
 
 
 class Product(models.Model):
@@ -34,6 +85,78 @@ class Product(models.Model):
     class Meta:
         verbose_name = "Продукт"
         verbose_name_plural = "Продукты"
+        indexes = [
+            # Поиск ?search= (retail.search), расширение pg_trgm
+            GinIndex(
+                fields=["name"],
+                name="product_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["model"],
+                name="product_model_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
+
+class ChainLinkQuerySet(models.QuerySet):
+    def with_relations(self):
+        """Подгружает продукты и контакты звеньев (в порядке id) двумя запросами на всю выборку"""
+        return self.prefetch_related(
+            models.Prefetch(
+                "products", queryset=Product.objects.only("pk").order_by("pk")
+            ),
+            models.Prefetch(
+                "contacts", queryset=Contact.objects.only("pk").order_by("pk")
+            ),
+        )
+
+    def in_country(self, country):
+        """Звенья, у которых есть контакт в указанной стране (без учета регистра)"""
+        return self._with_contact_in("country", country)
+
+    def in_city(self, city):
+        """Звенья, у которых есть контакт в указанном городе (без учета регистра)"""
+        return self._with_contact_in("city", city)
+
+    def _with_contact_in(self, field, value):
+        # Контакты ищутся по индексу Lower(field), звенья - по индексу связи contact_id
+        contacts = Contact.objects.alias(value_lower=Lower(field)).filter(
+            value_lower=value.lower()
+        )
+        links = ChainLink.contacts.through.objects.filter(
+            chainlink_id=models.OuterRef("pk"),
+            contact_id__in=contacts.values("pk"),
+        )
+        return self.filter(models.Exists(links))
+
+    def with_product(self, product_id):
+        """Звенья, которые поставляют продукт"""
+        links = ChainLink.products.through.objects.filter(
+            chainlink_id=models.OuterRef("pk"), product_id=product_id
+        )
+        return self.filter(models.Exists(links))
+
+    def with_dept(self):
+        """Звенья с задолженностью перед поставщиком. Условие совпадает с условием
+        частичного индекса chainlink_has_dept_idx, поэтому выборка идет по нему"""
+        return self.filter(HAS_DEPT)
+
+    def descendants_of(self, link, depth=None):
+        """Все звенья ниже по цепочке поставки, не глубже depth уровней"""
+        queryset = self.filter(path__startswith=link.subtree_prefix)
+        if depth is not None:
+            queryset = queryset.filter(level__lte=link.level + depth)
+        return queryset
+
+    def ancestors_of(self, link):
+        """Поставщики звена от завода до непосредственного поставщика"""
+        return self.filter(pk__in=link.path.split("/")[:-1]).order_by("level")
+
+    def touch(self):
+        """Сдвигает метку изменения звеньев, например после изменения их связей M2M"""
+        return self.update(modified_at=timezone.now())
 
 
 class ChainLink(models.Model):
@@ -47,14 +170,274 @@ class ChainLink(models.Model):
         max_digits=15, decimal_places=2, verbose_name="Задолженность", default=0
     )
     creation_date = models.DateTimeField(auto_now=True, verbose_name="Дата создания")
+    # Уровень иерархии (завод - 0) и id всех поставщиков от корня цепочки вида "1/5/".
+    # Поддерживаются при сохранении звена и при удалении поставщика
+    level = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Уровень иерархии"
+    )
+    path = models.TextField(
+        default="", blank=True, editable=False, verbose_name="Цепочка поставщиков"
+    )
+    # Метка изменения для ETag и Last-Modified. Сдвигается при любом изменении полей
+    # и связей звена, в т.ч. массовыми запросами
+    modified_at = models.DateTimeField(
+        default=timezone.now, editable=False, verbose_name="Дата изменения"
+    )
+
+    objects = ChainLinkQuerySet.as_manager()
 
     def reset_dept_and_save(self):
         self.dept = 0
         self.save()
 
+    @property
+    def subtree_prefix(self):
+        """Начало пути всех звеньев, которым это звено поставляет прямо или косвенно"""
+        return f"{self.path}{self.pk}/"
+
+    def is_in_subtree_of(self, link):
+        return self.pk == link.pk or self.path.startswith(link.subtree_prefix)
+
+    def clean(self):
+        if self.pk and self.supplier and self.supplier.is_in_subtree_of(self):
+            raise ValidationError({"supplier": SUPPLIER_CYCLE_ERROR})
+
+    def save(self, *args, **kwargs):
+        from retail.rollups import track_dept_rollups
+
+        self.modified_at = timezone.now()
+        update_fields = kwargs.get("update_fields")
+        hierarchy = update_fields is None or "supplier" in update_fields
+        if update_fields is not None:
+            extra = {"level", "path", "modified_at"} if hierarchy else {"modified_at"}
+            kwargs["update_fields"] = {*update_fields, *extra}
+        if not hierarchy and "dept" not in update_fields:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            previous = None
+            if hierarchy:
+                previous = self._set_hierarchy()
+
+            with track_dept_rollups(ChainLink.objects.filter(pk=self.pk)) as tracked:
+                super().save(*args, **kwargs)
+                tracked.add(self.pk)
+
+            if previous is not None and previous["path"] != self.path:
+                self._move_subtree(
+                    f"{previous['path']}{self.pk}/", self.level - previous["level"]
+                )
+
+    def _set_hierarchy(self):
+        """Вычисляет уровень и путь по поставщику. Возвращает прежние уровень и путь"""
+        # Значения берутся из БД, т.к. объекты в памяти могут быть устаревшими
+        previous = None
+        if self.pk is not None:
+            previous = (
+                ChainLink.objects.filter(pk=self.pk).values("level", "path").first()
+            )
+
+        supplier = None
+        if self.supplier_id is not None:
+            supplier = (
+                ChainLink.objects.filter(pk=self.supplier_id)
+                .values("level", "path")
+                .first()
+            )
+        if previous is not None and supplier is not None:
+            own_prefix = f"{previous['path']}{self.pk}/"
+            if self.supplier_id == self.pk or supplier["path"].startswith(own_prefix):
+                raise ValidationError({"supplier": SUPPLIER_CYCLE_ERROR})
+
+        if supplier is None:
+            self.level, self.path = 0, ""
+        else:
+            self.level = supplier["level"] + 1
+            self.path = f"{supplier['path']}{self.supplier_id}/"
+        return previous
+
+    def _move_subtree(self, old_prefix, level_delta):
+        """Переносит все нижележащие звенья под новый путь одним запросом"""
+        from retail.rollups import track_subtree_move
+
+        subtree = ChainLink.objects.filter(path__startswith=old_prefix)
+        with track_subtree_move(
+            subtree,
+            old_prefix.split("/")[:-1],
+            self.subtree_prefix.split("/")[:-1],
+            level_delta,
+        ):
+            updated = subtree.update(
+                path=Concat(
+                    models.Value(self.subtree_prefix),
+                    Substr("path", len(old_prefix) + 1),
+                    output_field=models.TextField(),
+                ),
+                level=models.F("level") + level_delta,
+                modified_at=self.modified_at,
+            )
+        if updated:
+            subtree_changed.send(sender=ChainLink, link=self)
+
+    def detach_subtree(self):
+        """Делает прямых получателей звена корнями перед его удалением"""
+        from retail.rollups import track_subtree_move
+
+        current = ChainLink.objects.filter(pk=self.pk).values("level", "path").first()
+        if current is None:
+            return
+        prefix = f"{current['path']}{self.pk}/"
+        subtree = ChainLink.objects.filter(path__startswith=prefix)
+        with track_subtree_move(
+            subtree, prefix.split("/")[:-1], [], -current["level"] - 1
+        ):
+            updated = subtree.update(
+                path=Substr("path", len(prefix) + 1),
+                level=models.F("level") - current["level"] - 1,
+                modified_at=timezone.now(),
+            )
+        if updated:
+            subtree_changed.send(sender=ChainLink, link=self)
+
     def __str__(self):
         return self.name
 
     class Meta:
         verbose_name = "Звено"
         verbose_name_plural = "Звенья"
+        indexes = [
+            # Фильтр и keyset-сортировка по уровню
+            models.Index(fields=["level", "id"], name="chainlink_level_id_idx"),
+            # Выборка поддерева по префиксу пути
+            models.Index(
+                fields=["path"],
+                name="chainlink_path_idx",
+                opclasses=["text_pattern_ops"],
+            ),
+            # Фильтры списка по диапазону задолженности и даты создания
+            models.Index(fields=["dept"], name="chainlink_dept_idx"),
+            models.Index(fields=["creation_date"], name="chainlink_created_idx"),
+            # Звенья с задолженностью (?has_dept=true, фильтр админки) в порядке id
+            models.Index(
+                fields=["id"], condition=HAS_DEPT, name="chainlink_has_dept_idx"
+            ),
+            # Поиск ?search= (retail.search), расширение pg_trgm
+            GinIndex(
+                fields=["name"],
+                name="chainlink_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
+
+class DeptRollup(models.Model):
+    """Сводные показатели задолженности по группе звеньев.
+
+    Поддерживаются по изменениям звеньев (retail.rollups), поэтому отчеты читают
+    по строке на группу, не обходя все звенья. Звено входит в поддерево каждого
+    своего поставщика (и свое), в свой уровень, а также в страны и города своих контактов.
+    """
+
+    class Kind(models.TextChoices):
+        SUBTREE = "subtree", "Поддерево звена"
+        LEVEL = "level", "Уровень иерархии"
+        COUNTRY = "country", "Страна контакта"
+        CITY = "city", "Город контакта"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices, verbose_name="Вид")
+    # id звена, уровень или страна контакта (в нижнем регистре)
+    key = models.CharField(max_length=255, verbose_name="Группа")
+    city = models.CharField(max_length=100, default="", verbose_name="Город")
+    total = models.DecimalField(
+        max_digits=20, decimal_places=2, default=0, verbose_name="Сумма"
+    )
+    count = models.PositiveIntegerField(default=0, verbose_name="Количество звеньев")
+    min_dept = models.DecimalField(
+        max_digits=15, decimal_places=2, verbose_name="Минимум", **NULLABLE
+    )
+    # Число звеньев с минимумом и максимумом: пока в группе остается хотя бы одно,
+    # уход другого не требует пересчета
+    min_count = models.PositiveIntegerField(
+        default=0, verbose_name="Звеньев с минимумом"
+    )
+    max_dept = models.DecimalField(
+        max_digits=15, decimal_places=2, verbose_name="Максимум", **NULLABLE
+    )
+    max_count = models.PositiveIntegerField(
+        default=0, verbose_name="Звеньев с максимумом"
+    )
+    # Из группы ушли все звенья с минимумом или максимумом; группа пересчитывается
+    # командой refresh_dept_rollups
+    stale = models.BooleanField(default=False, verbose_name="Требует пересчета")
+
+    def __str__(self):
+        return f"{self.kind}: {self.key} {self.city}".rstrip()
+
+    class Meta:
+        verbose_name = "Сводка задолженности"
+        verbose_name_plural = "Сводки задолженности"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "key", "city"], name="deptrollup_group_unique"
+            ),
+        ]
+        indexes = [
+            # Поиск групп для пересчета (refresh_stale)
+            models.Index(
+                fields=["id"],
+                condition=models.Q(stale=True),
+                name="deptrollup_stale_idx",
+            ),
+        ]
+
+
+class DeptRollupChange(models.Model):
+    """Изменение сводки задолженности, еще не перенесенное в DeptRollup.
+
+    Транзакции звеньев только добавляют такие строки и не ждут друг друга на общих
+    сводках (уровень, сеть завода); в сводки их переносит refresh_dept_rollups()
+    после фиксации транзакции.
+    """
+
+    kind = models.CharField(
+        max_length=10, choices=DeptRollup.Kind.choices, verbose_name="Вид"
+    )
+    key = models.CharField(max_length=255, verbose_name="Группа")
+    city = models.CharField(max_length=100, default="", verbose_name="Город")
+    total = models.DecimalField(
+        max_digits=20, decimal_places=2, default=0, verbose_name="Изменение суммы"
+    )
+    count = models.IntegerField(default=0, verbose_name="Изменение количества")
+    # Крайние значения задолженности, добавленные в группу и ушедшие из нее,
+    # и число звеньев с ними
+    min_added = models.DecimalField(
+        max_digits=15, decimal_places=2, verbose_name="Минимум добавленных", **NULLABLE
+    )
+    min_added_count = models.IntegerField(
+        default=0, verbose_name="Звеньев с минимумом добавленных"
+    )
+    max_added = models.DecimalField(
+        max_digits=15, decimal_places=2, verbose_name="Максимум добавленных", **NULLABLE
+    )
+    max_added_count = models.IntegerField(
+        default=0, verbose_name="Звеньев с максимумом добавленных"
+    )
+    min_removed = models.DecimalField(
+        max_digits=15, decimal_places=2, verbose_name="Минимум ушедших", **NULLABLE
+    )
+    min_removed_count = models.IntegerField(
+        default=0, verbose_name="Звеньев с минимумом ушедших"
+    )
+    max_removed = models.DecimalField(
+        max_digits=15, decimal_places=2, verbose_name="Максимум ушедших", **NULLABLE
+    )
+    max_removed_count = models.IntegerField(
+        default=0, verbose_name="Звеньев с максимумом ушедших"
+    )
+
+    def __str__(self):
+        return f"{self.kind}: {self.key} {self.city}".rstrip()
+
+    class Meta:
+        verbose_name = "Изменение сводки задолженности"
+        verbose_name_plural = "Изменения сводок задолженности"
@@ -0,0 +1,176 @@
+from base64 import b64decode
+from urllib import parse
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+from retail.search import SEARCH_RANK
+
+
+class ChainLinkCursorPagination(CursorPagination):
+    """Keyset-пагинация списка звеньев.
+
+    Позиция курсора хранит значения всех ключей сортировки (ключ + id),
+    поэтому каждая страница выбирается диапазоном по индексу без OFFSET,
+    независимо от глубины листания.
+    """
+
+    page_size = settings.CHAIN_LIST_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.CHAIN_LIST_MAX_PAGE_SIZE
+    ordering = "id"
+    ordering_query_param = "ordering"
+    # Поля, по которым разрешена сортировка. На каждое должен быть индекс (поле, id)
+    ordering_fields = ("id", "level")
+
+    def get_ordering(self, request, queryset, view):
+        # Результаты поиска по умолчанию упорядочены по убыванию похожести
+        default, ordering_fields = self.ordering, self.ordering_fields
+        if SEARCH_RANK in queryset.query.annotation_select:
+            default = f"-{SEARCH_RANK}"
+            ordering_fields += (SEARCH_RANK,)
+
+        ordering = request.query_params.get(self.ordering_query_param, default)
+        if ordering.lstrip("-") not in ordering_fields:
+            ordering = default
+
+        # id добавляется последним ключом, чтобы позиция была уникальной.
+        # Равные по похожести результаты поиска идут по возрастанию id
+        if ordering.lstrip("-") == "id":
+            return (ordering,)
+        if ordering.startswith("-") and ordering != f"-{SEARCH_RANK}":
+            return ordering, "-id"
+        return ordering, "id"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._set_page(list(self._get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """То же, что paginate_queryset, для асинхронных представлений"""
+        page_queryset = self._get_page_queryset(queryset, request, view)
+        return self._set_page([row async for row in page_queryset])
+
+    def _get_page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._get_keyset_filter(queryset, ordering, self.cursor.position)
+            )
+
+        # Лишний элемент запрашивается, чтобы узнать о наличии следующей страницы
+        return queryset[: self.page_size + 1]
+
+    def _set_page(self, results):
+        reverse = self.cursor is not None and self.cursor.reverse
+        self.page = results[: self.page_size]
+        has_more = len(results) > len(self.page)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = bool(self.page)
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None and bool(self.page)
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_keyset_filter(self, queryset, ordering, position):
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        keys = []
+        annotations = queryset.query.annotation_select
+        for order, value in zip(ordering, position):
+            name = order.lstrip("-")
+            if name in annotations:
+                field = annotations[name].output_field
+            else:
+                field = queryset.model._meta.get_field(name)
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            keys.append((name, "lt" if order.startswith("-") else "gt", value))
+
+        # Лексикографическое сравнение (k1, k2, ...) > (v1, v2, ...)
+        condition = Q()
+        for i in range(len(keys) - 1, -1, -1):
+            name, lookup, value = keys[i]
+            step = Q(**{f"{name}__{lookup}": value})
+            if i < len(keys) - 1:
+                step |= Q(**{name: value}) & condition
+            condition = step
+
+        if len(keys) == 1:
+            return condition
+
+        # Дублирующее условие по первому ключу задает границу диапазона индекса
+        name, lookup, value = keys[0]
+        return Q(**{f"{name}__{lookup}e": value}) & condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            position = tokens["p"]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            position.append(str(attr))
+        return position
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.ordering_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Поле сортировки, допустимо: "
+                + ", ".join(self.ordering_fields),
+                "schema": {"type": "string"},
+            }
+        )
+        return parameters
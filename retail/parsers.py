@@ -0,0 +1,39 @@
+import codecs
+import io
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from retail.renderers import ORJSONRenderer
+
+# Целые из 19 и более цифр могут не поместиться в 64 бита, orjson читает их как float.
+# Поиск нулей после замены цифр в разы быстрее регулярного выражения
+DIGITS_TO_ZERO = bytes.maketrans(b"123456789", b"0" * 9)
+LONG_NUMBER = b"0" * 19
+
+
+class ORJSONParser(JSONParser):
+    """JSON-парсер на orjson с тем же результатом, что и JSONParser.
+
+    orjson разбирает только UTF-8, строже к входным данным (NaN) и читает целые
+    больше 64 бит как float: тело в другой кодировке, с длинными числами или
+    отклоненное orjson разбирается JSONParser, который и возвращает ошибку
+    с прежним текстом.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        data = stream.read()
+        if LONG_NUMBER in data.translate(DIGITS_TO_ZERO):
+            return super().parse(io.BytesIO(data), media_type, parser_context)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(data), media_type, parser_context)
@@ -0,0 +1,49 @@
+import math
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson с тем же выводом, что и JSONRenderer.
+
+    Типы, которые orjson не кодирует сам (Decimal, date, datetime, time, ленивые
+    строки, QuerySet и т. д.), передаются в default кодировщика DRF, поэтому
+    datetime в UTC записывается с Z, а Decimal - числом. Отступы, ensure_ascii и
+    некомпактный вывод orjson не поддерживает: такие запросы (в т.ч. от
+    BrowsableAPIRenderer), как и ошибки orjson (нестроковые ключи, целые больше
+    64 бит), отдаются JSONRenderer. Расходится только запись float в данных:
+    с порядком - без знака + (1e16 вместо 1e+16), NaN - null; в API звеньев
+    таких полей нет.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class()
+
+        def default(obj):
+            value = encoder.default(obj)
+            if type(value) is float and (
+                not math.isfinite(value) or "e" in repr(value)
+            ):
+                # Decimal с порядком или NaN кодируется (или отклоняется) JSONRenderer
+                raise ValueError(value)
+            return value
+
+        try:
+            ret = orjson.dumps(data, default=default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранирует разделители строк, недопустимые в JavaScript
+        return ret.replace("\u2028".encode(), b"\\u2028").replace(
+            "\u2029".encode(), b"\\u2029"
+        )
@@ -0,0 +1,505 @@
+import operator
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import islice
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q, Sum
+from django.db.models.functions import Lower
+
+from retail.models import ChainLink, Contact, DeptRollup, DeptRollupChange
+
+Kind = DeptRollup.Kind
+
+ROLLUP_FIELDS = (
+    "total",
+    "count",
+    "min_dept",
+    "min_count",
+    "max_dept",
+    "max_count",
+    "stale",
+)
+
+
+def _link_groups(pk, level, path):
+    groups = {(Kind.SUBTREE, str(pk), ""), (Kind.LEVEL, str(level), "")}
+    groups.update((Kind.SUBTREE, ancestor, "") for ancestor in path.split("/")[:-1])
+    return groups
+
+
+def snapshot(links, lock=False):
+    """Задолженность и группы звеньев выборки: {id: (dept, {(вид, ключ, город), ...})}"""
+    if lock:
+        links = links.select_for_update().order_by("pk")
+    result = {
+        pk: (dept, _link_groups(pk, level, path))
+        for pk, dept, level, path in links.values_list("id", "dept", "level", "path")
+    }
+    if not result:
+        return result
+
+    contacts = (
+        ChainLink.contacts.through.objects.filter(chainlink_id__in=list(result))
+        .annotate(country=Lower("contact__country"), city=Lower("contact__city"))
+        .values_list("chainlink_id", "country", "city")
+    )
+    for pk, country, city in contacts:
+        if country:
+            result[pk][1].add((Kind.COUNTRY, country, ""))
+            if city:
+                result[pk][1].add((Kind.CITY, country, city))
+    return result
+
+
+def _groups_filter(groups):
+    by_kind = defaultdict(lambda: (set(), set()))
+    for kind, key, city in groups:
+        by_kind[kind][0].add(key)
+        by_kind[kind][1].add(city)
+    condition = Q()
+    for kind, (keys, cities) in by_kind.items():
+        condition |= Q(kind=kind, key__in=keys, city__in=cities)
+    return condition
+
+
+def _lock_rows(groups):
+    rows = DeptRollup.objects.select_for_update().filter(_groups_filter(groups))
+    return {
+        (row.kind, row.key, row.city): row
+        for row in rows.order_by("kind", "key", "city")
+        if (row.kind, row.key, row.city) in groups
+    }
+
+
+# Крайние значения изменения: (поле значения, поле числа звеньев с ним, сравнение)
+EXTREMES = (
+    ("min_added", "min_added_count", operator.lt),
+    ("max_added", "max_added_count", operator.gt),
+    ("min_removed", "min_removed_count", operator.lt),
+    ("max_removed", "max_removed_count", operator.gt),
+)
+
+
+def _pick_extreme(first, second, better):
+    """Крайнее из двух значений (значение, число звеньев с ним)"""
+    if first[0] is None:
+        return second
+    if second[0] is None:
+        return first
+    if first[0] == second[0]:
+        return first[0], first[1] + second[1]
+    return first if better(first[0], second[0]) else second
+
+
+def _merge(change, other):
+    """Объединяет два изменения одной группы"""
+    change.total += other.total
+    change.count += other.count
+    for value_field, count_field, better in EXTREMES:
+        value, count = _pick_extreme(
+            (getattr(change, value_field), getattr(change, count_field)),
+            (getattr(other, value_field), getattr(other, count_field)),
+            better,
+        )
+        setattr(change, value_field, value)
+        setattr(change, count_field, count)
+
+
+def _shift_extreme(current, added, removed, better):
+    """Крайнее значение группы и число звеньев с ним после изменения. None - если
+    ушли все звенья с крайним значением и новое не узнать без обхода группы"""
+    value, count = current
+    if removed[0] is not None:
+        if value is None or better(removed[0], value):
+            return None
+        if removed[0] == value:
+            count -= removed[1]
+    if added[0] is not None:
+        if value is None or better(added[0], value):
+            return added
+        if added[0] == value:
+            count += added[1]
+    return (value, count) if count > 0 else None
+
+
+def _apply(row, change):
+    row.total += change.total
+    row.count += change.count
+    if row.count <= 0:
+        row.total, row.stale = 0, False
+        row.min_dept, row.min_count, row.max_dept, row.max_count = None, 0, None, 0
+        return
+    if row.stale:
+        return
+
+    low = _shift_extreme(
+        (row.min_dept, row.min_count),
+        (change.min_added, change.min_added_count),
+        (change.min_removed, change.min_removed_count),
+        operator.lt,
+    )
+    high = _shift_extreme(
+        (row.max_dept, row.max_count),
+        (change.max_added, change.max_added_count),
+        (change.max_removed, change.max_removed_count),
+        operator.gt,
+    )
+    if low is None or high is None:
+        row.stale = True
+        return
+    (row.min_dept, row.min_count), (row.max_dept, row.max_count) = low, high
+
+
+def _extreme(values, pick):
+    value = pick(values, default=None)
+    return value, values.count(value) if values else 0
+
+
+def _list_change(group, removed, added):
+    """Изменение группы: ушли звенья с задолженностью removed, добавились - added"""
+    kind, key, city = group
+    min_added, min_added_count = _extreme(added, min)
+    max_added, max_added_count = _extreme(added, max)
+    min_removed, min_removed_count = _extreme(removed, min)
+    max_removed, max_removed_count = _extreme(removed, max)
+    return DeptRollupChange(
+        kind=kind,
+        key=key,
+        city=city,
+        total=sum(added, Decimal(0)) - sum(removed, Decimal(0)),
+        count=len(added) - len(removed),
+        min_added=min_added,
+        min_added_count=min_added_count,
+        max_added=max_added,
+        max_added_count=max_added_count,
+        min_removed=min_removed,
+        min_removed_count=min_removed_count,
+        max_removed=max_removed,
+        max_removed_count=max_removed_count,
+    )
+
+
+def _stats_change(group, stats, removed=False):
+    """Изменение группы, в которую добавились (или из которой ушли) звенья
+    с задолженностью stats - изменением с добавлением этих звеньев"""
+    kind, key, city = group
+    sign = -1 if removed else 1
+    side = "removed" if removed else "added"
+    return DeptRollupChange(
+        kind=kind,
+        key=key,
+        city=city,
+        total=sign * stats.total,
+        count=sign * stats.count,
+        **{
+            f"{extreme}_{side}{suffix}": getattr(stats, f"{extreme}_added{suffix}")
+            for extreme in ("min", "max")
+            for suffix in ("", "_count")
+        },
+    )
+
+
+def _diff(before, after):
+    """Изменения групп между двумя снимками одних и тех же звеньев"""
+    deltas = defaultdict(lambda: ([], []))
+    for pk in before.keys() | after.keys():
+        old_dept, old_groups = before.get(pk, (None, set()))
+        new_dept, new_groups = after.get(pk, (None, set()))
+        changed = old_dept != new_dept
+        for group in old_groups:
+            if changed or group not in new_groups:
+                deltas[group][0].append(old_dept)
+        for group in new_groups:
+            if changed or group not in old_groups:
+                deltas[group][1].append(new_dept)
+    return [_list_change(group, *lists) for group, lists in deltas.items()]
+
+
+def _merged(changes):
+    """{группа: изменение} - изменения одной группы объединены"""
+    merged = {}
+    for change in changes:
+        group = (change.kind, change.key, change.city)
+        if group in merged:
+            _merge(merged[group], change)
+        else:
+            merged[group] = change
+    return merged
+
+
+def _apply_to_rollups(changes):
+    """Переносит изменения в строки сводок, блокируя их до конца транзакции"""
+    merged = _merged(changes)
+    if not merged:
+        return
+
+    rows = _lock_rows(merged)
+    missing = merged.keys() - rows.keys()
+    if missing:
+        created = []
+        for kind, key, city in missing:
+            row = DeptRollup(kind=kind, key=key, city=city)
+            _apply(row, merged[(kind, key, city)])
+            if row.count > 0:
+                created.append(row)
+        try:
+            with transaction.atomic():
+                DeptRollup.objects.bulk_create(created, batch_size=1000)
+        except IntegrityError:
+            # Группа появилась в параллельной транзакции: изменения применяются к ней
+            DeptRollup.objects.bulk_create(
+                [
+                    DeptRollup(kind=kind, key=key, city=city)
+                    for kind, key, city in missing
+                ],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+            rows.update(_lock_rows(missing))
+
+    for group, row in rows.items():
+        _apply(row, merged[group])
+    DeptRollup.objects.bulk_update(rows.values(), ROLLUP_FIELDS, batch_size=1000)
+    empty = [row.pk for row in rows.values() if row.count <= 0]
+    if empty:
+        DeptRollup.objects.filter(pk__in=empty).delete()
+
+
+def _record(changes):
+    """Записывает изменения в журнал; в сводки они переносятся после фиксации
+    транзакции"""
+    changes = list(_merged(changes).values())
+    if changes:
+        DeptRollupChange.objects.bulk_create(changes, batch_size=1000)
+        transaction.on_commit(fold_dept_rollup_changes, robust=True)
+
+
+def apply_changes(before, after):
+    """Записывает разницу между двумя снимками одних и тех же звеньев в журнал
+    изменений сводок"""
+    _record(_diff(before, after))
+
+
+@contextmanager
+def track_dept_rollups(links):
+    """Записывает в журнал сводок разницу состояния звеньев до и после блока.
+
+    links - выборка звеньев, которые изменятся в блоке; их строки блокируются до конца
+    транзакции. id созданных в блоке звеньев нужно добавить в возвращаемое множество.
+    """
+    with transaction.atomic():
+        before = snapshot(links, lock=True)
+        ids = set(before)
+        yield ids
+        apply_changes(before, snapshot(ChainLink.objects.filter(pk__in=ids)))
+
+
+def _level_stats(links):
+    """Блокирует звенья выборки и одним запросом считает их задолженность по уровням:
+    {уровень: изменение с добавлением звеньев уровня}. Звенья в память не загружаются"""
+    sql, params = (
+        links.select_for_update().order_by().values("level", "dept").query
+    ).sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT level, SUM(dept), COUNT(*), MIN(dept), "
+            "COUNT(*) FILTER (WHERE dept = low), MAX(dept), "
+            "COUNT(*) FILTER (WHERE dept = high) "
+            "FROM (SELECT level, dept, MIN(dept) OVER w AS low, MAX(dept) OVER w AS high "
+            f"FROM ({sql}) AS links WINDOW w AS (PARTITION BY level)) AS links "
+            "GROUP BY level",
+            params,
+        )
+        return {
+            level: DeptRollupChange(
+                total=total,
+                count=count,
+                min_added=low,
+                min_added_count=low_count,
+                max_added=high,
+                max_added_count=high_count,
+            )
+            for level, total, count, low, low_count, high, high_count in cursor
+        }
+
+
+@contextmanager
+def track_subtree_move(links, old_ancestors, new_ancestors, level_delta):
+    """Записывает в журнал сводок перенос звеньев links, которые меняют поставщиков
+    old_ancestors на new_ancestors (id из пути) и уровень на level_delta.
+
+    Задолженность звеньев считается одним запросом по уровням, а не снимком каждого
+    звена: перенос поддерева завода не загружает его в память. Звенья блокируются
+    до конца транзакции.
+    """
+    with transaction.atomic():
+        by_level = _level_stats(links)
+        yield
+        if not by_level:
+            return
+
+        changes, subtree = [], DeptRollupChange(total=0, count=0)
+        for level, stats in by_level.items():
+            _merge(subtree, stats)
+            if level_delta:
+                changes.append(_stats_change((Kind.LEVEL, str(level), ""), stats, True))
+                changes.append(
+                    _stats_change((Kind.LEVEL, str(level + level_delta), ""), stats)
+                )
+        old_ancestors, new_ancestors = set(old_ancestors), set(new_ancestors)
+        changes += [
+            _stats_change((Kind.SUBTREE, key, ""), subtree, True)
+            for key in old_ancestors - new_ancestors
+        ]
+        changes += [
+            _stats_change((Kind.SUBTREE, key, ""), subtree)
+            for key in new_ancestors - old_ancestors
+        ]
+        _record(changes)
+
+
+def group_links(kind, key, city=""):
+    """Звенья, входящие в группу сводки"""
+    if kind == Kind.SUBTREE:
+        path = ChainLink.objects.filter(pk=key).values_list("path", flat=True).first()
+        if path is None:
+            return ChainLink.objects.none()
+        return ChainLink.objects.filter(Q(pk=key) | Q(path__startswith=f"{path}{key}/"))
+    if kind == Kind.LEVEL:
+        return ChainLink.objects.filter(level=int(key))
+    if kind == Kind.COUNTRY:
+        return ChainLink.objects.in_country(key)
+
+    contacts = Contact.objects.alias(
+        country_lower=Lower("country"), city_lower=Lower("city")
+    ).filter(country_lower=key, city_lower=city)
+    links = ChainLink.contacts.through.objects.filter(
+        chainlink_id=OuterRef("pk"), contact_id__in=contacts.values("pk")
+    )
+    return ChainLink.objects.filter(Exists(links))
+
+
+def refresh_stale(rollups):
+    """Пересчитывает группы выборки, из которых ушли все звенья с минимумом или
+    максимумом. Группы, которые уже пересчитывает параллельная транзакция, пропускаются
+    """
+    with transaction.atomic():
+        rows = list(rollups.select_for_update(skip_locked=True).filter(stale=True))
+        for row in rows:
+            links = group_links(row.kind, row.key, row.city)
+            stats = links.aggregate(
+                total=Sum("dept"),
+                count=Count("pk"),
+                min_dept=Min("dept"),
+                max_dept=Max("dept"),
+            )
+            row.total = stats["total"] or 0
+            row.count = stats["count"]
+            row.min_dept, row.max_dept = stats["min_dept"], stats["max_dept"]
+            row.min_count = row.max_count = 0
+            if row.count:
+                counts = links.aggregate(
+                    min_count=Count("pk", filter=Q(dept=row.min_dept)),
+                    max_count=Count("pk", filter=Q(dept=row.max_dept)),
+                )
+                row.min_count, row.max_count = counts["min_count"], counts["max_count"]
+            row.stale = False
+        if rows:
+            DeptRollup.objects.bulk_update(rows, ROLLUP_FIELDS)
+            DeptRollup.objects.filter(
+                pk__in=[row.pk for row in rows if not row.count]
+            ).delete()
+    return len(rows)
+
+
+def fold_dept_rollup_changes():
+    """Переносит журнал изменений в сводки. Вызывается после фиксации транзакций,
+    изменивших звенья; строки журнала, которые переносит параллельный вызов,
+    пропускаются. Возвращает количество перенесенных изменений"""
+    with transaction.atomic():
+        changes = list(
+            DeptRollupChange.objects.select_for_update(skip_locked=True).order_by("pk")
+        )
+        _apply_to_rollups(changes)
+        DeptRollupChange.objects.filter(
+            pk__in=[change.pk for change in changes]
+        ).delete()
+    return len(changes)
+
+
+def refresh_dept_rollups():
+    """Переносит журнал изменений в сводки и пересчитывает устаревшие группы обходом
+    их звеньев. Вне запросов: команда refresh_dept_rollups (периодически).
+    Возвращает количество перенесенных изменений и пересчитанных групп"""
+    return fold_dept_rollup_changes(), refresh_stale(DeptRollup.objects.all())
+
+
+def rebuild_dept_rollups(chunk_size=2000):
+    """Заново строит все сводки по текущим звеньям. Возвращает количество групп"""
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            # Изменения звеньев ждут окончания пересборки и применяются поверх нее
+            with connection.cursor() as cursor:
+                for model in (DeptRollupChange, DeptRollup):
+                    cursor.execute(
+                        f"LOCK TABLE {connection.ops.quote_name(model._meta.db_table)} "
+                        "IN EXCLUSIVE MODE"
+                    )
+        DeptRollupChange.objects.all().delete()
+        DeptRollup.objects.all().delete()
+        if connection.vendor == "postgresql":
+            _rebuild_grouped()
+            return DeptRollup.objects.count()
+
+        ids = (
+            ChainLink.objects.order_by("pk")
+            .values_list("pk", flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+        while chunk := list(islice(ids, chunk_size)):
+            _apply_to_rollups(
+                _diff({}, snapshot(ChainLink.objects.filter(pk__in=chunk)))
+            )
+        return DeptRollup.objects.count()
+
+
+def _rebuild_grouped():
+    """Строит сводки группировкой в БД: по запросу INSERT ... SELECT на вид групп.
+
+    Группы звена те же, что в snapshot(): поддеревья звена и его поставщиков из пути,
+    уровень, страны и города контактов в нижнем регистре (по разу на звено)
+    """
+    quote = connection.ops.quote_name
+    links = quote(ChainLink._meta.db_table)
+    through = ChainLink.contacts.through._meta
+    with_contacts = (
+        f"{links} l JOIN {quote(through.db_table)} t ON t.chainlink_id = l.id "
+        f"JOIN {quote(Contact._meta.db_table)} c ON c.id = t.contact_id"
+    )
+    # Строки (id звена, ключ, город, задолженность) по видам групп
+    sources = {
+        Kind.SUBTREE: "SELECT l.id, unnest(string_to_array(l.path || l.id, '/')), "
+        f"'', l.dept FROM {links} l",
+        Kind.LEVEL: f"SELECT l.id, l.level::text, '', l.dept FROM {links} l",
+        Kind.COUNTRY: "SELECT DISTINCT l.id, lower(c.country), '', l.dept "
+        f"FROM {with_contacts} WHERE c.country <> ''",
+        Kind.CITY: "SELECT DISTINCT l.id, lower(c.country), lower(c.city), l.dept "
+        f"FROM {with_contacts} WHERE c.country <> '' AND c.city <> ''",
+    }
+    with connection.cursor() as cursor:
+        for kind, source in sources.items():
+            cursor.execute(
+                f"INSERT INTO {quote(DeptRollup._meta.db_table)} "
+                "(kind, key, city, total, count, min_dept, min_count, max_dept, "
+                "max_count, stale) "
+                "SELECT %s, key, city, SUM(dept), COUNT(*), "
+                "MIN(dept), COUNT(*) FILTER (WHERE dept = low), "
+                "MAX(dept), COUNT(*) FILTER (WHERE dept = high), false "
+                "FROM (SELECT key, city, dept, MIN(dept) OVER w AS low, "
+                f"MAX(dept) OVER w AS high FROM ({source}) AS groups "
+                "(link_id, key, city, dept) WINDOW w AS (PARTITION BY key, city)) "
+                "AS groups GROUP BY key, city",
+                [kind],
+            )
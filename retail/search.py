@@ -0,0 +1,57 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast, Greatest
+from rest_framework.filters import BaseFilterBackend
+
+# Аннотация с похожестью найденной строки на запрос (от 0 до 1)
+SEARCH_RANK = "search_rank"
+
+
+def search(queryset, query, fields):
+    """Строки, у которых хотя бы одно из полей содержит слово, похожее на query.
+
+    Условие pg_trgm "%>" использует GIN-индексы gin_trgm_ops по полям, поэтому
+    поиск не просматривает всю таблицу. Ранг SEARCH_RANK - наибольшая похожесть
+    по полям; приводится к double precision, чтобы значение из курсора
+    пагинации точно совпадало со значением в БД.
+    """
+    condition = reduce(
+        or_, (Q(**{f"{field}__trigram_word_similar": query}) for field in fields)
+    )
+    similarities = [TrigramWordSimilarity(query, field) for field in fields]
+    rank = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+    return queryset.filter(condition).annotate(
+        **{SEARCH_RANK: Cast(rank, output_field=FloatField())}
+    )
+
+
+class TrigramSearchFilter(BaseFilterBackend):
+    """Поиск ?search= по полям представления search_fields (см. search).
+    Результат упорядочивается по убыванию похожести, затем по id"""
+
+    search_param = "search"
+
+    def get_search_query(self, request):
+        return request.query_params.get(self.search_param, "").strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not query:
+            return queryset
+        return search(queryset, query, view.search_fields).order_by(
+            f"-{SEARCH_RANK}", "id"
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Поиск по полям: " + ", ".join(view.search_fields),
+                "schema": {"type": "string"},
+            }
+        ]
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
-from retail.models import ChainLink, Contact, Product
+from retail.models import SUPPLIER_CYCLE_ERROR, ChainLink, Contact, DeptRollup, Product
+from retail.values import ValuesSerializer
 
 
 class ContactSerializer(serializers.ModelSerializer):
@@ -20,9 +21,76 @@ class ChainLinkSerializer(serializers.ModelSerializer):
         model = ChainLink
         fields = "__all__"
 
+    def validate_supplier(self, value):
+        if self.instance and value and value.is_in_subtree_of(self.instance):
+            raise serializers.ValidationError(SUPPLIER_CYCLE_ERROR)
+        return value
 
-class ChainLinkUpdateSerializer(serializers.ModelSerializer):
+
+class ContactValuesSerializer(ValuesSerializer):
+    serializer_class = ContactSerializer
+
+
+class ProductValuesSerializer(ValuesSerializer):
+    serializer_class = ProductSerializer
+
+
+class ChainLinkValuesSerializer(ValuesSerializer):
+    serializer_class = ChainLinkSerializer
+
+
+class ChainLinkUpdateSerializer(ChainLinkSerializer):
     class Meta:
         model = ChainLink
         fields = "__all__"
         read_only_fields = ("dept",)
+
+
+class ChainLinkBulkItemSerializer(serializers.Serializer):
+    """Элемент пакетного сохранения звеньев.
+
+    Связанные объекты передаются id и проверяются пакетно в bulk_save_chain_links,
+    поэтому сериализатор не обращается к БД. Элемент с id обновляет звено
+    (задолженность при этом не меняется), без id - создает новое.
+    """
+
+    id = serializers.IntegerField(required=False, min_value=1)
+    name = serializers.CharField(max_length=255, required=False)
+    supplier = serializers.IntegerField(required=False, allow_null=True)
+    products = serializers.ListField(child=serializers.IntegerField(), required=False)
+    contacts = serializers.ListField(child=serializers.IntegerField(), required=False)
+    dept = serializers.DecimalField(max_digits=15, decimal_places=2, required=False)
+
+
+class ChainLinkBulkResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=("created", "updated", "error"))
+    id = serializers.IntegerField(required=False)
+    errors = serializers.DictField(required=False)
+
+
+class DeptRollupSerializer(serializers.ModelSerializer):
+    """Сводка задолженности. Группа выводится полями своего вида"""
+
+    min = serializers.DecimalField(
+        source="min_dept", max_digits=15, decimal_places=2, read_only=True
+    )
+    max = serializers.DecimalField(
+        source="max_dept", max_digits=15, decimal_places=2, read_only=True
+    )
+
+    class Meta:
+        model = DeptRollup
+        fields = ("total", "count", "min", "max")
+
+    def to_representation(self, instance):
+        Kind = DeptRollup.Kind
+        if instance.kind == Kind.SUBTREE:
+            group = {"link": int(instance.key)}
+        elif instance.kind == Kind.LEVEL:
+            group = {"level": int(instance.key)}
+        elif instance.kind == Kind.COUNTRY:
+            group = {"country": instance.key}
+        else:
+            group = {"country": instance.key, "city": instance.city}
+        return {**group, **super().to_representation(instance)}
@@ -0,0 +1,263 @@
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from retail.cache import invalidate_chain_links
+from retail.models import SUPPLIER_CYCLE_ERROR, ChainLink, Contact, Product
+from retail.rollups import track_dept_rollups
+
+NOT_FOUND_ERROR = "Объекты не существуют: {}"
+
+
+def _missing(ids, existing):
+    return sorted(set(ids) - existing)
+
+
+def bulk_save_chain_links(items):
+    """Создает и обновляет звенья пакетом.
+
+    items - список проверенных данных ChainLinkBulkItemSerializer (или словарей
+    с ошибками под ключом "errors"). Ссылки на поставщиков, продукты и контакты
+    проверяются по одному запросу на таблицу, звенья и связи M2M записываются
+    массовыми запросами. Возвращает результат по каждому элементу в исходном порядке.
+    """
+    results = [{"index": index} for index in range(len(items))]
+
+    update_ids, supplier_ids, product_ids, contact_ids = set(), set(), set(), set()
+    for item in items:
+        if "errors" in item:
+            continue
+        if "id" in item:
+            update_ids.add(item["id"])
+        if item.get("supplier") is not None:
+            supplier_ids.add(item["supplier"])
+        product_ids.update(item.get("products", []))
+        contact_ids.update(item.get("contacts", []))
+
+    links = {
+        link["id"]: link
+        for link in ChainLink.objects.filter(pk__in=update_ids | supplier_ids).values(
+            "id", "supplier_id", "level", "path"
+        )
+    }
+    products = set(
+        Product.objects.filter(pk__in=product_ids).values_list("pk", flat=True)
+    )
+    contacts = set(
+        Contact.objects.filter(pk__in=contact_ids).values_list("pk", flat=True)
+    )
+
+    item_errors, moves = [], {}
+    seen_ids = set()
+    for item in items:
+        errors = dict(item.get("errors", {}))
+        pk = item.get("id")
+        supplier_id = item.get("supplier")
+
+        if not errors:
+            if pk is not None and pk not in links:
+                errors["id"] = [NOT_FOUND_ERROR.format([pk])]
+            elif pk in seen_ids:
+                errors["id"] = ["Звено повторяется в пакете"]
+            if pk is None and not item.get("name"):
+                errors["name"] = ["Обязательное поле."]
+            if supplier_id is not None and supplier_id not in links:
+                errors["supplier"] = [NOT_FOUND_ERROR.format([supplier_id])]
+            for field, existing in (("products", products), ("contacts", contacts)):
+                missing = _missing(item.get(field, []), existing)
+                if missing:
+                    errors[field] = [NOT_FOUND_ERROR.format(missing)]
+
+        if not errors and pk is not None:
+            seen_ids.add(pk)
+            if "supplier" in item and supplier_id != links[pk]["supplier_id"]:
+                moves[pk] = supplier_id
+        item_errors.append(errors)
+
+    # Циклы проверяются по итоговому дереву: перенос может стать допустимым
+    # или недопустимым из-за других переносов того же пакета
+    depths, cyclic = _final_depths(moves, links)
+    for item, errors in zip(items, item_errors):
+        if item.get("id") in cyclic and not errors:
+            errors["supplier"] = [SUPPLIER_CYCLE_ERROR]
+
+    to_create, to_rename, to_move, relations = [], [], [], []
+    for result, item, errors in zip(results, items, item_errors):
+        pk = item.get("id")
+        supplier_id = item.get("supplier")
+        if errors:
+            result.update(status="error", errors=errors)
+            continue
+
+        if pk is None:
+            supplier = links.get(supplier_id)
+            link = ChainLink(
+                name=item["name"],
+                supplier_id=supplier_id,
+                dept=item.get("dept", 0),
+                level=supplier["level"] + 1 if supplier else 0,
+                path=f"{supplier['path']}{supplier_id}/" if supplier else "",
+            )
+            to_create.append((result, link))
+            result["status"] = "created"
+        else:
+            link = ChainLink(pk=pk, name=item.get("name", ""))
+            if pk in moves:
+                to_move.append((result, pk, item))
+            elif "name" in item:
+                to_rename.append(link)
+            result.update(status="updated", id=pk)
+        relations.append((link, item, pk is None))
+
+    # Звенья переносятся от верхних уровней итогового дерева к нижним: к моменту
+    # переноса путь нового поставщика уже совпадает с итоговым
+    to_move.sort(key=lambda move: depths[move[1]])
+
+    with transaction.atomic():
+        # Созданные звенья попадают в сводки до переноса поддеревьев, в которые они входят
+        with track_dept_rollups(ChainLink.objects.none()) as tracked:
+            ChainLink.objects.bulk_create(
+                [link for _, link in to_create], batch_size=1000
+            )
+            for result, link in to_create:
+                result["id"] = link.pk
+                tracked.add(link.pk)
+
+        ChainLink.objects.bulk_update(to_rename, ["name"], batch_size=1000)
+
+        # Смена поставщика переносит поддерево, поэтому выполняется через save().
+        # Дерево могло измениться параллельным запросом после проверки пакета:
+        # перенос, который образует цикл, отклоняется только для своего элемента
+        failed = set()
+        for result, pk, item in to_move:
+            link = ChainLink.objects.get(pk=pk)
+            link.supplier_id = item["supplier"]
+            if "name" in item:
+                link.name = item["name"]
+            try:
+                # save() переносит поддерево в своей точке сохранения транзакции
+                link.save(update_fields=["name", "supplier"])
+            except ValidationError as exc:
+                del result["id"]
+                result.update(status="error", errors=exc.message_dict)
+                failed.add(pk)
+        relations = [entry for entry in relations if entry[0].pk not in failed]
+
+        _bulk_set_relations(
+            relations, "products", ChainLink.products.through, "product_id"
+        )
+        # Контакты определяют страны и города в сводках задолженности
+        relinked = [link.pk for link, item, _ in relations if "contacts" in item]
+        with track_dept_rollups(ChainLink.objects.filter(pk__in=relinked)):
+            _bulk_set_relations(
+                relations, "contacts", ChainLink.contacts.through, "contact_id"
+            )
+
+        # Массовые запросы не отправляют сигналы, поэтому метка изменения
+        # обновленных звеньев сдвигается, а кэш сбрасывается явно
+        updated_ids = [link.pk for link, _, created in relations if not created]
+        if updated_ids:
+            ChainLink.objects.filter(pk__in=updated_ids).touch()
+        invalidate_chain_links(link.pk for link, _, _ in relations)
+
+    return results
+
+
+def _final_depths(moves, links):
+    """Уровни переносимых звеньев в итоговом дереве пакета.
+
+    moves - {id звена: id нового поставщика или None}, links - {id: строка звена}
+    с путями всех новых поставщиков. Возвращает уровни и множество звеньев,
+    которые после всех переносов оказались бы в цикле: их переносы отклоняются,
+    а уровни остальных считаются без них.
+    """
+    moves, cyclic = dict(moves), set()
+    while True:
+        # Ближайший переносимый предок на новой ветке и расстояние до него
+        # (None, если ветка доходит до корня без переносов)
+        parents = {}
+        for pk, supplier_id in moves.items():
+            ancestors = []
+            if supplier_id is not None:
+                path = links[supplier_id]["path"]
+                ancestors = [supplier_id, *map(int, reversed(path.split("/")[:-1]))]
+            parents[pk] = next(
+                (
+                    (ancestor, distance)
+                    for distance, ancestor in enumerate(ancestors, 1)
+                    if ancestor in moves
+                ),
+                (None, len(ancestors)),
+            )
+
+        depths, found = {}, set()
+        for pk in moves:
+            trail = {}
+            while pk is not None and pk not in depths and pk not in trail:
+                trail[pk] = None
+                pk = parents[pk][0]
+            trail = list(trail)
+            if pk is not None and pk not in depths:
+                found.update(trail[trail.index(pk) :])
+                continue
+            depth = 0 if pk is None else depths[pk]
+            for node in reversed(trail):
+                depth += parents[node][1]
+                depths[node] = depth
+
+        if not found:
+            return depths, cyclic
+        cyclic |= found
+        for pk in found:
+            del moves[pk]
+
+
+def _bulk_set_relations(relations, field, through, column):
+    """Заменяет наборы связей M2M у переданных звеньев двумя запросами"""
+    links = [(link, item[field]) for link, item, _ in relations if field in item]
+    if not links:
+        return
+
+    updated_ids = [
+        link.pk for link, item, created in relations if field in item and not created
+    ]
+    through.objects.filter(chainlink_id__in=updated_ids).delete()
+    through.objects.bulk_create(
+        [
+            through(chainlink_id=link.pk, **{column: pk})
+            for link, ids in links
+            for pk in dict.fromkeys(ids)
+        ],
+        batch_size=5000,
+    )
+
+
+def iter_network(chunk_size=2000):
+    """Все звенья сети с id продуктов и контактов.
+
+    Звенья читаются серверным курсором, связи M2M подгружаются двумя запросами
+    на каждые chunk_size звеньев, поэтому память не зависит от размера сети.
+    """
+    links = (
+        ChainLink.objects.order_by("id")
+        .values("id", "name", "supplier_id", "level", "dept")
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(links, chunk_size)):
+        ids = [link["id"] for link in chunk]
+        for link in chunk:
+            link["products"], link["contacts"] = [], []
+        by_id = {link["id"]: link for link in chunk}
+
+        for field, column in (("products", "product_id"), ("contacts", "contact_id")):
+            through = getattr(ChainLink, field).through
+            rows = (
+                through.objects.filter(chainlink_id__in=ids)
+                .order_by("chainlink_id", column)
+                .values_list("chainlink_id", column)
+            )
+            for link_id, pk in rows:
+                by_id[link_id][field].append(pk)
+
+        yield from chunk
@@ -0,0 +1,105 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from retail.cache import invalidate_chain_links
+from retail.models import ChainLink, Contact, Product, subtree_changed
+from retail.rollups import apply_changes, snapshot
+
+
+@receiver(pre_delete, sender=ChainLink)
+def detach_chain_link_subtree(sender, instance, **kwargs):
+    instance.detach_subtree()
+
+
+@receiver(post_save, sender=ChainLink)
+@receiver(post_delete, sender=ChainLink)
+def invalidate_chain_link(sender, instance, **kwargs):
+    invalidate_chain_links([instance.pk])
+
+
+@receiver(subtree_changed, sender=ChainLink)
+def invalidate_subtree(sender, link, **kwargs):
+    # Уровень и путь поддерева меняются одним UPDATE, поэтому сбрасываются все звенья
+    invalidate_chain_links()
+
+
+def _linked_chain_ids(through, instance):
+    """id звеньев, связанных с продуктом или контактом"""
+    lookup = {f"{instance._meta.model_name}_id": instance.pk}
+    return through.objects.filter(**lookup).values_list("chainlink_id", flat=True)
+
+
+def _touch_chain_links(pks):
+    """Сдвигает метку изменения звеньев и сбрасывает их ответы в кэше"""
+    pks = list(pks)
+    ChainLink.objects.filter(pk__in=pks).touch()
+    invalidate_chain_links(pks)
+
+
+@receiver(post_save, sender=Contact)
+def invalidate_contact_links(sender, instance, created=False, **kwargs):
+    if not created:
+        invalidate_chain_links(_linked_chain_ids(ChainLink.contacts.through, instance))
+
+
+@receiver(post_save, sender=Product)
+def invalidate_product_links(sender, instance, created=False, **kwargs):
+    if not created:
+        invalidate_chain_links(_linked_chain_ids(ChainLink.products.through, instance))
+
+
+# При удалении продукта или контакта меняются наборы связей звеньев. Связи контакта
+# удаляются через clear(), чтобы сводки задолженности обновились по сигналу m2m_changed
+@receiver(pre_delete, sender=Contact)
+def clear_contact_links(sender, instance, **kwargs):
+    instance.chainlink_set.clear()
+
+
+@receiver(pre_delete, sender=Product)
+def touch_product_links(sender, instance, **kwargs):
+    _touch_chain_links(_linked_chain_ids(ChainLink.products.through, instance))
+
+
+@receiver(m2m_changed, sender=ChainLink.products.through)
+@receiver(m2m_changed, sender=ChainLink.contacts.through)
+def touch_m2m_links(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            _touch_chain_links([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        _touch_chain_links(pk_set)
+    elif action == "pre_clear":
+        _touch_chain_links(_linked_chain_ids(sender, instance))
+
+
+# Сводки задолженности: состояние затронутых звеньев запоминается до изменения
+# и сравнивается с состоянием после него
+def _snapshot_links(instance, links):
+    instance._dept_rollup_before = snapshot(links, lock=True)
+
+
+def _apply_links(instance):
+    before = instance.__dict__.pop("_dept_rollup_before", {})
+    apply_changes(before, snapshot(ChainLink.objects.filter(pk__in=list(before))))
+
+
+@receiver(pre_delete, sender=ChainLink)
+def snapshot_deleted_link(sender, instance, **kwargs):
+    _snapshot_links(instance, ChainLink.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=ChainLink)
+def update_deleted_rollups(sender, instance, **kwargs):
+    _apply_links(instance)
+
+
+@receiver(m2m_changed, sender=ChainLink.contacts.through)
+def update_contact_rollups(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action.startswith("post_"):
+        _apply_links(instance)
+    elif not reverse:
+        _snapshot_links(instance, ChainLink.objects.filter(pk=instance.pk))
+    elif action == "pre_clear":
+        _snapshot_links(instance, ChainLink.objects.filter(contacts=instance.pk))
+    else:
+        _snapshot_links(instance, ChainLink.objects.filter(pk__in=pk_set))
@@ -0,0 +1,51 @@
+import csv
+import io
+
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def iter_json_array(items, chunk_size=1000):
+    """Отдает JSON-массив частями, не собирая весь ответ в памяти"""
+    encoder = JSONEncoder(ensure_ascii=False)
+    separator = "["
+    chunk = []
+    for item in items:
+        chunk.append(separator + encoder.encode(item))
+        separator = ","
+        if len(chunk) >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("[]" if separator == "[" else "]")
+    yield "".join(chunk)
+
+
+def iter_ndjson(items, chunk_size=1000):
+    """Отдает объекты по одному JSON на строку, частями по chunk_size строк"""
+    encoder = JSONEncoder(ensure_ascii=False)
+    chunk = []
+    for item in items:
+        chunk.append(encoder.encode(item) + "\n")
+        if len(chunk) >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def iter_csv(items, fields, chunk_size=1000):
+    """Отдает CSV с заголовком, частями по chunk_size строк"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    # Заголовок отдается сразу, не дожидаясь первой порции данных
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for count, item in enumerate(items, 1):
+        writer.writerow(item)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -2,6 +2,12 @@ from django.urls import path
 from rest_framework.routers import DefaultRouter
 
 from retail.apps import RetailConfig
+from retail.async_views import (
+    AsyncChainLinkListAPIView,
+    AsyncChainLinkRetrieveAPIView,
+    AsyncContactListAPIView,
+    AsyncProductListAPIView,
+)
 from retail.views import (
     ChainLinkCreateAPIView,
     ChainLinkListAPIView,
@@ -10,6 +16,13 @@ from retail.views import (
     ProductsViewSet,
     ChainLinkUpdateAPIView,
     ChainLinkDeleteAPIView,
+    ChainLinkDescendantsAPIView,
+    ChainLinkAncestorsAPIView,
+    ChainLinkBulkAPIView,
+    ChainLinkExportAPIView,
+    ChainCacheStatsAPIView,
+    DeptRollupListAPIView,
+    ChainLinkDeptAPIView,
 )
 
 app_name = RetailConfig.name
@@ -27,6 +40,26 @@ urlpatterns = (
             ChainLinkCreateAPIView.as_view(),
             name="chain-create",
         ),
+        path(
+            "chain/bulk/",
+            ChainLinkBulkAPIView.as_view(),
+            name="chain-bulk",
+        ),
+        path(
+            "chain/export/",
+            ChainLinkExportAPIView.as_view(),
+            name="chain-export",
+        ),
+        path(
+            "chain/cache/stats/",
+            ChainCacheStatsAPIView.as_view(),
+            name="chain-cache-stats",
+        ),
+        path(
+            "chain/dept/<str:group>/",
+            DeptRollupListAPIView.as_view(),
+            name="chain-dept",
+        ),
         path(
             "chain/list/",
             ChainLinkListAPIView.as_view(),
@@ -37,6 +70,21 @@ urlpatterns = (
             ChainLinkRetrieveAPIView.as_view(),
             name="chain-retrieve",
         ),
+        path(
+            "chain/<int:pk>/descendants/",
+            ChainLinkDescendantsAPIView.as_view(),
+            name="chain-descendants",
+        ),
+        path(
+            "chain/<int:pk>/ancestors/",
+            ChainLinkAncestorsAPIView.as_view(),
+            name="chain-ancestors",
+        ),
+        path(
+            "chain/<int:pk>/dept/",
+            ChainLinkDeptAPIView.as_view(),
+            name="chain-link-dept",
+        ),
         path(
             "chain/update/<int:pk>/",
             ChainLinkUpdateAPIView.as_view(),
@@ -47,6 +95,27 @@ urlpatterns = (
             ChainLinkDeleteAPIView.as_view(),
             name="chain-delete",
         ),
+        # Асинхронные версии представлений для чтения (под ASGI)
+        path(
+            "async/chain/list/",
+            AsyncChainLinkListAPIView.as_view(),
+            name="async-chain-list",
+        ),
+        path(
+            "async/chain/<int:pk>/",
+            AsyncChainLinkRetrieveAPIView.as_view(),
+            name="async-chain-retrieve",
+        ),
+        path(
+            "async/contacts/",
+            AsyncContactListAPIView.as_view(),
+            name="async-contacts-list",
+        ),
+        path(
+            "async/products/",
+            AsyncProductListAPIView.as_view(),
+            name="async-products-list",
+        ),
     ]
     + contactRouter.urls
     + productRouter.urls
@@ -0,0 +1,154 @@
+from datetime import timezone
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import OuterRef
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+# Поля, значение которых в строке values() уже совпадает с выводом сериализатора
+PLAIN_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+# Часовой пояс вывода дат, в котором время из БД не нужно переводить
+UTC_TIMEZONES = (timezone.utc, "UTC")
+
+
+class ValuesSerializer(serializers.BaseSerializer):
+    """Сериализатор только для чтения строк values() в тот же вид, что и у serializer_class.
+
+    Поля и их порядок берутся из serializer_class один раз на класс. Числа, строки
+    и id связей переносятся как есть, остальные значения преобразуются полем
+    serializer_class, связи M2M читаются массивом id в том же запросе. Экземпляры
+    модели не создаются, поэтому строка сериализуется в разы быстрее.
+    Строки выбираются методом values().
+    """
+
+    serializer_class = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        columns, _ = self.get_columns()
+        # Настройки вывода (формат, часовой пояс) читаются один раз на ответ
+        self.converters = [
+            (name, key, field and self.get_converter(field))
+            for name, key, field in columns
+        ]
+
+    @classmethod
+    def get_columns(cls):
+        """[(поле ответа, ключ строки values(), поле или None для значения как есть), ...]
+        и {ключ строки: имя связи M2M}"""
+        if "_columns" not in cls.__dict__:
+            columns, relations = [], {}
+            for name, field in cls.serializer_class().fields.items():
+                if isinstance(field, serializers.ManyRelatedField):
+                    key = f"{field.source}_ids"
+                    relations[key] = field.source
+                    columns.append((name, key, None))
+                elif isinstance(field, PLAIN_FIELDS):
+                    columns.append((name, field.source, None))
+                else:
+                    columns.append((name, field.source, field))
+            cls._columns, cls._relations = columns, relations
+        return cls._columns, cls._relations
+
+    @classmethod
+    def values(cls, queryset):
+        """Выборка строк для сериализатора. Связи M2M - массивы id в порядке id,
+        как и при prefetch_related в ChainLinkQuerySet.with_relations"""
+        columns, relations = cls.get_columns()
+        queryset = queryset.prefetch_related(None)
+        arrays = {}
+        for key, source in relations.items():
+            relation = queryset.model._meta.get_field(source)
+            column = relation.m2m_reverse_name()
+            arrays[key] = ArraySubquery(
+                relation.remote_field.through.objects.filter(
+                    **{relation.m2m_column_name(): OuterRef("pk")}
+                )
+                .order_by(column)
+                .values(column)
+            )
+        fields = [key for _, key, _ in columns if key not in relations]
+        # Аннотации выборки (например, ранг поиска для позиции курсора) остаются в строке
+        fields += queryset.query.annotation_select
+        return queryset.values(*fields, **arrays)
+
+    def get_converter(self, field):
+        """Преобразование значения из БД. Для Decimal и datetime в UTC - без
+        квантования и смены часового пояса, если они не меняют результат"""
+        if isinstance(field, serializers.DecimalField):
+            coerce_to_string = getattr(
+                field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+            )
+            if (
+                not coerce_to_string
+                or field.localize
+                or field.normalize_output
+                or not field.decimal_places
+                or field.max_digits is None
+            ):
+                return field.to_representation
+            places, length = field.decimal_places, field.max_digits + 1
+
+            def convert(value):
+                text = f"{value:f}"
+                # Число из БД уже с нужным количеством знаков после запятой
+                if len(text) <= length and text.find(".") == len(text) - places - 1:
+                    return text
+                return field.to_representation(value)
+
+            return convert
+
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+            field_timezone = (
+                field.timezone
+                if hasattr(field, "timezone")
+                else field.default_timezone()
+            )
+            if (
+                output_format is None
+                or output_format.lower() != ISO_8601
+                or getattr(field_timezone, "key", field_timezone) not in UTC_TIMEZONES
+            ):
+                return field.to_representation
+
+            def convert(value):
+                if value.tzinfo is timezone.utc:
+                    return f"{value.isoformat()[:-6]}Z"
+                return field.to_representation(value)
+
+            return convert
+
+        return field.to_representation
+
+    def to_representation(self, row):
+        return {
+            name: (
+                row[key] if convert is None or row[key] is None else convert(row[key])
+            )
+            for name, key, convert in self.converters
+        }
+
+
+class ValuesListMixin:
+    """Список только для чтения строится из строк values() сериализатором
+    values_serializer_class: тот же JSON, что и у serializer_class, без экземпляров моделей
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.values_serializer_class
+        queryset = serializer_class.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer_class(page, many=True).data)
+        return Response(serializer_class(queryset, many=True).data)
@@ -1,21 +1,44 @@
-from django.db.models.functions import Lower
+from django.conf import settings
+from django.db.models import CharField, IntegerField
+from django.db.models.functions import Cast
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from retail.models import ChainLink, Contact, Product
+from retail.cache import CachedLinkResponseMixin, CachedResponseMixin, get_cache_stats
+from retail.conditional import ConditionalGetMixin
+from retail.filters import ChainLinkFilter
+from retail.models import ChainLink, Contact, DeptRollup, Product
+from retail.paginators import ChainLinkCursorPagination
+from retail.search import TrigramSearchFilter
+from retail.streaming import iter_csv, iter_json_array, iter_ndjson
 from retail.serializers import (
     ChainLinkSerializer,
+    ChainLinkValuesSerializer,
     ContactSerializer,
+    ContactValuesSerializer,
     ProductSerializer,
+    ProductValuesSerializer,
     ChainLinkUpdateSerializer,
+    ChainLinkBulkItemSerializer,
+    ChainLinkBulkResultSerializer,
+    DeptRollupSerializer,
 )
+from retail.services import bulk_save_chain_links, iter_network
+from retail.values import ValuesListMixin
 
 
-class ContactsViewSet(ModelViewSet):
+class ContactsViewSet(ValuesListMixin, ModelViewSet):
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
+    values_serializer_class = ContactValuesSerializer
+    filter_backends = [TrigramSearchFilter]
+    search_fields = ("city", "street", "email")
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
@@ -34,7 +57,7 @@ class ContactsViewSet(ModelViewSet):
 
     @extend_schema(
         summary="Получение списка контактов",
-        description="Возвращает список всех контактов.",
+        description="Возвращает список всех контактов. Параметр search - поиск по городу, улице и email.",
         responses={
             200: OpenApiResponse(
                 response=ContactSerializer(many=True), description="Успешный ответ"
@@ -100,9 +123,12 @@ class ContactsViewSet(ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class ProductsViewSet(ModelViewSet):
+class ProductsViewSet(ValuesListMixin, ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    values_serializer_class = ProductValuesSerializer
+    filter_backends = [TrigramSearchFilter]
+    search_fields = ("name", "model")
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
@@ -121,7 +147,7 @@ class ProductsViewSet(ModelViewSet):
 
     @extend_schema(
         summary="Получение списка продуктов",
-        description="Возвращает список всех продуктов.",
+        description="Возвращает список всех продуктов. Параметр search - поиск по названию и модели.",
         responses={
             200: OpenApiResponse(
                 response=ContactSerializer(many=True), description="Успешный ответ"
@@ -205,12 +231,117 @@ class ChainLinkCreateAPIView(generics.CreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class ChainLinkListAPIView(generics.ListAPIView):
+class ChainLinkBulkAPIView(generics.GenericAPIView):
+    serializer_class = ChainLinkBulkItemSerializer
+
+    @extend_schema(
+        summary="Пакетное создание и обновление звеньев",
+        description="Принимает список звеньев: элементы с id обновляются, без id - создаются. "
+        "Возвращает результат по каждому элементу.",
+        request=ChainLinkBulkItemSerializer(many=True),
+        responses={
+            200: OpenApiResponse(
+                response=ChainLinkBulkResultSerializer(many=True),
+                description="Успешный ответ",
+            ),
+            400: OpenApiResponse(description="Некорректные данные"),
+            401: OpenApiResponse(description="Необходима авторизация"),
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            raise ValidationError({"non_field_errors": ["Ожидается список звеньев"]})
+        if len(request.data) > settings.CHAIN_BULK_MAX_ITEMS:
+            raise ValidationError(
+                {
+                    "non_field_errors": [
+                        f"Не более {settings.CHAIN_BULK_MAX_ITEMS} звеньев за запрос"
+                    ]
+                }
+            )
+
+        # Один экземпляр сериализатора на весь пакет: поля не копируются для каждого элемента
+        serializer = self.get_serializer()
+        items = []
+        for data in request.data:
+            try:
+                items.append(serializer.run_validation(data))
+            except ValidationError as exc:
+                items.append({"errors": exc.detail})
+
+        results = bulk_save_chain_links(items)
+        return Response(ChainLinkBulkResultSerializer(results, many=True).data)
+
+
+class ChainLinkExportAPIView(generics.GenericAPIView):
+    # Сколько звеньев читается из БД и подгружает связи за один раз
+    chunk_size = 2000
+    export_fields = (
+        "id",
+        "name",
+        "supplier_id",
+        "level",
+        "dept",
+        "products",
+        "contacts",
+    )
+
+    @extend_schema(
+        summary="Выгрузка всей сети",
+        description="Отдает потоком все звенья с id поставщика, задолженностью, id продуктов и контактов. "
+        "Параметр output: ndjson (по умолчанию) или csv.",
+        responses={
+            200: OpenApiResponse(description="Успешный ответ"),
+            400: OpenApiResponse(description="Некорректные данные"),
+            401: OpenApiResponse(description="Необходима авторизация"),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get("output", "ndjson")
+        rows = iter_network(self.chunk_size)
+
+        if output == "ndjson":
+            rows = ({**row, "dept": str(row["dept"])} for row in rows)
+            response = StreamingHttpResponse(
+                iter_ndjson(rows, self.chunk_size),
+                content_type="application/x-ndjson",
+            )
+        elif output == "csv":
+            # Списки id в ячейке разделяются точкой с запятой
+            rows = (
+                {
+                    **row,
+                    "products": ";".join(map(str, row["products"])),
+                    "contacts": ";".join(map(str, row["contacts"])),
+                }
+                for row in rows
+            )
+            response = StreamingHttpResponse(
+                iter_csv(rows, self.export_fields, self.chunk_size),
+                content_type="text/csv",
+            )
+        else:
+            raise ValidationError({"output": "Допустимые значения: ndjson, csv"})
+
+        response["Content-Disposition"] = f'attachment; filename="network.{output}"'
+        return response
+
+
+class ChainLinkListAPIView(
+    CachedResponseMixin, ConditionalGetMixin, ValuesListMixin, generics.ListAPIView
+):
     serializer_class = ChainLinkSerializer
+    values_serializer_class = ChainLinkValuesSerializer
+    pagination_class = ChainLinkCursorPagination
+    filter_backends = [ChainLinkFilter, TrigramSearchFilter]
+    search_fields = ("name",)
 
     @extend_schema(
         summary="Получение списка звеньев цепочки поставки",
-        description="Возвращает список всех звеньев.",
+        description="Возвращает постраничный список звеньев (курсорная пагинация). "
+        "Фильтры: страна и город контакта, поставщик, продукт, уровень, "
+        "диапазоны задолженности и даты создания, наличие задолженности. "
+        "Параметр search - поиск по названию, по умолчанию с сортировкой по похожести.",
         responses={
             200: OpenApiResponse(
                 response=ContactSerializer(many=True), description="Успешный ответ"
@@ -222,20 +353,22 @@ class ChainLinkListAPIView(generics.ListAPIView):
         return super().get(*args, **kwargs)
 
     def get_queryset(self):
-        country = self.request.query_params.get("country", None)
-        if country:
-            # Получение только тех данных, которые содержат переданную страну (поле и переданный параметр приводятся к нижнему регистру)
-            return (
-                ChainLink.objects.annotate(lowercase=Lower("contacts__country"))
-                .filter(lowercase=country.lower())
-                .order_by("id")
-            )
-        return ChainLink.objects.all().order_by("id")
+        # Фильтры по параметрам запроса применяет ChainLinkFilter
+        return ChainLink.objects.order_by("id")
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        self.version_rows = [(row["id"], row["modified_at"]) for row in page]
+        self.version_extra = (self.paginator.has_next, self.paginator.has_previous)
+        return page
 
-class ChainLinkRetrieveAPIView(generics.RetrieveAPIView):
+
+class ChainLinkRetrieveAPIView(
+    CachedLinkResponseMixin, ConditionalGetMixin, generics.RetrieveAPIView
+):
     serializer_class = ChainLinkSerializer
-    queryset = ChainLink.objects.all()
+    queryset = ChainLink.objects.with_relations()
+    send_last_modified = True
 
     @extend_schema(
         summary="Получение звена цепочки поставки",
@@ -251,6 +384,76 @@ class ChainLinkRetrieveAPIView(generics.RetrieveAPIView):
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def get_object(self):
+        link = super().get_object()
+        self.version_rows = [(link.pk, link.modified_at)]
+        return link
+
+
+class ChainLinkDescendantsAPIView(generics.GenericAPIView):
+    serializer_class = ChainLinkSerializer
+    queryset = ChainLink.objects.all()
+    # Сколько звеньев (вместе с id связей) читается из БД за один раз
+    chunk_size = 2000
+
+    @extend_schema(
+        summary="Получение нижележащих звеньев цепочки поставки",
+        description="Возвращает потоком все звенья, которым указанное звено поставляет прямо или через посредников. "
+        "Параметр depth ограничивает глубину.",
+        responses={
+            200: OpenApiResponse(
+                response=ChainLinkSerializer(many=True), description="Успешный ответ"
+            ),
+            400: OpenApiResponse(description="Некорректные данные"),
+            401: OpenApiResponse(description="Необходима авторизация"),
+            404: OpenApiResponse(description="Указанное звено не существует"),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        depth = request.query_params.get("depth", None)
+        if depth is not None:
+            if not depth.isdigit():
+                raise ValidationError(
+                    {"depth": "Ожидается неотрицательное целое число"}
+                )
+            depth = int(depth)
+
+        link = self.get_object()
+        queryset = ChainLinkValuesSerializer.values(
+            ChainLink.objects.descendants_of(link, depth).order_by("level", "id")
+        )
+        serializer = ChainLinkValuesSerializer()
+        items = (
+            serializer.to_representation(row)
+            for row in queryset.iterator(chunk_size=self.chunk_size)
+        )
+        return StreamingHttpResponse(
+            iter_json_array(items, self.chunk_size), content_type="application/json"
+        )
+
+
+class ChainLinkAncestorsAPIView(ValuesListMixin, generics.ListAPIView):
+    serializer_class = ChainLinkSerializer
+    values_serializer_class = ChainLinkValuesSerializer
+
+    @extend_schema(
+        summary="Получение цепочки поставщиков звена",
+        description="Возвращает поставщиков звена от завода до непосредственного поставщика.",
+        responses={
+            200: OpenApiResponse(
+                response=ChainLinkSerializer(many=True), description="Успешный ответ"
+            ),
+            401: OpenApiResponse(description="Необходима авторизация"),
+            404: OpenApiResponse(description="Указанное звено не существует"),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        link = get_object_or_404(ChainLink.objects.only("level", "path"), **self.kwargs)
+        return ChainLink.objects.ancestors_of(link)
+
 
 class ChainLinkUpdateAPIView(generics.UpdateAPIView):
     serializer_class = ChainLinkUpdateSerializer
@@ -299,3 +502,82 @@ class ChainLinkDeleteAPIView(generics.DestroyAPIView):
     )
     def delete(self, request, *args, **kwargs):
         return super().delete(request, *args, **kwargs)
+
+
+class ChainCacheStatsAPIView(generics.GenericAPIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Статистика кэша звеньев",
+        description="Возвращает количество попаданий и промахов кэша ответов звеньев.",
+        responses={
+            200: OpenApiResponse(description="Успешный ответ"),
+            401: OpenApiResponse(description="Необходима авторизация"),
+            403: OpenApiResponse(description="Нет доступа"),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(get_cache_stats())
+
+
+class DeptRollupListAPIView(generics.ListAPIView):
+    serializer_class = DeptRollupSerializer
+    # Сводок столько же, сколько групп, поэтому они отдаются без пагинации
+    pagination_class = None
+
+    @extend_schema(
+        summary="Сводка задолженности по группам звеньев",
+        description="Возвращает сумму, количество, минимум и максимум задолженности "
+        "по группам: subtree - сети заводов (поддеревья звеньев нулевого уровня), "
+        "level - уровни иерархии, country - страны контактов, city - города контактов.",
+        responses={
+            200: OpenApiResponse(
+                response=DeptRollupSerializer(many=True), description="Успешный ответ"
+            ),
+            401: OpenApiResponse(description="Необходима авторизация"),
+            404: OpenApiResponse(description="Неизвестная группировка"),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        kind = self.kwargs["group"]
+        if kind not in DeptRollup.Kind.values:
+            raise NotFound("Неизвестная группировка")
+
+        queryset = DeptRollup.objects.filter(kind=kind, count__gt=0)
+        if kind == DeptRollup.Kind.SUBTREE:
+            factories = ChainLink.objects.filter(level=0).values_list(
+                Cast("pk", CharField())
+            )
+            queryset = queryset.filter(key__in=factories)
+        if kind in (DeptRollup.Kind.SUBTREE, DeptRollup.Kind.LEVEL):
+            queryset = queryset.order_by(Cast("key", IntegerField()))
+        else:
+            queryset = queryset.order_by("key", "city")
+        return queryset
+
+
+class ChainLinkDeptAPIView(generics.RetrieveAPIView):
+    serializer_class = DeptRollupSerializer
+
+    @extend_schema(
+        summary="Задолженность в сети звена",
+        description="Возвращает сумму, количество, минимум и максимум задолженности "
+        "звена и всех звеньев, которым оно поставляет прямо или через посредников.",
+        responses={
+            200: OpenApiResponse(
+                response=DeptRollupSerializer, description="Успешный ответ"
+            ),
+            401: OpenApiResponse(description="Необходима авторизация"),
+            404: OpenApiResponse(description="Указанное звено не существует"),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_object(self):
+        return get_object_or_404(
+            DeptRollup, kind=DeptRollup.Kind.SUBTREE, key=str(self.kwargs["pk"])
+        )
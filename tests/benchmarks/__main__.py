@@ -0,0 +1,96 @@
+"""Замеры производительности на тестовой БД со сгенерированной сетью поставок.
+
+python -m tests.benchmarks --size 10000 --output benchmarks.json
+python -m tests.benchmarks --compare benchmarks.json - сравнение с прошлым запуском
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks")
+    parser.add_argument(
+        "--size", type=int, default=10_000, help="Примерное число звеньев"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--only", nargs="+", default=None, help="Имена замеров")
+    parser.add_argument("--output", default=None, help="Файл отчета JSON")
+    parser.add_argument(
+        "--compare", default=None, help="Отчет JSON прошлого запуска для сравнения"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Допустимый рост медианы относительно --compare (доля)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+
+    django.setup()
+
+    from django.test.runner import DiscoverRunner
+
+    from tests.benchmarks.cases import CASES, Dataset
+    from tests.benchmarks.suite import compare, run_benchmarks
+
+    unknown = set(args.only or ()) - CASES.keys()
+    if unknown:
+        sys.exit(f"Неизвестные замеры: {', '.join(sorted(unknown))}")
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    def progress(name, result):
+        print(
+            f"{name:<26} медиана {result['median'] * 1000:9.3f} мс, "
+            f"мин. {result['min'] * 1000:9.3f} мс"
+        )
+
+    # Та же тестовая БД, что и у manage.py test, создается и удаляется здесь
+    runner = DiscoverRunner(verbosity=0)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        data = Dataset(args.size, seed=args.seed)
+        data.create()
+        print(f"Звеньев: {data.links}")
+        report = run_benchmarks(
+            data, rounds=args.rounds, names=args.only, progress=progress
+        )
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if baseline is None:
+        return
+    if baseline["dataset"] != report["dataset"]:
+        print(f"Внимание: сравнение с другим набором данных {baseline['dataset']}")
+    regressions = compare(report, baseline, args.threshold)
+    for name, before, after in regressions:
+        print(
+            f"Замедление {name}: {before * 1000:.3f} -> {after * 1000:.3f} мс "
+            f"({after / before:.2f}x)"
+        )
+    if regressions:
+        sys.exit(1)
+    print(f"Замедлений больше {args.threshold:.0%} нет")
+
+
+if __name__ == "__main__":
+    main()
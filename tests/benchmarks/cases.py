@@ -0,0 +1,185 @@
+import itertools
+import time
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from retail.admin import ChainLinkAdmin, reset_dept
+from retail.generators import NetworkGenerator
+from retail.models import ChainLink
+from retail.serializers import ChainLinkSerializer, ChainLinkValuesSerializer
+from retail.views import ChainLinkListAPIView
+from users.models import User
+from users.serializers import UserSerializer
+from users.views import UserViewSet
+
+# Форма сети: заводы, под ними три уровня по пять покупателей (156 звеньев на завод)
+DEPTH = 3
+FAN_OUT = 5
+LINKS_PER_FACTORY = sum(FAN_OUT**level for level in range(DEPTH + 1))
+
+# Замеры: имя -> (функция, число вызовов в раунде)
+CASES = {}
+
+
+def benchmark(number):
+    """Регистрирует замер. Функция замера выполняет одну операцию и отмечает
+    измеряемую часть блоком with timer; подготовка вне блока не учитывается"""
+
+    def decorator(func):
+        CASES[func.__name__] = (func, number)
+        return func
+
+    return decorator
+
+
+class Timer:
+    __slots__ = ("elapsed", "start")
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.elapsed += time.perf_counter() - self.start
+
+
+class Dataset:
+    """Сеть поставок заданного размера (NetworkGenerator) и выборки для замеров"""
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.seed = seed
+
+    def create(self):
+        NetworkGenerator(
+            factories=max(1, round(self.size / LINKS_PER_FACTORY)),
+            depth=DEPTH,
+            fan_out=FAN_OUT,
+            seed=self.seed,
+        ).generate()
+        self.links = ChainLink.objects.count()
+        self.page = list(
+            ChainLink.objects.with_relations().order_by("pk")[
+                : settings.CHAIN_LIST_PAGE_SIZE
+            ]
+        )
+        self.factories = list(ChainLink.objects.filter(level=0).order_by("pk"))
+        self.retailers = list(ChainLink.objects.filter(level=1).order_by("pk"))
+        self.leaves = list(ChainLink.objects.filter(level=DEPTH).order_by("pk"))
+        self.debtors = list(
+            ChainLink.objects.with_dept()
+            .order_by("pk")
+            .values_list("pk", flat=True)[:100]
+        )
+        self.admin = User.objects.create_superuser("benchmark", password="benchmark")
+        # Номера для уникальных значений между вызовами
+        self.counter = itertools.count()
+
+
+@benchmark(number=50)
+def chain_serializer_encode(data, timer):
+    """Страница звеньев через ChainLinkSerializer"""
+    with timer:
+        ChainLinkSerializer(data.page, many=True).data
+
+
+@benchmark(number=50)
+def chain_values_encode(data, timer):
+    """Та же страница строками values(), как в списке звеньев"""
+    with timer:
+        rows = ChainLinkValuesSerializer.values(
+            ChainLink.objects.filter(pk__in=[link.pk for link in data.page])
+        )
+        ChainLinkValuesSerializer(rows, many=True).data
+
+
+@benchmark(number=200)
+def chain_serializer_decode(data, timer):
+    """Проверка данных нового звена с поставщиком, продуктами и контактами"""
+    link = data.page[next(data.counter) % len(data.page)]
+    payload = {
+        "name": "Новое звено",
+        "supplier": link.pk,
+        "dept": "100.50",
+        "products": [product.pk for product in link.products.all()],
+        "contacts": [contact.pk for contact in link.contacts.all()],
+    }
+    with timer:
+        serializer = ChainLinkSerializer(data=payload)
+        serializer.is_valid(raise_exception=True)
+
+
+@benchmark(number=20)
+def country_filter(data, timer):
+    """Первая страница списка с ?country= (ChainLinkFilter)"""
+    request = Request(RequestFactory().get("/", {"country": "Беларусь"}))
+    view = ChainLinkListAPIView(request=request)
+    with timer:
+        queryset = view.filter_queryset(view.get_queryset())
+        list(queryset.values_list("pk", flat=True)[: settings.CHAIN_LIST_PAGE_SIZE])
+
+
+@benchmark(number=10)
+def admin_reset_dept(data, timer):
+    """Действие админки "Очистить задолженность" для 100 звеньев"""
+    request = RequestFactory().post("/")
+    request.user = data.admin
+    request._messages = CookieStorage(request)
+    model_admin = ChainLinkAdmin(ChainLink, admin.site)
+    queryset = ChainLink.objects.filter(pk__in=data.debtors)
+    with transaction.atomic():
+        with timer:
+            reset_dept(model_admin, request, queryset)
+        transaction.set_rollback(True)
+
+
+@benchmark(number=3)
+def user_create(data, timer):
+    """UserViewSet.perform_create, включая хэширование пароля"""
+    serializer = UserSerializer(
+        data={"username": f"user{next(data.counter)}", "password": "password"}
+    )
+    serializer.is_valid(raise_exception=True)
+    with timer:
+        UserViewSet().perform_create(serializer)
+
+
+@benchmark(number=200)
+def chain_ancestors(data, timer):
+    """Поставщики звена нижнего уровня до завода"""
+    link = data.leaves[next(data.counter) % len(data.leaves)]
+    with timer:
+        list(ChainLink.objects.ancestors_of(link))
+
+
+@benchmark(number=20)
+def chain_descendants(data, timer):
+    """Вся сеть завода"""
+    link = data.factories[next(data.counter) % len(data.factories)]
+    with timer:
+        list(ChainLink.objects.descendants_of(link).values_list("pk", flat=True))
+
+
+@benchmark(number=10)
+def chain_move_subtree(data, timer):
+    """Смена поставщика розничной сети: перенос ее поддерева под другой завод"""
+    number = next(data.counter)
+    link = data.retailers[number % len(data.retailers)]
+    # Другой завод, а если он один - другая розничная сеть
+    candidates = [
+        factory for factory in data.factories if factory.pk != link.supplier_id
+    ] or [retailer for retailer in data.retailers if retailer.pk != link.pk]
+    supplier = candidates[number % len(candidates)]
+    with transaction.atomic():
+        link = ChainLink.objects.get(pk=link.pk)
+        link.supplier = supplier
+        with timer:
+            link.save()
+        transaction.set_rollback(True)
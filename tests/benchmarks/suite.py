@@ -0,0 +1,87 @@
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+
+import django
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tests.benchmarks.cases import CASES, Timer
+
+
+def run_case(func, data, number, rounds):
+    """Время одной операции (с) по раундам из number вызовов. Изменения данных
+    откатываются после замера"""
+    timings = []
+    with transaction.atomic():
+        # Прогрев: импорты, кэши сериализаторов и планов запросов
+        func(data, Timer())
+        for _ in range(rounds):
+            timer = Timer()
+            for _ in range(number):
+                func(data, timer)
+            timings.append(timer.elapsed / number)
+        transaction.set_rollback(True)
+    return {
+        "number": number,
+        "rounds": rounds,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+    }
+
+
+def run_benchmarks(data, rounds=5, names=None, progress=None):
+    """Выполняет замеры (все или names) на подготовленном Dataset"""
+    results = {}
+    for name, (func, number) in CASES.items():
+        if names and name not in names:
+            continue
+        results[name] = run_case(func, data, number, rounds)
+        if progress is not None:
+            progress(name, results[name])
+    return {
+        "environment": environment(),
+        "dataset": {"size": data.size, "links": data.links, "seed": data.seed},
+        "results": results,
+    }
+
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "created": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": f"{connection.vendor} {connection.get_database_version()}",
+        "machine": platform.platform(),
+    }
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def compare(report, baseline, threshold):
+    """Замеры, медиана которых выросла относительно baseline больше чем на threshold
+    (доля): [(имя, было, стало)]"""
+    regressions = []
+    for name, result in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        if result["median"] > previous["median"] * (1 + threshold):
+            regressions.append((name, previous["median"], result["median"]))
+    return regressions
@@ -0,0 +1,143 @@
+"""Нагрузочный тест API: пропускная способность и p50/p95/p99 по видам запросов.
+
+python -m tests.load --start-server --concurrency 20 --duration 30 --output load.json
+python -m tests.load --url http://127.0.0.1:8000 --mix chain_list=50,chain_retrieve=50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from tests.load.driver import DEFAULT_MIX, LoadTest, LoadTestError, parse_mix
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+HOST = "127.0.0.1"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m tests.load")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Адрес запущенного сервера")
+    target.add_argument(
+        "--start-server",
+        action="store_true",
+        help="Запустить manage.py runserver с текущими настройками (.env)",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="Порт для --start-server"
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20, help="Замер, с")
+    parser.add_argument(
+        "--warmup", type=float, default=2, help="Начальные секунды без учета"
+    )
+    parser.add_argument("--timeout", type=float, default=30, help="Таймаут запроса, с")
+    parser.add_argument(
+        "--mix",
+        default=",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()),
+        help="Операции и веса через запятую",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--username", default=None, help="Пользователь (по умолчанию создается новый)"
+    )
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--output", default=None, help="Файл отчета JSON")
+    return parser.parse_args()
+
+
+@contextmanager
+def local_server(port):
+    """manage.py runserver на время теста. Вывод сервера показывается при ошибке запуска"""
+    env = {**os.environ, "ALLOWED_HOSTS": os.getenv("ALLOWED_HOSTS") or HOST}
+    with tempfile.TemporaryFile() as log:
+        process = subprocess.Popen(
+            [sys.executable, "manage.py", "runserver", "--noreload", f"{HOST}:{port}"],
+            cwd=BASE_DIR,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    socket.create_connection((HOST, port), timeout=1).close()
+                    break
+                except OSError:
+                    if process.poll() is not None or time.monotonic() > deadline:
+                        log.seek(0)
+                        sys.stderr.write(log.read().decode(errors="replace"))
+                        sys.exit("Сервер не запустился")
+                    time.sleep(0.2)
+            yield f"http://{HOST}:{port}"
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def print_report(report):
+    total = report["total"]
+    print(
+        f"{report['concurrency']} исполнителей, {report['duration']:.1f} с: "
+        f"{total['count']} запросов, {total['throughput']:.1f} запр./с, "
+        f"ошибок {total['errors']}"
+    )
+    print(
+        f"{'запрос':<20}{'всего':>8}{'ошибок':>8}{'запр./с':>9}"
+        f"{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}"
+    )
+    for name, item in [*report["requests"].items(), ("все", total)]:
+        print(
+            f"{name:<20}{item['count']:>8}{item['errors']:>8}"
+            f"{item['throughput']:>9.1f}{item['p50'] * 1000:>10.1f}"
+            f"{item['p95'] * 1000:>10.1f}{item['p99'] * 1000:>10.1f}"
+        )
+
+
+def main():
+    args = parse_args()
+    try:
+        mix = parse_mix(args.mix)
+    except LoadTestError as exc:
+        sys.exit(str(exc))
+
+    def run(url):
+        load_test = LoadTest(
+            url,
+            mix=mix,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            warmup=args.warmup,
+            timeout=args.timeout,
+            seed=args.seed,
+            username=args.username,
+            password=args.password,
+        )
+        return asyncio.run(load_test.run())
+
+    try:
+        if args.start_server:
+            with local_server(args.port) as url:
+                report = run(url)
+        else:
+            report = run(args.url)
+    except LoadTestError as exc:
+        sys.exit(str(exc))
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""Нагрузочный клиент API на asyncio без сторонних библиотек и без Django.
+
+Каждый из concurrency исполнителей держит свое соединение HTTP/1.1 (keep-alive)
+и выполняет операции, выбранные случайно по весам смеси.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+# Операции смеси и веса по умолчанию
+DEFAULT_MIX = {
+    "token": 5,
+    "chain_list": 25,
+    "chain_list_country": 15,
+    "chain_retrieve": 25,
+    "product_crud": 10,
+    "chain_update": 20,
+}
+# Страны контактов, как в retail.generators (сеть команды generate_network)
+COUNTRIES = ("Россия", "Китай", "Беларусь", "Казахстан", "Южная Корея")
+PERCENTILES = (50, 95, 99)
+
+
+class LoadTestError(Exception):
+    pass
+
+
+def parse_mix(value):
+    """Смесь вида "chain_list=30,chain_retrieve=20" -> {операция: вес}"""
+    mix = {}
+    for item in filter(None, value.split(",")):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise LoadTestError(f"Неизвестная операция: {name}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise LoadTestError(f"Некорректный вес операции {name}: {weight!r}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise LoadTestError("В смеси нет операций с положительным весом")
+    return mix
+
+
+def percentile(values, percent):
+    """Перцентиль по рангу отсортированного списка"""
+    if not values:
+        return None
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+class Connection:
+    """Соединение HTTP/1.1 с keep-alive. Запросы выполняются последовательно"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, token=None):
+        """Возвращает код и тело ответа"""
+        payload = b"" if body is None else json.dumps(body).encode()
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Accept: application/json",
+            f"Content-Length: {len(payload)}",
+        ]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        if token is not None:
+            lines.append(f"Authorization: Bearer {token}")
+        data = ("\r\n".join(lines) + "\r\n\r\n").encode() + payload
+
+        for attempt in range(2):
+            reused = self.writer is not None
+            try:
+                return await self._send(method, data)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                # Повтор только на уже использованном соединении: сервер мог
+                # закрыть его по простою, не получив запрос
+                if not reused or attempt:
+                    raise
+
+    async def _send(self, method, data):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        self.writer.write(data)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Соединение закрыто сервером")
+        version, status, _ = status_line.decode("latin-1").split(" ", 2)
+        status = int(status)
+        headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if method == "HEAD" or status in (204, 304) or status < 200:
+            body = b""
+        elif "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            body = await self._read_chunked()
+        else:
+            # Длина не указана: ответ заканчивается закрытием соединения
+            body = await self.reader.read()
+            headers["connection"] = "close"
+
+        if headers.get("connection") == "close" or version == "HTTP/1.0":
+            self.close()
+        return status, body
+
+    async def _read_chunked(self):
+        chunks = []
+        while size := int((await self.reader.readline()).split(b";")[0], 16):
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+        # Завершающие заголовки до пустой строки
+        while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        return b"".join(chunks)
+
+
+class LoadTest:
+    """Нагрузка на сервер url смесью операций mix.
+
+    Перед замером регистрирует пользователя (или использует username и password),
+    получает токен и id звеньев первой страницы списка. Запросы первых warmup
+    секунд не учитываются. Операции меняют данные: названия звеньев и продукты.
+    """
+
+    def __init__(
+        self,
+        url,
+        mix=None,
+        concurrency=10,
+        duration=20,
+        warmup=2,
+        timeout=30,
+        seed=None,
+        username=None,
+        password=None,
+    ):
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise LoadTestError("Поддерживается только http://")
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items()}
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.username = username
+        self.password = password
+        self.token = None
+        self.link_ids = []
+        self.recording = False
+        # Имя запроса -> длительности и исходы (код ответа или имя исключения)
+        self.durations = defaultdict(list)
+        self.outcomes = defaultdict(Counter)
+
+    async def call(self, connection, name, method, path, body=None, token=True):
+        """Запрос с учетом в отчете. Возвращает (код, данные JSON) или None при ошибке"""
+        start = time.perf_counter()
+        try:
+            status, content = await asyncio.wait_for(
+                connection.request(
+                    method,
+                    self.prefix + path,
+                    body,
+                    self.token if token else None,
+                ),
+                self.timeout,
+            )
+        except (OSError, ValueError, asyncio.TimeoutError) as exc:
+            connection.close()
+            self.record(name, time.perf_counter() - start, type(exc).__name__)
+            return None
+        self.record(name, time.perf_counter() - start, status)
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+    def record(self, name, duration, outcome):
+        if self.recording:
+            self.durations[name].append(duration)
+            self.outcomes[name][str(outcome)] += 1
+
+    async def prepare(self, connection):
+        if self.username is None:
+            self.username = f"load-{uuid.uuid4().hex[:12]}"
+            self.password = uuid.uuid4().hex
+            response = await self.call(
+                connection,
+                "register",
+                "POST",
+                "/users/users/",
+                {"username": self.username, "password": self.password},
+                token=False,
+            )
+            if response is None or response[0] != 201:
+                raise LoadTestError(
+                    f"Не удалось зарегистрировать пользователя: {response}"
+                )
+
+        response = await self.call(
+            connection,
+            "token",
+            "POST",
+            "/users/token/",
+            {"username": self.username, "password": self.password},
+            token=False,
+        )
+        if response is None or response[0] != 200:
+            raise LoadTestError(f"Не удалось получить токен: {response}")
+        self.token = response[1]["access"]
+
+        response = await self.call(
+            connection, "chain_list", "GET", "/retail/chain/list/?page_size=1000"
+        )
+        if response is None or response[0] != 200:
+            raise LoadTestError(f"Не удалось получить список звеньев: {response}")
+        self.link_ids = [link["id"] for link in response[1]["results"]]
+        if not self.link_ids:
+            raise LoadTestError(
+                "В БД нет звеньев: заполните ее командой generate_network"
+            )
+
+    async def op_token(self, connection):
+        await self.call(
+            connection,
+            "token",
+            "POST",
+            "/users/token/",
+            {"username": self.username, "password": self.password},
+            token=False,
+        )
+
+    async def op_chain_list(self, connection):
+        await self.call(connection, "chain_list", "GET", "/retail/chain/list/")
+
+    async def op_chain_list_country(self, connection):
+        query = urlencode({"country": self.random.choice(COUNTRIES)})
+        await self.call(
+            connection, "chain_list_country", "GET", f"/retail/chain/list/?{query}"
+        )
+
+    async def op_chain_retrieve(self, connection):
+        pk = self.random.choice(self.link_ids)
+        await self.call(connection, "chain_retrieve", "GET", f"/retail/chain/{pk}/")
+
+    async def op_chain_update(self, connection):
+        pk = self.random.choice(self.link_ids)
+        await self.call(
+            connection,
+            "chain_update",
+            "PATCH",
+            f"/retail/chain/update/{pk}/",
+            {"name": f"Звено {pk} ({self.random.randrange(1000)})"},
+        )
+
+    async def op_product_crud(self, connection):
+        """Создание, чтение, изменение и удаление продукта - четыре запроса"""
+        response = await self.call(
+            connection,
+            "product_create",
+            "POST",
+            "/retail/products/",
+            {
+                "name": "Нагрузочный тест",
+                "model": f"LT-{self.random.randrange(10**6)}",
+                "release_date": "2024-01-01",
+            },
+        )
+        if response is None or response[0] != 201:
+            return
+        path = f"/retail/products/{response[1]['id']}/"
+        await self.call(connection, "product_retrieve", "GET", path)
+        await self.call(
+            connection, "product_update", "PATCH", path, {"model": "LT-updated"}
+        )
+        await self.call(connection, "product_delete", "DELETE", path)
+
+    async def worker(self, deadline):
+        connection = Connection(self.host, self.port)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        try:
+            while time.perf_counter() < deadline:
+                name = self.random.choices(names, weights)[0]
+                await getattr(self, f"op_{name}")(connection)
+        finally:
+            connection.close()
+
+    async def run(self):
+        connection = Connection(self.host, self.port)
+        try:
+            await self.prepare(connection)
+        finally:
+            connection.close()
+
+        start = time.perf_counter()
+        deadline = start + self.warmup + self.duration
+        workers = asyncio.gather(
+            *(self.worker(deadline) for _ in range(self.concurrency))
+        )
+        await asyncio.sleep(self.warmup)
+        self.recording = True
+        measured_from = time.perf_counter()
+        await workers
+        self.recording = False
+        return self.report(time.perf_counter() - measured_from)
+
+    def report(self, elapsed):
+        requests = {}
+        for name in sorted(self.durations):
+            durations = sorted(self.durations[name])
+            outcomes = self.outcomes[name]
+            errors = sum(
+                count
+                for outcome, count in outcomes.items()
+                if not outcome.isdigit() or int(outcome) >= 400
+            )
+            requests[name] = {
+                "count": len(durations),
+                "errors": errors,
+                "throughput": len(durations) / elapsed,
+                "mean": sum(durations) / len(durations),
+                **{f"p{p}": percentile(durations, p) for p in PERCENTILES},
+                "max": durations[-1],
+                "outcomes": dict(outcomes),
+            }
+        durations = sorted(
+            duration for values in self.durations.values() for duration in values
+        )
+        return {
+            "url": self.url,
+            "concurrency": self.concurrency,
+            "duration": elapsed,
+            "mix": self.mix,
+            "total": {
+                "count": len(durations),
+                "errors": sum(item["errors"] for item in requests.values()),
+                "throughput": len(durations) / elapsed,
+                **{f"p{p}": percentile(durations, p) for p in PERCENTILES},
+            },
+            "requests": requests,
+        }
@@ -0,0 +1,170 @@
+from decimal import Decimal
+
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from retail.models import ChainLink, Contact
+from retail.rollups import refresh_dept_rollups
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_admin - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class ChainLinkAdminTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.chain_1 = ChainLink.objects.create(name="chain_1", dept=100)
+        self.chain_2 = ChainLink.objects.create(name="chain_2", dept=200.5)
+        self.chain_3 = ChainLink.objects.create(name="chain_3")
+        self.admin = User.objects.create_superuser(username="admin", password="pass")
+        self.client.force_login(self.admin)
+
+    def reset_dept(self, data):
+        data = {"action": "reset_dept", **data}
+        return self.client.post(
+            reverse("admin:retail_chainlink_changelist"), data=data, follow=True
+        )
+
+    def test_reset_dept_selected(self):
+        creation_date = ChainLink.objects.get(pk=self.chain_1.pk).creation_date
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.reset_dept(
+                {helpers.ACTION_CHECKBOX_NAME: [self.chain_1.pk, self.chain_3.pk]}
+            )
+        updates = [
+            i["sql"]
+            for i in context.captured_queries
+            if i["sql"].startswith('UPDATE "retail_chainlink"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertContains(response, "Задолженность очищена у звеньев: 1")
+
+        chain = ChainLink.objects.get(pk=self.chain_1.pk)
+        self.assertEqual(chain.dept, 0)
+        self.assertEqual(chain.creation_date, creation_date)
+        self.assertEqual(
+            ChainLink.objects.get(pk=self.chain_2.pk).dept, Decimal("200.5")
+        )
+
+    def test_reset_dept_select_across(self):
+        response = self.reset_dept(
+            {helpers.ACTION_CHECKBOX_NAME: [self.chain_1.pk], "select_across": "1"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ChainLink.objects.filter(dept__gt=0).exists())
+        self.assertContains(response, "Задолженность очищена у звеньев: 2")
+
+
+class ChainLinkChangelistTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.factory = ChainLink.objects.create(name="factory")
+        self.factory.contacts.add(
+            Contact.objects.create(email="a@a.ru", country="Russia", city="Moscow")
+        )
+        self.retail = ChainLink.objects.create(
+            name="retail", supplier=self.factory, dept=10
+        )
+        self.retail.contacts.add(
+            Contact.objects.create(email="b@b.ru", country="USA", city="Boston")
+        )
+        self.trader = ChainLink.objects.create(name="trader", supplier=self.retail)
+        # Уровни в фильтре берутся из сводок, журнал которых переносится после фиксации
+        refresh_dept_rollups()
+        self.admin = User.objects.create_superuser(username="admin", password="pass")
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:retail_chainlink_changelist")
+
+    def get_names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(link.name for link in response.context["cl"].result_list)
+
+    def test_supplier_loaded_with_page(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get_names()
+        for i in range(10):
+            ChainLink.objects.create(name=f"buyer_{i}", supplier=self.retail)
+        with CaptureQueriesContext(connection) as more:
+            response = self.client.get(self.url)
+        self.assertEqual(len(more), len(context))
+        self.assertContains(response, f'href="?supplier={self.retail.pk}"')
+
+    def test_filters(self):
+        self.assertEqual(self.get_names(country="russia"), ["factory"])
+        self.assertEqual(self.get_names(country="USA", city="boston"), ["retail"])
+        self.assertEqual(self.get_names(level="2"), ["trader"])
+        self.assertEqual(self.get_names(supplier=self.factory.pk), ["retail"])
+        self.assertEqual(self.get_names(dept="HAS_DEPT"), ["retail"])
+        self.assertEqual(self.get_names(level="x"), ["factory", "retail", "trader"])
+
+    def test_filter_choices(self):
+        # Значение - в нижнем регистре, название - как записано в контакте.
+        # Страны и города - из контактов (в т.ч. без звеньев), уровни - из сводок
+        Contact.objects.create(email="c@c.ru", country="Germany", city="Berlin")
+        response = self.client.get(self.url)
+        self.assertContains(response, '<a href="?country=usa">USA</a>', html=True)
+        self.assertContains(response, "?country=germany")
+        self.assertContains(response, "?level=2")
+        self.assertNotContains(response, "city=boston")
+
+        response = self.client.get(self.url, {"country": "usa"})
+        self.assertContains(response, "Boston")
+        self.assertContains(response, "city=boston")
+        self.assertNotContains(response, "city=moscow")
+        self.assertEqual(self.get_names(country="usa", city="boston"), ["retail"])
+
+    def test_search_and_autocomplete(self):
+        self.assertEqual(self.get_names(q="retail"), ["retail"])
+
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "retail",
+                "model_name": "chainlink",
+                "field_name": "supplier",
+                "term": "trader",
+            },
+        )
+        self.assertEqual(
+            [item["text"] for item in response.json()["results"]], ["trader"]
+        )
+
+        response = self.client.get(
+            reverse("admin:retail_chainlink_change", args=(self.retail.pk,))
+        )
+        self.assertContains(response, 'class="admin-autocomplete"', count=3)
+
+    def test_estimated_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE retail_chainlink")
+        with override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=1):
+            response = self.client.get(self.url)
+            # Оценка берется из статистики, а не COUNT(*)
+            self.assertEqual(response.context["cl"].result_count, 3)
+            ChainLink.objects.create(name="new")
+            response = self.client.get(self.url)
+            self.assertEqual(response.context["cl"].result_count, 3)
+
+            # С фильтром - COUNT(*), закэшированный на ADMIN_COUNT_CACHE_TIMEOUT
+            self.assertEqual(self.get_names(level="0"), ["factory", "new"])
+            ChainLink.objects.create(name="other")
+            response = self.client.get(self.url, {"level": "0"})
+            self.assertEqual(response.context["cl"].result_count, 2)
+            cache.clear()
+            response = self.client.get(self.url, {"level": "0"})
+            self.assertEqual(response.context["cl"].result_count, 3)
+
+        # Маленькие таблицы считаются как обычно
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["cl"].result_count, 5)
@@ -0,0 +1,146 @@
+import asyncio
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from retail.async_views import (
+    AsyncChainLinkListAPIView,
+    AsyncChainLinkRetrieveAPIView,
+    AsyncContactListAPIView,
+    AsyncProductListAPIView,
+)
+from retail.models import ChainLink, Contact, Product
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_async_views - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class AsyncViewsTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        self.product = Product.objects.create(
+            name="Телевизор", model="Samsung", release_date="2018-03-09"
+        )
+        self.contact = Contact.objects.create(
+            email="test_1@test.com", country="Russia", city="Moscow"
+        )
+        self.factory = ChainLink.objects.create(name="factory")
+        self.retail = ChainLink.objects.create(
+            name="retail", supplier=self.factory, dept="10.50"
+        )
+        self.trader = ChainLink.objects.create(name="trader", supplier=self.retail)
+        self.factory.products.set([self.product])
+        self.retail.contacts.set([self.contact])
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def assertSameResponse(self, url, async_url, params=None):
+        response = self.client.get(url, params)
+        async_response = self.client.get(async_url, params)
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.json(), response.json())
+        return response, async_response
+
+    def test_chain_list(self):
+        url = reverse("retail:chain-list")
+        async_url = reverse("retail:async-chain-list")
+        response, async_response = self.assertSameResponse(url, async_url)
+        self.assertEqual(async_response["ETag"], response["ETag"])
+        self.assertSameResponse(url, async_url, {"has_dept": "true"})
+        self.assertSameResponse(url, async_url, {"search": "retail"})
+
+        # Следующая страница по курсору
+        data = self.client.get(async_url, {"page_size": 2}).json()
+        data = self.client.get(data["next"]).json()
+        self.assertEqual([i["name"] for i in data["results"]], ["trader"])
+
+        response = self.client.get(async_url, {"level": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_chain_list_not_modified(self):
+        url = reverse("retail:async-chain-list")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.trader.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_chain_retrieve(self):
+        response, async_response = self.assertSameResponse(
+            reverse("retail:chain-retrieve", args=(self.retail.pk,)),
+            reverse("retail:async-chain-retrieve", args=(self.retail.pk,)),
+        )
+        self.assertEqual(async_response["ETag"], response["ETag"])
+        self.assertEqual(async_response["Last-Modified"], response["Last-Modified"])
+
+        response = self.client.get(
+            reverse("retail:async-chain-retrieve", args=(self.retail.pk,)),
+            HTTP_IF_NONE_MATCH=async_response["ETag"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(reverse("retail:async-chain-retrieve", args=(0,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_products_and_contacts(self):
+        self.assertSameResponse(
+            reverse("retail:products-list"), reverse("retail:async-products-list")
+        )
+        self.assertSameResponse(
+            reverse("retail:contacts-list"),
+            reverse("retail:async-contacts-list"),
+            {"search": "Moscow"},
+        )
+
+    def test_unauthorized(self):
+        self.client.force_authenticate(user=None)
+        for name in ("async-chain-list", "async-products-list", "async-contacts-list"):
+            response = self.client.get(reverse(f"retail:{name}"))
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_method_not_allowed(self):
+        response = self.client.post(reverse("retail:async-chain-list"), {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class AsyncViewsConcurrencyTestCase(APITestCase):
+    """Несколько запросов обрабатываются одним циклом событий одновременно"""
+
+    def setUp(self) -> None:
+        ChainLink.objects.create(name="factory")
+        self.user1 = User.objects.create(username="user1")
+
+    async def test_concurrent_requests(self):
+        for view in (
+            AsyncChainLinkListAPIView,
+            AsyncChainLinkRetrieveAPIView,
+            AsyncContactListAPIView,
+            AsyncProductListAPIView,
+        ):
+            self.assertTrue(view.view_is_async)
+
+        token = str(AccessToken.for_user(self.user1))
+        urls = [
+            reverse("retail:async-chain-list"),
+            reverse("retail:async-products-list"),
+            reverse("retail:async-contacts-list"),
+        ] * 5
+        responses = await asyncio.gather(
+            *(
+                self.async_client.get(url, headers={"Authorization": f"Bearer {token}"})
+                for url in urls
+            )
+        )
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [status.HTTP_200_OK] * len(urls),
+        )
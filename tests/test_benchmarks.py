@@ -0,0 +1,44 @@
+from django.test import TestCase
+
+from retail.models import ChainLink
+from tests.benchmarks.cases import CASES, Dataset
+from tests.benchmarks.suite import compare, run_benchmarks
+from users.models import User
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_benchmarks - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class BenchmarksTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = Dataset(300, seed=1)
+        cls.data.create()
+
+    def test_run(self):
+        links = ChainLink.objects.count()
+        report = run_benchmarks(self.data, rounds=1)
+
+        self.assertEqual(set(report["results"]), set(CASES))
+        for result in report["results"].values():
+            self.assertEqual(result["rounds"], 1)
+            self.assertGreater(result["median"], 0)
+        self.assertEqual(report["dataset"], {"size": 300, "links": links, "seed": 1})
+        self.assertIn("database", report["environment"])
+        # Замеры не меняют данные
+        self.assertEqual(ChainLink.objects.count(), links)
+        self.assertFalse(User.objects.filter(username__startswith="user").exists())
+        self.assertEqual(
+            ChainLink.objects.with_dept().filter(pk__in=self.data.debtors).count(),
+            len(self.data.debtors),
+        )
+
+    def test_compare(self):
+        baseline = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+        report = {
+            "results": {"a": {"median": 1.1}, "b": {"median": 1.5}, "c": {"median": 9}}
+        }
+        self.assertEqual(compare(report, baseline, 0.2), [("b", 1.0, 1.5)])
@@ -0,0 +1,127 @@
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from retail.cache import get_cache
+from retail.models import ChainLink, Contact, Product
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_cache - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+@override_settings(CHAIN_CACHE_ENABLED=True)
+class ChainCacheTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        get_cache().clear()
+
+        self.product = Product.objects.create(
+            name="product_1", release_date="2018-03-09"
+        )
+        self.contact = Contact.objects.create(email="test_1@test.com")
+        self.chain_1 = ChainLink.objects.create(name="chain_1")
+        self.chain_2 = ChainLink.objects.create(name="chain_2", supplier=self.chain_1)
+        self.chain_3 = ChainLink.objects.create(name="chain_3")
+        self.chain_1.contacts.set([self.contact.pk])
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def retrieve(self, chain):
+        return self.get(reverse("retail:chain-retrieve", args=(chain.pk,)))
+
+    def test_list_cached(self):
+        url = f'{reverse("retail:chain-list")}?page_size=2'
+        response = self.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            cached = self.get(url)
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(cached.json(), response.json())
+
+        # Другая страница кэшируется отдельно
+        response = self.get(response.json()["next"])
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_save_invalidates(self):
+        url = reverse("retail:chain-list")
+        self.get(url)
+        self.retrieve(self.chain_1)
+        self.retrieve(self.chain_3)
+
+        self.chain_1.name = "new_chain_1"
+        self.chain_1.save()
+
+        response = self.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["name"], "new_chain_1")
+        self.assertEqual(self.retrieve(self.chain_1)["X-Cache"], "MISS")
+        self.assertEqual(self.retrieve(self.chain_3)["X-Cache"], "HIT")
+
+    def test_related_changes_invalidate(self):
+        self.retrieve(self.chain_1)
+        self.contact.email = "new@test.com"
+        self.contact.save()
+        self.assertEqual(self.retrieve(self.chain_1)["X-Cache"], "MISS")
+
+        self.chain_1.products.add(self.product)
+        response = self.retrieve(self.chain_1)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["products"], [self.product.pk])
+
+        self.product.chainlink_set.add(self.chain_3)
+        self.assertEqual(self.retrieve(self.chain_3)["X-Cache"], "MISS")
+
+        self.product.chainlink_set.clear()
+        self.assertEqual(self.retrieve(self.chain_1).json()["products"], [])
+
+        self.retrieve(self.chain_1)
+        self.contact.delete()
+        self.assertEqual(self.retrieve(self.chain_1).json()["contacts"], [])
+
+    def test_subtree_change_invalidates(self):
+        self.assertEqual(self.retrieve(self.chain_2).json()["level"], 1)
+
+        self.chain_1.supplier = self.chain_3
+        self.chain_1.save()
+        self.assertEqual(self.retrieve(self.chain_2).json()["level"], 2)
+
+        self.chain_3.delete()
+        self.assertEqual(self.retrieve(self.chain_2).json()["level"], 1)
+
+    def test_bulk_invalidates(self):
+        self.retrieve(self.chain_3)
+        response = self.client.post(
+            reverse("retail:chain-bulk"),
+            data=[{"id": self.chain_3.pk, "products": [self.product.pk]}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.retrieve(self.chain_3).json()["products"], [self.product.pk]
+        )
+
+    def test_stats(self):
+        url = reverse("retail:chain-list")
+        self.get(url)
+        self.get(url)
+
+        response = self.client.get(reverse("retail:chain-cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user1.is_staff = True
+        self.user1.save()
+        response = self.get(reverse("retail:chain-cache-stats"))
+        self.assertEqual(response.json(), {"hits": 1, "misses": 1, "hit_ratio": 0.5})
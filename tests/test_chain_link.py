@@ -1,10 +1,17 @@
+import json
 from decimal import Decimal
+from unittest.mock import patch
 
+from django.db import connection
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
-from retail.models import ChainLink, Product, Contact
+from retail import services
+from retail.models import SUPPLIER_CYCLE_ERROR, ChainLink, Product, Contact
+from retail.paginators import ChainLinkCursorPagination
+from retail.views import ChainLinkExportAPIView
 from users.models import User
 
 
@@ -62,7 +69,7 @@ class ChainTestCountryFilter(APITestCase):
         response = self.client.get(f'{reverse("retail:chain-list")}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        data = response.json()
+        data = response.json()["results"]
         self.assertEqual(data[0]["name"], self.chain_1.name)
         self.assertEqual(data[1]["name"], self.chain_2.name)
         self.assertEqual(data[2]["name"], self.chain_3.name)
@@ -72,14 +79,14 @@ class ChainTestCountryFilter(APITestCase):
         response = self.client.get(f'{reverse("retail:chain-list")}?country=China')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        data = response.json()
+        data = response.json()["results"]
         self.assertEqual(len(data), 0)
 
     def test_list_with_filter_have_matches(self):
         response = self.client.get(f'{reverse("retail:chain-list")}?country=Russia')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        data = response.json()
+        data = response.json()["results"]
         self.assertEqual(len(data), 2)
 
         self.assertEqual(data[0]["name"], self.chain_1.name)
@@ -88,7 +95,7 @@ class ChainTestCountryFilter(APITestCase):
         response = self.client.get(f'{reverse("retail:chain-list")}?country=Ussr')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        data = response.json()
+        data = response.json()["results"]
         self.assertEqual(len(data), 1)
 
         self.assertEqual(data[0]["name"], self.chain_1.name)
@@ -96,11 +103,579 @@ class ChainTestCountryFilter(APITestCase):
         response = self.client.get(f'{reverse("retail:chain-list")}?country=USA')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        data = response.json()
+        data = response.json()["results"]
         self.assertEqual(len(data), 1)
 
         self.assertEqual(data[0]["name"], self.chain_3.name)
 
+    def test_list_with_filter_no_duplicates(self):
+        self.chain_2.contacts.add(self.contact_1.pk)
+
+        response = self.client.get(f'{reverse("retail:chain-list")}?country=russia')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.json()["results"]
+        self.assertEqual(
+            [i["name"] for i in data], [self.chain_1.name, self.chain_2.name]
+        )
+
+    def test_filter_uses_country_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = ChainLink.objects.in_country("Russia").explain()
+        self.assertIn("contact_country_lower_idx", plan)
+
+
+class ChainTestPagination(APITestCase):
+
+    def setUp(self) -> None:
+        self.contact = Contact.objects.create(email="test@test.com", country="Russia")
+        self.chains = [ChainLink.objects.create(name=f"chain_{i}") for i in range(5)]
+        for chain in self.chains[::2]:
+            chain.contacts.set([self.contact.pk])
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def test_pages_forward_and_backward(self):
+        response = self.client.get(f'{reverse("retail:chain-list")}?page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(
+            [i["id"] for i in data["results"]], [i.pk for i in self.chains[:2]]
+        )
+        self.assertIsNone(data["previous"])
+
+        response = self.client.get(data["next"])
+        data = response.json()
+        self.assertEqual(
+            [i["id"] for i in data["results"]], [i.pk for i in self.chains[2:4]]
+        )
+
+        response = self.client.get(data["next"])
+        data = response.json()
+        self.assertEqual([i["id"] for i in data["results"]], [self.chains[4].pk])
+        self.assertIsNone(data["next"])
+
+        response = self.client.get(data["previous"])
+        data = response.json()
+        self.assertEqual(
+            [i["id"] for i in data["results"]], [i.pk for i in self.chains[2:4]]
+        )
+
+    def test_descending_ordering(self):
+        response = self.client.get(
+            f'{reverse("retail:chain-list")}?page_size=3&ordering=-id'
+        )
+        data = response.json()
+        self.assertEqual(
+            [i["id"] for i in data["results"]],
+            [i.pk for i in reversed(self.chains[2:])],
+        )
+
+        response = self.client.get(data["next"])
+        data = response.json()
+        self.assertEqual(
+            [i["id"] for i in data["results"]],
+            [i.pk for i in reversed(self.chains[:2])],
+        )
+
+    def test_pages_with_country_filter(self):
+        response = self.client.get(
+            f'{reverse("retail:chain-list")}?country=russia&page_size=2'
+        )
+        data = response.json()
+        self.assertEqual(
+            [i["id"] for i in data["results"]], [self.chains[0].pk, self.chains[2].pk]
+        )
+
+        response = self.client.get(data["next"])
+        data = response.json()
+        self.assertEqual([i["id"] for i in data["results"]], [self.chains[4].pk])
+        self.assertIsNone(data["next"])
+
+    @patch.object(ChainLinkCursorPagination, "max_page_size", 3)
+    def test_page_size_cap(self):
+        response = self.client.get(f'{reverse("retail:chain-list")}?page_size=100')
+        self.assertEqual(len(response.json()["results"]), 3)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'{reverse("retail:chain-list")}?cursor=abc')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ChainTestHierarchy(APITestCase):
+
+    def setUp(self) -> None:
+        self.factory = ChainLink.objects.create(name="factory")
+        self.retail = ChainLink.objects.create(name="retail", supplier=self.factory)
+        self.trader = ChainLink.objects.create(name="trader", supplier=self.retail)
+        self.other = ChainLink.objects.create(name="other")
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def assertHierarchy(self, link, level, path):
+        link.refresh_from_db()
+        self.assertEqual(link.level, level)
+        self.assertEqual(link.path, path)
+
+    def test_levels_on_create(self):
+        self.assertHierarchy(self.factory, 0, "")
+        self.assertHierarchy(self.retail, 1, f"{self.factory.pk}/")
+        self.assertHierarchy(self.trader, 2, f"{self.factory.pk}/{self.retail.pk}/")
+
+        data = {"name": "trader_2", "supplier": self.trader.pk}
+        response = self.client.post(reverse("retail:chain-create"), data=data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["level"], 3)
+
+    def test_move_subtree(self):
+        response = self.client.patch(
+            reverse("retail:chain-update", args=(self.retail.pk,)),
+            data={"supplier": self.other.pk},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertHierarchy(self.retail, 1, f"{self.other.pk}/")
+        self.assertHierarchy(self.trader, 2, f"{self.other.pk}/{self.retail.pk}/")
+
+        self.retail.supplier = None
+        self.retail.save()
+        self.assertHierarchy(self.retail, 0, "")
+        self.assertHierarchy(self.trader, 1, f"{self.retail.pk}/")
+
+    def test_cycle_rejected(self):
+        response = self.client.patch(
+            reverse("retail:chain-update", args=(self.factory.pk,)),
+            data={"supplier": self.trader.pk},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertHierarchy(self.factory, 0, "")
+
+    def test_supplier_delete(self):
+        self.factory.delete()
+        self.assertHierarchy(self.retail, 0, "")
+        self.assertHierarchy(self.trader, 1, f"{self.retail.pk}/")
+
+    def test_queryset_delete(self):
+        leaf = ChainLink.objects.create(name="leaf", supplier=self.trader)
+        ChainLink.objects.filter(pk__in=[self.factory.pk, self.retail.pk]).delete()
+        self.assertHierarchy(self.trader, 0, "")
+        self.assertHierarchy(leaf, 1, f"{self.trader.pk}/")
+
+    def test_level_filter(self):
+        response = self.client.get(f'{reverse("retail:chain-list")}?level=0')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [i["name"] for i in response.json()["results"]],
+            [self.factory.name, self.other.name],
+        )
+
+        response = self.client.get(f'{reverse("retail:chain-list")}?level=2')
+        self.assertEqual(
+            [i["name"] for i in response.json()["results"]], [self.trader.name]
+        )
+
+        response = self.client.get(f'{reverse("retail:chain-list")}?level=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_level_ordering(self):
+        url = f'{reverse("retail:chain-list")}?ordering=-level&page_size=2'
+        data = self.client.get(url).json()
+        self.assertEqual(
+            [i["name"] for i in data["results"]], [self.trader.name, self.retail.name]
+        )
+
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(
+            [i["name"] for i in data["results"]], [self.other.name, self.factory.name]
+        )
+
+
+class ChainTestSubtree(APITestCase):
+
+    def setUp(self) -> None:
+        self.product = Product.objects.create(
+            name="product_1", release_date="2018-03-09"
+        )
+        self.factory = ChainLink.objects.create(name="factory")
+        self.retail_1 = ChainLink.objects.create(name="retail_1", supplier=self.factory)
+        self.retail_2 = ChainLink.objects.create(name="retail_2", supplier=self.factory)
+        self.trader = ChainLink.objects.create(name="trader", supplier=self.retail_1)
+        self.trader.products.set([self.product.pk])
+        ChainLink.objects.create(name="other")
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def get_stream(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_descendants(self):
+        url = reverse("retail:chain-descendants", args=(self.factory.pk,))
+        # Звено и поддерево с id продуктов и контактов
+        with self.assertNumQueries(2):
+            data = self.get_stream(url)
+
+        self.assertEqual(
+            [i["name"] for i in data],
+            [self.retail_1.name, self.retail_2.name, self.trader.name],
+        )
+        self.assertEqual(data[2]["products"], [self.product.pk])
+
+        data = self.get_stream(f"{url}?depth=1")
+        self.assertEqual(
+            [i["name"] for i in data], [self.retail_1.name, self.retail_2.name]
+        )
+
+        url = reverse("retail:chain-descendants", args=(self.trader.pk,))
+        self.assertEqual(self.get_stream(url), [])
+
+    def test_descendants_errors(self):
+        url = reverse("retail:chain-descendants", args=(self.factory.pk,))
+        response = self.client.get(f"{url}?depth=-1")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse("retail:chain-descendants", args=(1111,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ancestors(self):
+        response = self.client.get(
+            reverse("retail:chain-ancestors", args=(self.trader.pk,))
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [i["name"] for i in response.json()],
+            [self.factory.name, self.retail_1.name],
+        )
+
+        response = self.client.get(
+            reverse("retail:chain-ancestors", args=(self.factory.pk,))
+        )
+        self.assertEqual(response.json(), [])
+
+        response = self.client.get(reverse("retail:chain-ancestors", args=(1111,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ChainTestBulk(APITestCase):
+
+    def setUp(self) -> None:
+        self.product_1 = Product.objects.create(
+            name="product_1", release_date="2018-03-09"
+        )
+        self.product_2 = Product.objects.create(
+            name="product_2", release_date="2018-03-10"
+        )
+        self.contact_1 = Contact.objects.create(email="test_1@test.com")
+
+        self.factory = ChainLink.objects.create(name="factory")
+        self.retail = ChainLink.objects.create(name="retail", supplier=self.factory)
+        self.trader = ChainLink.objects.create(name="trader", supplier=self.retail)
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def post(self, data):
+        return self.client.post(reverse("retail:chain-bulk"), data=data, format="json")
+
+    def test_bulk_create(self):
+        data = [
+            {
+                "name": f"plant_{i}",
+                "supplier": self.retail.pk,
+                "products": [self.product_1.pk, self.product_2.pk],
+                "contacts": [self.contact_1.pk],
+                "dept": "10.50",
+            }
+            for i in range(50)
+        ]
+        # Количество запросов не зависит от размера пакета (включая журнал
+        # сводок задолженности и точки сохранения транзакций)
+        with self.assertNumQueries(19):
+            response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()
+        self.assertEqual({i["status"] for i in results}, {"created"})
+        self.assertEqual([i["index"] for i in results], list(range(50)))
+
+        chain = ChainLink.objects.get(pk=results[0]["id"])
+        self.assertEqual(chain.name, "plant_0")
+        self.assertEqual(chain.dept, Decimal("10.50"))
+        self.assertEqual(chain.level, 2)
+        self.assertEqual(chain.path, f"{self.factory.pk}/{self.retail.pk}/")
+        self.assertEqual(
+            sorted(i.pk for i in chain.products.all()),
+            [self.product_1.pk, self.product_2.pk],
+        )
+        self.assertEqual([i.pk for i in chain.contacts.all()], [self.contact_1.pk])
+
+    def test_bulk_update(self):
+        self.retail.products.set([self.product_1.pk])
+        self.trader.products.set([self.product_2.pk])
+        data = [
+            {"id": self.retail.pk, "name": "new_retail", "products": [], "dept": 5},
+            {"id": self.trader.pk, "supplier": None},
+        ]
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            [
+                {"index": 0, "status": "updated", "id": self.retail.pk},
+                {"index": 1, "status": "updated", "id": self.trader.pk},
+            ],
+        )
+
+        self.retail.refresh_from_db()
+        self.assertEqual(self.retail.name, "new_retail")
+        self.assertEqual(self.retail.dept, 0)
+        self.assertEqual(list(self.retail.products.all()), [])
+
+        self.trader.refresh_from_db()
+        self.assertIsNone(self.trader.supplier)
+        self.assertEqual(self.trader.level, 0)
+        self.assertEqual(
+            [i.pk for i in self.trader.products.all()], [self.product_2.pk]
+        )
+
+    def test_bulk_errors(self):
+        data = [
+            {"name": "plant_1", "products": [self.product_1.pk, 1111]},
+            {"supplier": self.factory.pk},
+            {"id": self.factory.pk, "supplier": self.trader.pk},
+            {"id": 1111, "name": "plant_2"},
+            {"name": "plant_3", "supplier": 1111},
+            {"name": "x" * 256},
+            "plant_4",
+            {"name": "plant_5"},
+        ]
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()
+        self.assertEqual([i["status"] for i in results], ["error"] * 7 + ["created"])
+        self.assertIn("products", results[0]["errors"])
+        self.assertIn("name", results[1]["errors"])
+        self.assertIn("supplier", results[2]["errors"])
+        self.assertIn("id", results[3]["errors"])
+        self.assertIn("supplier", results[4]["errors"])
+        self.assertIn("name", results[5]["errors"])
+
+        self.assertFalse(ChainLink.objects.filter(name="plant_1").exists())
+        self.assertTrue(ChainLink.objects.filter(name="plant_5").exists())
+        self.factory.refresh_from_db()
+        self.assertIsNone(self.factory.supplier)
+
+    def test_bulk_cycle(self):
+        shop = ChainLink.objects.create(name="shop", supplier=self.retail)
+        data = [
+            {"id": self.trader.pk, "supplier": shop.pk},
+            {"id": shop.pk, "supplier": self.trader.pk},
+            {"id": self.factory.pk, "name": "new_factory"},
+        ]
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()
+        self.assertEqual([i["status"] for i in results], ["error", "error", "updated"])
+        self.assertIn("supplier", results[0]["errors"])
+        self.assertIn("supplier", results[1]["errors"])
+        for link in (self.trader, shop):
+            link.refresh_from_db()
+            self.assertEqual(link.supplier, self.retail)
+        self.factory.refresh_from_db()
+        self.assertEqual(self.factory.name, "new_factory")
+
+    def test_bulk_cycle_after_check(self):
+        shop = ChainLink.objects.create(name="shop")
+        final_depths = services._final_depths
+
+        def concurrent_move(*args):
+            # Параллельный запрос ставит магазин поставщиком завода уже после
+            # проверки пакета: перенос магазина под трейдера образует цикл
+            result = final_depths(*args)
+            factory = ChainLink.objects.get(pk=self.factory.pk)
+            factory.supplier = shop
+            factory.save()
+            return result
+
+        data = [
+            {
+                "id": shop.pk,
+                "supplier": self.trader.pk,
+                "products": [self.product_1.pk],
+            },
+            {"id": self.factory.pk, "name": "new_factory"},
+        ]
+        with patch("retail.services._final_depths", concurrent_move):
+            response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()
+        self.assertEqual([i["status"] for i in results], ["error", "updated"])
+        self.assertEqual(results[0]["errors"], {"supplier": [SUPPLIER_CYCLE_ERROR]})
+        shop.refresh_from_db()
+        self.assertIsNone(shop.supplier)
+        self.assertEqual(list(shop.products.all()), [])
+        self.factory.refresh_from_db()
+        self.assertEqual(self.factory.name, "new_factory")
+
+    def test_bulk_move_order(self):
+        # Перенос завода под торговую сеть допустим только после того, как она
+        # сама переносится в корень, хотя в пакете идет раньше
+        data = [
+            {"id": self.factory.pk, "supplier": self.trader.pk},
+            {"id": self.trader.pk, "supplier": None},
+        ]
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([i["status"] for i in response.json()], ["updated", "updated"])
+        self.trader.refresh_from_db()
+        self.assertEqual((self.trader.level, self.trader.path), (0, ""))
+        self.retail.refresh_from_db()
+        self.assertEqual(self.retail.level, 2)
+        self.assertEqual(self.retail.path, f"{self.trader.pk}/{self.factory.pk}/")
+
+    def test_bulk_not_list(self):
+        response = self.post({"name": "plant_1"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CHAIN_BULK_MAX_ITEMS=1)
+    def test_bulk_too_many(self):
+        response = self.post([{"name": "plant_1"}, {"name": "plant_2"}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ChainTestExport(APITestCase):
+
+    def setUp(self) -> None:
+        self.product_1 = Product.objects.create(
+            name="product_1", release_date="2018-03-09"
+        )
+        self.product_2 = Product.objects.create(
+            name="product_2", release_date="2018-03-10"
+        )
+        self.contact_1 = Contact.objects.create(email="test_1@test.com")
+
+        self.chain_1 = ChainLink.objects.create(name="chain_1", dept="10.50")
+        self.chain_2 = ChainLink.objects.create(name="chain_2", supplier=self.chain_1)
+        self.chain_3 = ChainLink.objects.create(name="chain_3", supplier=self.chain_2)
+        self.chain_1.products.set([self.product_1.pk, self.product_2.pk])
+        self.chain_3.contacts.set([self.contact_1.pk])
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def get_content(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    @patch.object(ChainLinkExportAPIView, "chunk_size", 2)
+    def test_export_ndjson(self):
+        # Звенья читаются одним запросом, связи - по два запроса на каждую порцию
+        with self.assertNumQueries(5):
+            content = self.get_content(reverse("retail:chain-export"))
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            rows[0],
+            {
+                "id": self.chain_1.pk,
+                "name": "chain_1",
+                "supplier_id": None,
+                "level": 0,
+                "dept": "10.50",
+                "products": [self.product_1.pk, self.product_2.pk],
+                "contacts": [],
+            },
+        )
+        self.assertEqual(rows[2]["supplier_id"], self.chain_2.pk)
+        self.assertEqual(rows[2]["contacts"], [self.contact_1.pk])
+
+    def test_export_csv(self):
+        content = self.get_content(f'{reverse("retail:chain-export")}?output=csv')
+
+        self.assertEqual(
+            content.splitlines(),
+            [
+                "id,name,supplier_id,level,dept,products,contacts",
+                f"{self.chain_1.pk},chain_1,,0,10.50,"
+                f"{self.product_1.pk};{self.product_2.pk},",
+                f"{self.chain_2.pk},chain_2,{self.chain_1.pk},1,0.00,,",
+                f"{self.chain_3.pk},chain_3,{self.chain_2.pk},2,0.00,,{self.contact_1.pk}",
+            ],
+        )
+
+    def test_export_unknown_output(self):
+        response = self.client.get(f'{reverse("retail:chain-export")}?output=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ChainTestQueryCount(APITestCase):
+    """Количество запросов не должно зависеть от размера страницы"""
+
+    def setUp(self) -> None:
+        products = Product.objects.bulk_create(
+            Product(name=f"product_{i}", release_date="2018-03-09") for i in range(3)
+        )
+        contacts = Contact.objects.bulk_create(
+            Contact(email=f"test_{i}@test.com", country="Russia") for i in range(3)
+        )
+        chains = ChainLink.objects.bulk_create(
+            ChainLink(name=f"chain_{i}") for i in range(500)
+        )
+        ChainLink.products.through.objects.bulk_create(
+            ChainLink.products.through(chainlink_id=chain.pk, product_id=product.pk)
+            for chain in chains
+            for product in products
+        )
+        ChainLink.contacts.through.objects.bulk_create(
+            ChainLink.contacts.through(chainlink_id=chain.pk, contact_id=contact.pk)
+            for chain in chains
+            for contact in contacts
+        )
+        self.chain = chains[0]
+        self.products = [i.pk for i in products]
+        self.contacts = [i.pk for i in contacts]
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def test_list_page_of_500(self):
+        # Звенья вместе с id продуктов и контактов - одним запросом
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{reverse("retail:chain-list")}?page_size=500')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()["results"]
+        self.assertEqual(len(data), 500)
+        self.assertEqual(sorted(data[0]["products"]), self.products)
+        self.assertEqual(data[-1]["contacts"], self.contacts)
+
+    def test_list_page_of_500_with_country_filter(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'{reverse("retail:chain-list")}?page_size=500&country=russia'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_retrieve(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse("retail:chain-retrieve", args=(self.chain.pk,))
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["contacts"], self.contacts)
+
 
 class ChainTestCaseAuthenticated(APITestCase):
 
@@ -160,7 +735,7 @@ class ChainTestCaseAuthenticated(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        data = response.json()
+        data = response.json()["results"]
         self.assertEqual(data[0]["name"], self.chain_1.name)
         self.assertEqual(data[1]["name"], self.chain_2.name)
 
@@ -0,0 +1,182 @@
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from retail.cache import get_cache
+from retail.models import ChainLink, Contact, Product
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_conditional - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class ChainConditionalGetTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        self.product = Product.objects.create(
+            name="product_1", release_date="2018-03-09"
+        )
+        self.contact = Contact.objects.create(email="test_1@test.com")
+        self.chain_1 = ChainLink.objects.create(name="chain_1")
+        self.chain_2 = ChainLink.objects.create(name="chain_2", supplier=self.chain_1)
+        self.chain_3 = ChainLink.objects.create(name="chain_3", supplier=self.chain_2)
+        self.chain_1.products.set([self.product.pk])
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def retrieve_url(self, chain):
+        return reverse("retail:chain-retrieve", args=(chain.pk,))
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response["ETag"]
+
+    def test_retrieve_not_modified(self):
+        url = self.retrieve_url(self.chain_1)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+
+        # Только запрос метки изменения, без связей и сериализации
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        self.assertEqual(not_modified.content, b"")
+
+        not_modified = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_modified(self):
+        url = self.retrieve_url(self.chain_1)
+        etag = self.etag(url)
+
+        self.client.patch(
+            reverse("retail:chain-update", args=(self.chain_1.pk,)), {"name": "new"}
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["name"], "new")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_retrieve_missing(self):
+        response = self.client.get(
+            reverse("retail:chain-retrieve", args=(0,)), HTTP_IF_NONE_MATCH='"etag"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_etag_changes_with_m2m(self):
+        url = self.retrieve_url(self.chain_1)
+
+        etag = self.etag(url)
+        self.chain_1.contacts.add(self.contact)
+        self.assertNotEqual(self.etag(url), etag)
+
+        # Обратная сторона связи
+        etag = self.etag(url)
+        self.product.chainlink_set.clear()
+        self.assertNotEqual(self.etag(url), etag)
+
+        # Удаление связанного контакта удаляет и связь
+        etag = self.etag(url)
+        self.contact.delete()
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_etag_changes_with_subtree_move(self):
+        url = self.retrieve_url(self.chain_3)
+        etag = self.etag(url)
+
+        # Уровень chain_3 меняется массовым запросом при переносе поставщика
+        self.chain_2.supplier = None
+        self.chain_2.save()
+        self.assertNotEqual(self.etag(url), etag)
+
+        etag = self.etag(url)
+        self.chain_2.delete()
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_etag_changes_with_bulk_update(self):
+        url = self.retrieve_url(self.chain_2)
+        etag = self.etag(url)
+
+        response = self.client.post(
+            reverse("retail:chain-bulk"),
+            [{"id": self.chain_2.pk, "products": [self.product.pk]}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_list_not_modified(self):
+        url = f'{reverse("retail:chain-list")}?page_size=2'
+        etag = self.etag(url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Страница списка не описывается одной датой изменения
+        self.assertNotIn("Last-Modified", self.client.get(url))
+
+    def test_list_modified(self):
+        url = reverse("retail:chain-list")
+
+        etag = self.etag(url)
+        self.chain_3.products.add(self.product)
+        self.assertNotEqual(self.etag(url), etag)
+
+        etag = self.etag(url)
+        ChainLink.objects.create(name="chain_4")
+        self.assertNotEqual(self.etag(url), etag)
+
+        # Удаление меняет состав страницы, хотя метки оставшихся звеньев не растут
+        etag = self.etag(url)
+        ChainLink.objects.filter(pk=self.chain_3.pk).delete()
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_list_sorted_not_modified(self):
+        # Строки версии содержат ключи сортировки курсора и ранг поиска
+        for query in ("ordering=-level", "search=chain_2"):
+            url = f'{reverse("retail:chain-list")}?page_size=2&{query}'
+            first = self.client.get(url)
+            second = self.client.get(first.json()["next"] or url)
+            for response in (first, second):
+                self.assertEqual(
+                    self.client.get(
+                        response.wsgi_request.get_full_path(),
+                        HTTP_IF_NONE_MATCH=response["ETag"],
+                    ).status_code,
+                    status.HTTP_304_NOT_MODIFIED,
+                    query,
+                )
+
+    def test_list_etag_depends_on_page(self):
+        url = f'{reverse("retail:chain-list")}?page_size=2'
+        first = self.client.get(url)
+        second = self.client.get(first.json()["next"])
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=second["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(CHAIN_CACHE_ENABLED=True)
+    def test_cached_response_not_modified(self):
+        get_cache().clear()
+        url = self.retrieve_url(self.chain_1)
+        etag = self.etag(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        cached = self.client.get(url)
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(cached["ETag"], etag)
@@ -0,0 +1,46 @@
+import io
+
+from unittest import skipIf, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+
+from retail.models import ChainLink
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_db_connections - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+# Пул задается при запуске, поэтому проверяется та ветка команды, что настроена
+POOL_ENABLED = "pool" in connection.settings_dict.get("OPTIONS", {})
+
+
+class BenchmarkDbConnectionsTestCase(TransactionTestCase):
+    # Команда закрывает соединения между запросами, что недопустимо внутри
+    # транзакции TestCase
+
+    def setUp(self) -> None:
+        ChainLink.objects.create(name="factory")
+        User.objects.create(username="user1")
+
+    @skipIf(POOL_ENABLED, "Пул psycopg включен (DB_POOL_ENABLED=True)")
+    def test_command(self):
+        out = io.StringIO()
+        call_command("benchmark_db_connections", requests=5, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn("новых соединений 5", lines[1])
+        self.assertIn("CONN_MAX_AGE=60", lines[2])
+        self.assertIn("новых соединений 1", lines[2])
+
+    @skipUnless(POOL_ENABLED, "Пул psycopg выключен (DB_POOL_ENABLED=False)")
+    def test_command_pool(self):
+        out = io.StringIO()
+        call_command("benchmark_db_connections", requests=5, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn("пул psycopg", lines[1])
+        self.assertIn("DB_POOL_ENABLED=False", lines[2])
@@ -0,0 +1,248 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from retail.models import ChainLink, Contact, Product
+from retail.views import ChainLinkListAPIView
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_filters - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class ChainLinkFilterTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        self.product_1 = Product.objects.create(
+            name="product_1", release_date="2018-03-09"
+        )
+        self.product_2 = Product.objects.create(
+            name="product_2", release_date="2018-03-09"
+        )
+        self.moscow = Contact.objects.create(
+            email="test_1@test.com", country="Russia", city="Moscow"
+        )
+        self.kazan = Contact.objects.create(
+            email="test_2@test.com", country="Russia", city="Kazan"
+        )
+
+        self.factory = ChainLink.objects.create(name="factory")
+        self.retail = ChainLink.objects.create(
+            name="retail", supplier=self.factory, dept="150.50"
+        )
+        self.trader = ChainLink.objects.create(
+            name="trader", supplier=self.factory, dept="10.00"
+        )
+        self.other = ChainLink.objects.create(
+            name="other", supplier=self.retail, dept="-5.00"
+        )
+        self.factory.products.set([self.product_1, self.product_2])
+        self.retail.products.set([self.product_2])
+        self.retail.contacts.set([self.moscow])
+        self.trader.contacts.set([self.kazan])
+        self.other.contacts.set([self.moscow, self.kazan])
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def names(self, **params):
+        response = self.client.get(reverse("retail:chain-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["name"] for item in response.json()["results"]]
+
+    def test_supplier(self):
+        self.assertEqual(self.names(supplier=self.factory.pk), ["retail", "trader"])
+        self.assertEqual(self.names(supplier=self.trader.pk), [])
+
+    def test_city(self):
+        self.assertEqual(self.names(city="moscow"), ["retail", "other"])
+        self.assertEqual(
+            self.names(city="KAZAN", country="russia"), ["trader", "other"]
+        )
+        self.assertEqual(self.names(city=""), ["factory", "retail", "trader", "other"])
+
+    def test_product(self):
+        self.assertEqual(self.names(product=self.product_2.pk), ["factory", "retail"])
+        self.assertEqual(self.names(product=self.product_1.pk), ["factory"])
+
+    def test_dept(self):
+        self.assertEqual(self.names(has_dept="true"), ["retail", "trader"])
+        self.assertEqual(self.names(has_dept="false"), ["factory", "other"])
+        self.assertEqual(self.names(dept_min="10", dept_max="100"), ["trader"])
+        self.assertEqual(self.names(dept_max="0"), ["factory", "other"])
+
+    def test_creation_date(self):
+        ChainLink.objects.filter(pk=self.factory.pk).update(
+            creation_date=timezone.now() - timedelta(days=10)
+        )
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assertEqual(self.names(created_after=since), ["retail", "trader", "other"])
+        self.assertEqual(self.names(created_before=since), ["factory"])
+
+    def test_combination(self):
+        self.assertEqual(
+            self.names(supplier=self.factory.pk, has_dept="true", city="Kazan"),
+            ["trader"],
+        )
+
+    def test_invalid(self):
+        response = self.client.get(
+            reverse("retail:chain-list"),
+            {"supplier": "abc", "dept_min": "1.234", "created_after": "вчера"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            set(response.json()), {"supplier", "dept_min", "created_after"}
+        )
+
+
+class ChainLinkFilterIndexTestCase(TestCase):
+    """Планы запросов страницы списка на заполненной таблице: каждый частый фильтр
+    и их сочетания читаются по индексу, а не полным просмотром таблицы звеньев"""
+
+    LINKS = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = Product.objects.bulk_create(
+            Product(name=f"product_{i}", release_date="2018-03-09") for i in range(200)
+        )
+        cls.contacts = Contact.objects.bulk_create(
+            Contact(
+                email=f"test_{i}@test.com",
+                country=f"Country {i % 200}",
+                city=f"City {i}",
+            )
+            for i in range(1000)
+        )
+        cls.suppliers = ChainLink.objects.bulk_create(
+            ChainLink(name=f"factory_{i}") for i in range(200)
+        )
+        links = ChainLink.objects.bulk_create(
+            ChainLink(
+                name=f"link_{i}",
+                supplier=cls.suppliers[i % len(cls.suppliers)],
+                # Глубже первого уровня каждое сотое звено, на уровне 3 каждое тысячное
+                level=2 + i // 100 % 10 if i % 100 == 0 else 1,
+                # Задолженность есть у каждого 50-го звена
+                dept=Decimal(i % 1000) if i % 50 == 0 else 0,
+            )
+            for i in range(cls.LINKS)
+        )
+        now = timezone.now()
+        ChainLink.objects.bulk_update(
+            [
+                ChainLink(pk=link.pk, creation_date=now - timedelta(hours=i))
+                for i, link in enumerate(links)
+            ],
+            ["creation_date"],
+            batch_size=5000,
+        )
+        ChainLink.products.through.objects.bulk_create(
+            ChainLink.products.through(
+                chainlink_id=link.pk, product_id=cls.products[i % 200].pk
+            )
+            for i, link in enumerate(links)
+        )
+        ChainLink.contacts.through.objects.bulk_create(
+            ChainLink.contacts.through(
+                chainlink_id=link.pk, contact_id=cls.contacts[i % 1000].pk
+            )
+            for i, link in enumerate(links)
+        )
+        with connection.cursor() as cursor:
+            for model in (ChainLink, Contact, Product):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+            for field in ("products", "contacts"):
+                through = getattr(ChainLink, field).through
+                cursor.execute(f"ANALYZE {through._meta.db_table}")
+        cls.now = now
+
+    def get_plan(self, **params):
+        # Тот же запрос, что выполняет список: строки values() сериализатора
+        # с фильтрами, сортировкой и лимитом первой страницы
+        request = Request(RequestFactory().get("/", params))
+        view = ChainLinkListAPIView(request=request, format_kwarg=None)
+        queryset = view.values_serializer_class.values(
+            view.filter_queryset(view.get_queryset())
+        )
+        return view.paginator._get_page_queryset(queryset, request, view).explain()
+
+    def get_index_name(self, model, column):
+        """Имя индекса, который Django создает для внешнего ключа"""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, model._meta.db_table
+            )
+        return next(
+            name
+            for name, info in constraints.items()
+            if info["index"] and not info["unique"] and info["columns"] == [column]
+        )
+
+    def assertIndexScan(self, index, **params):
+        """В плане есть чтение по индексу index (или по условию индекса) и нет
+        полного просмотра таблицы звеньев"""
+        plan = self.get_plan(**params)
+        self.assertIn(index, plan)
+        self.assertNotRegex(plan, rf"Seq Scan on {ChainLink._meta.db_table}\b")
+
+    def test_supplier(self):
+        self.assertIndexScan(
+            self.get_index_name(ChainLink, "supplier_id"), supplier=self.suppliers[3].pk
+        )
+
+    def test_has_dept(self):
+        self.assertIndexScan("chainlink_has_dept_idx", has_dept="true")
+
+    def test_dept_range(self):
+        self.assertIndexScan("chainlink_dept_idx", dept_min=100, dept_max=120)
+
+    def test_creation_date_range(self):
+        self.assertIndexScan(
+            "chainlink_created_idx",
+            created_after=self.now - timedelta(hours=30),
+            created_before=self.now - timedelta(hours=10),
+        )
+
+    def test_country(self):
+        self.assertIndexScan("contact_country_lower_idx", country="country 7")
+
+    def test_city(self):
+        self.assertIndexScan("contact_city_lower_idx", city="city 7")
+
+    def test_product(self):
+        # Индекс внешнего ключа или уникальный индекс связи с условием на product_id
+        product = self.products[5].pk
+        self.assertIndexScan(f"Index Cond: (product_id = {product})", product=product)
+
+    def test_level(self):
+        self.assertIndexScan("chainlink_level_id_idx", level=3)
+
+    def test_combinations(self):
+        supplier = self.suppliers[0].pk
+        self.assertIndexScan(
+            self.get_index_name(ChainLink, "supplier_id"),
+            supplier=supplier,
+            has_dept="true",
+        )
+        self.assertIndexScan("contact_city_lower_idx", city="city 0", has_dept="true")
+        self.assertIndexScan(
+            "contact_country_lower_idx", country="country 0", dept_min=500
+        )
+        product = self.products[0].pk
+        self.assertIndexScan(
+            f"Index Cond: (product_id = {product})",
+            product=product,
+            created_after=self.now - timedelta(days=365),
+        )
@@ -0,0 +1,108 @@
+import io
+
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import TestCase
+
+from retail.generators import NetworkGenerator
+from retail.models import ChainLink, Contact, DeptRollup, Product
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_generate_network - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class GenerateNetworkTestCase(TestCase):
+
+    def generate(self, seed=1):
+        return NetworkGenerator(
+            factories=2, depth=3, fan_out=3, products=20, seed=seed, batch_size=7
+        ).generate()
+
+    def network(self):
+        """Сеть без учета id: звенья по порядку создания с поставщиком, продуктами
+        и городами контактов"""
+        numbers = {}
+        result = []
+        for link in ChainLink.objects.order_by("pk").prefetch_related(
+            "products", "contacts"
+        ):
+            numbers[link.pk] = len(numbers)
+            result.append(
+                (
+                    link.name,
+                    numbers.get(link.supplier_id),
+                    link.level,
+                    link.dept,
+                    sorted(product.model for product in link.products.all()),
+                    sorted(contact.city for contact in link.contacts.all()),
+                )
+            )
+        return result
+
+    def test_hierarchy(self):
+        counts = self.generate()
+        self.assertEqual(counts["links"], ChainLink.objects.count())
+        self.assertEqual(counts["contacts"], Contact.objects.count())
+        self.assertEqual(counts["products"], Product.objects.count())
+        self.assertEqual(ChainLink.objects.filter(level=0).count(), 2)
+        self.assertTrue(ChainLink.objects.filter(level=3).exists())
+
+        links = {link.pk: link for link in ChainLink.objects.all()}
+        for link in links.values():
+            self.assertTrue(link.contacts.exists())
+            self.assertTrue(link.products.exists())
+            if link.supplier_id is None:
+                self.assertEqual((link.level, link.path, link.dept), (0, "", 0))
+                self.assertTrue(link.name.startswith("Завод"))
+                continue
+            supplier = links[link.supplier_id]
+            self.assertEqual(link.level, supplier.level + 1)
+            self.assertEqual(link.path, supplier.subtree_prefix)
+        self.assertTrue(ChainLink.objects.with_dept().exists())
+
+        # Последовательности сдвинуты: звенья и контакты создаются и через ORM
+        link = ChainLink.objects.create(name="new", supplier=links[min(links)])
+        link.contacts.add(Contact.objects.create(email="new@example.com"))
+        self.assertEqual(link.level, 1)
+
+    def test_rollups(self):
+        self.generate()
+        levels = ChainLink.objects.values("level").annotate(
+            total=Sum("dept"), count=Count("pk")
+        )
+        for row in levels:
+            rollup = DeptRollup.objects.get(
+                kind=DeptRollup.Kind.LEVEL, key=str(row["level"])
+            )
+            self.assertEqual((rollup.total, rollup.count), (row["total"], row["count"]))
+
+    def test_seed(self):
+        self.generate(seed=1)
+        first = self.network()
+        ChainLink.objects.all().delete()
+        Contact.objects.all().delete()
+        Product.objects.all().delete()
+
+        self.generate(seed=1)
+        self.assertEqual(self.network(), first)
+
+        ChainLink.objects.all().delete()
+        self.generate(seed=2)
+        self.assertNotEqual(self.network(), first)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command(
+            "generate_network",
+            factories=1,
+            depth=1,
+            fan_out=2,
+            products=5,
+            skip_rollups=True,
+            stdout=out,
+        )
+        self.assertIn("уровень 1:", out.getvalue())
+        self.assertEqual(ChainLink.objects.filter(level=0).count(), 1)
+        self.assertFalse(DeptRollup.objects.exists())
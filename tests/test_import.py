@@ -0,0 +1,119 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from retail.importers import copy_rows
+from retail.models import ChainLink, Contact, Product
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_import - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class ImportCatalogTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.report = os.path.join(self.dir.name, "errors.ndjson")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def read_report(self):
+        with open(self.report, encoding="utf-8") as file:
+            return [json.loads(line) for line in file]
+
+    def test_import_products_csv(self):
+        out = io.StringIO()
+        path = self.write(
+            "products.csv",
+            "name,model,release_date\n"
+            "product_1,model_1,2018-03-09\n"
+            "product_2,,2019-03-09\n"
+            "product_3,model_3,not a date\n"
+            'product_4,"model, 4",2020-03-09\n',
+        )
+        call_command(
+            "import_catalog",
+            "products",
+            path,
+            "--chunk-size=2",
+            f"--errors={self.report}",
+            stdout=out,
+        )
+        self.assertIn("Загружено: 3, с ошибками: 1", out.getvalue())
+
+        products = list(Product.objects.order_by("pk"))
+        self.assertEqual(
+            [(i.name, i.model) for i in products],
+            [("product_1", "model_1"), ("product_2", ""), ("product_4", "model, 4")],
+        )
+        self.assertEqual(products[0].release_date, datetime.date(2018, 3, 9))
+
+        report = self.read_report()
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report[0]["line"], 4)
+        self.assertIn("release_date", report[0]["errors"])
+
+        # Загруженные через COPY строки получают id из последовательности
+        product = Product.objects.create(name="product_5", release_date="2021-03-09")
+        self.assertGreater(product.pk, products[-1].pk)
+
+    def test_import_contacts_ndjson(self):
+        path = self.write(
+            "contacts.ndjson",
+            json.dumps({"email": "test_1@test.com", "country": "Russia"})
+            + "\n\n"
+            + json.dumps({"email": "not an email"})
+            + "\n{broken\n"
+            + json.dumps({"email": "test_2@test.com", "city": "Москва"})
+            + "\n",
+        )
+        call_command(
+            "import_catalog",
+            "contacts",
+            path,
+            f"--errors={self.report}",
+            stdout=io.StringIO(),
+        )
+
+        self.assertEqual(
+            list(Contact.objects.values_list("email", "country", "city")),
+            [("test_1@test.com", "Russia", ""), ("test_2@test.com", "", "Москва")],
+        )
+        self.assertEqual([i["line"] for i in self.read_report()], [3, 4])
+
+    def test_copy_rows_escaping(self):
+        names = ['a,b "c"', "back\\slash\ttab", "line\nbreak", "", "\\N"]
+        now = timezone.now()
+        copy_rows(
+            ChainLink,
+            (
+                "name",
+                "supplier_id",
+                "dept",
+                "level",
+                "path",
+                "creation_date",
+                "modified_at",
+            ),
+            [(name, None, 0, 0, "", now, now) for name in names],
+        )
+        self.assertEqual(
+            list(ChainLink.objects.order_by("pk").values_list("name", "supplier_id")),
+            [(name, None) for name in names],
+        )
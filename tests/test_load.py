@@ -0,0 +1,66 @@
+import asyncio
+
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from retail.models import ChainLink, Contact, Product
+from tests.load.driver import (
+    DEFAULT_MIX,
+    LoadTest,
+    LoadTestError,
+    parse_mix,
+    percentile,
+)
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_load - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class LoadDriverTestCase(SimpleTestCase):
+
+    def test_parse_mix(self):
+        self.assertEqual(
+            parse_mix("chain_list=3, chain_retrieve=1.5"),
+            {"chain_list": 3, "chain_retrieve": 1.5},
+        )
+        for value in ("unknown=1", "chain_list=x", "chain_list=0"):
+            with self.assertRaises(LoadTestError):
+                parse_mix(value)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+
+class LoadTestCase(LiveServerTestCase):
+
+    def setUp(self) -> None:
+        factory = ChainLink.objects.create(name="factory")
+        factory.contacts.add(Contact.objects.create(email="a@a.ru", country="Россия"))
+        ChainLink.objects.create(name="retail", supplier=factory)
+        Product.objects.create(name="product", release_date="2024-01-01")
+
+    def test_run(self):
+        load_test = LoadTest(
+            self.live_server_url, concurrency=2, duration=1, warmup=0.2, seed=1
+        )
+        report = asyncio.run(load_test.run())
+
+        self.assertGreater(report["total"]["count"], 0)
+        self.assertEqual(report["total"]["errors"], 0, report["requests"])
+        self.assertEqual(report["mix"], DEFAULT_MIX)
+        for name, item in report["requests"].items():
+            self.assertLessEqual(item["p50"], item["p95"], name)
+            self.assertLessEqual(item["p95"], item["p99"], name)
+        # Продукты теста удаляются в той же операции
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_empty_database(self):
+        ChainLink.objects.all().delete()
+        load_test = LoadTest(self.live_server_url, duration=0.1, warmup=0)
+        with self.assertRaisesMessage(LoadTestError, "generate_network"):
+            asyncio.run(load_test.run())
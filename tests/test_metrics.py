@@ -0,0 +1,137 @@
+import io
+import os
+import runpy
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from config.metrics import Histogram, metrics
+from retail.models import ChainLink
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_metrics - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.link = ChainLink.objects.create(name="factory")
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def get_metrics(self, **headers):
+        response = self.client.get(reverse("metrics"), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return response.content.decode().splitlines()
+
+    def test_request_metrics(self):
+        self.client.get(reverse("retail:chain-list"))
+        self.client.get(reverse("retail:chain-list"))
+        self.client.get(reverse("retail:chain-retrieve", args=(0,)))
+        self.client.get(reverse("retail:async-chain-list"))
+
+        lines = self.get_metrics()
+        labels = 'view="retail:chain-list",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 2', lines)
+        self.assertIn(
+            'http_requests_total{view="retail:chain-retrieve",method="GET",status="404"} 1',
+            lines,
+        )
+        self.assertIn(
+            'http_requests_total{view="retail:async-chain-list",method="GET",status="200"} 1',
+            lines,
+        )
+        self.assertIn(f"http_request_duration_seconds_count{{{labels}}} 2", lines)
+        self.assertIn(
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', lines
+        )
+        # Страница списка - один запрос к БД
+        self.assertIn(f"http_request_db_queries_sum{{{labels}}} 2", lines)
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="1"}} 2', lines)
+        # Запросы асинхронного представления тоже учитываются
+        self.assertIn(
+            'http_request_db_queries_sum{view="retail:async-chain-list",method="GET"} 1',
+            lines,
+        )
+        self.assertIn(f"http_response_size_bytes_count{{{labels}}} 2", lines)
+
+    def test_streaming_and_unresolved(self):
+        self.client.get(reverse("retail:chain-export"))
+        self.client.get("/no-such-page/")
+        lines = self.get_metrics()
+        self.assertIn(
+            'http_requests_total{view="unresolved",method="GET",status="404"} 1', lines
+        )
+        # Размер потокового ответа не известен до передачи
+        self.assertFalse(
+            [
+                line
+                for line in lines
+                if line.startswith("http_response_size_bytes")
+                and "retail:chain-export" in line
+            ]
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.get_metrics(Authorization="Bearer secret")
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_token_required(self):
+        # Без DEBUG включенные метрики без токена - ошибка настройки
+        settings_path = os.path.join(settings.BASE_DIR, "config", "settings.py")
+        env = {"DEBUG": "False", "METRICS_ENABLED": "True", "METRICS_TOKEN": ""}
+        with mock.patch.dict(os.environ, env):
+            with self.assertRaises(ImproperlyConfigured):
+                runpy.run_path(settings_path)
+            os.environ["METRICS_TOKEN"] = "secret"
+            self.assertTrue(runpy.run_path(settings_path)["METRICS_ENABLED"])
+
+    def test_histogram(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 2, 5, 6):
+            histogram.observe(value)
+        self.assertEqual(
+            list(histogram.render("x", 'a="b"')),
+            [
+                'x_bucket{a="b",le="1"} 2',
+                'x_bucket{a="b",le="5"} 4',
+                'x_bucket{a="b",le="+Inf"} 5',
+                'x_sum{a="b"} 14',
+                'x_count{a="b"} 5',
+            ],
+        )
+
+
+class BenchmarkMetricsTestCase(TransactionTestCase):
+    # Команда закрывает соединение, что недопустимо внутри транзакции TestCase
+
+    def setUp(self) -> None:
+        ChainLink.objects.create(name="factory")
+        User.objects.create(username="user1")
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("benchmark_metrics", requests=5, rounds=1, stdout=out)
+        self.assertIn("с метриками", out.getvalue())
+        self.assertIn("Учет запроса", out.getvalue())
@@ -0,0 +1,148 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from retail.models import ChainLink, Contact, Product
+from retail.parsers import ORJSONParser
+from retail.renderers import ORJSONRenderer
+from retail.views import ChainLinkBulkAPIView, ChainLinkListAPIView
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_renderers - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class ORJSONRendererTestCase(SimpleTestCase):
+
+    def assertSameRender(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_same_output(self):
+        moscow = timezone(timedelta(hours=3))
+        self.assertSameRender(
+            {
+                "dept": [Decimal("1.50"), Decimal("0"), Decimal("123456789012.34")],
+                "dept_exp": [Decimal("1E+20"), Decimal("0.00001")],
+                "creation_date": [
+                    datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+                    datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=moscow),
+                    datetime(2024, 1, 2, tzinfo=timezone(timedelta(seconds=61))),
+                    datetime(2024, 1, 2),
+                ],
+                "release_date": date(2018, 3, 9),
+                "time": time(1, 2, 3, 400),
+                "timedelta": timedelta(days=1),
+                "uuid": uuid.UUID(int=1),
+                "name": 'Звено \u2028\u2029\x00\x1f\x7f"\\/\n<>&',
+                "lazy": gettext_lazy("Дата создания"),
+                "numbers": [2**70, -(2**63) - 1, 1.5, 0.1, True, None],
+                "tuple": (1, (2, 3)),
+                1: "нестроковый ключ",
+            }
+        )
+
+    def test_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+        self.assertSameRender([])
+
+    def test_indent(self):
+        # Отступы обрабатывает JSONRenderer
+        self.assertSameRender({"a": [1, 2]}, "application/json; indent=4")
+        self.assertEqual(
+            ORJSONRenderer().render({"a": 1}, renderer_context={"indent": 2}),
+            b'{\n  "a": 1\n}',
+        )
+
+    def test_same_errors(self):
+        with self.assertRaises(ValueError):
+            ORJSONRenderer().render({"dept": Decimal("NaN")})
+        with self.assertRaises(TypeError):
+            ORJSONRenderer().render({"object": object()})
+
+
+class ORJSONParserTestCase(SimpleTestCase):
+
+    def parse(self, parser_class, content, **parser_context):
+        return parser_class().parse(io.BytesIO(content), parser_context=parser_context)
+
+    def assertSameParse(self, content, **parser_context):
+        self.assertEqual(
+            repr(self.parse(ORJSONParser, content, **parser_context)),
+            repr(self.parse(JSONParser, content, **parser_context)),
+        )
+
+    def test_same_result(self):
+        self.assertSameParse('{"name": "Звено", "dept": 1.5, "ids": [1, 2]}'.encode())
+        # Целые больше 64 бит остаются int
+        self.assertSameParse(b'{"a": 18446744073709551616, "b": -9223372036854775809}')
+        self.assertSameParse(b'{"a": 1e400}')
+        self.assertSameParse('{"name": "Звено"}'.encode("cp1251"), encoding="cp1251")
+
+    def test_same_errors(self):
+        for content in (b"{bad", b'{"a": NaN}', b"\xef\xbb\xbf{}"):
+            with self.assertRaises(ParseError) as fast:
+                self.parse(ORJSONParser, content)
+            with self.assertRaises(ParseError) as drf:
+                self.parse(JSONParser, content)
+            self.assertEqual(str(fast.exception), str(drf.exception))
+
+
+class ChainFastJSONTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        self.product = Product.objects.create(
+            name="product_1", release_date="2018-03-09"
+        )
+        self.contact = Contact.objects.create(email="test_1@test.com")
+        self.chain_1 = ChainLink.objects.create(name="Завод", dept="10.05")
+        self.chain_2 = ChainLink.objects.create(name="chain_2", supplier=self.chain_1)
+        self.chain_1.products.set([self.product])
+        self.chain_2.contacts.set([self.contact])
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def test_list_same_content(self):
+        url = reverse("retail:chain-list")
+        response = self.client.get(url)
+        with patch.object(ChainLinkListAPIView, "renderer_classes", [ORJSONRenderer]):
+            fast = self.client.get(url)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, response.content)
+        self.assertEqual(fast["ETag"], response["ETag"])
+
+    def test_bulk_parser(self):
+        with patch.object(ChainLinkBulkAPIView, "parser_classes", [ORJSONParser]):
+            response = self.client.post(
+                reverse("retail:chain-bulk"),
+                [{"name": "new", "supplier": self.chain_2.pk, "dept": 7.5}],
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            ChainLink.objects.get(pk=response.json()[0]["id"]).dept, Decimal("7.50")
+        )
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command("benchmark_json", links=100, repeat=1, stdout=out)
+        self.assertIn("render", out.getvalue())
+        self.assertIn("parse", out.getvalue())
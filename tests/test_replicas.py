@@ -0,0 +1,169 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.replicas import ReplicaRouter, _replicas_allowed, get_pin_cache
+from retail.cache import get_cache
+from retail.models import ChainLink
+from users.models import User
+
+REPLICA = "replica"
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_replicas - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaRouterTestCase(SimpleTestCase):
+
+    def setUp(self) -> None:
+        self.router = ReplicaRouter()
+
+    def test_read(self):
+        # Вне запроса и в запросах на запись чтение идет из основной БД
+        self.assertEqual(self.router.db_for_read(ChainLink), DEFAULT_DB_ALIAS)
+
+        token = _replicas_allowed.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(ChainLink), REPLICA)
+            self.assertEqual(self.router.db_for_write(ChainLink), DEFAULT_DB_ALIAS)
+        finally:
+            _replicas_allowed.reset(token)
+
+    def test_migrate(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, "retail"))
+        self.assertFalse(self.router.allow_migrate(REPLICA, "retail"))
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self):
+        token = _replicas_allowed.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(ChainLink), DEFAULT_DB_ALIAS)
+        finally:
+            _replicas_allowed.reset(token)
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaRoutingTestCase(TransactionTestCase):
+    """Реплика - второе соединение с той же тестовой БД, поэтому по запросам
+    в каждом соединении видно, куда маршрутизировано чтение"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Реплика добавляется после создания тестовой БД, поэтому и в databases
+        # попадает здесь, а не в атрибуте класса
+        connections.settings[REPLICA] = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict,
+            "TEST": {"MIRROR": DEFAULT_DB_ALIAS},
+        }
+        cls.databases = {DEFAULT_DB_ALIAS, REPLICA}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        # При DB_POOL_ENABLED=True у реплики свой пул соединений с тестовой БД
+        connections[REPLICA].close_pool()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self) -> None:
+        get_pin_cache().clear()
+        self.link = ChainLink.objects.create(name="factory")
+        self.client_1 = self.make_client(User.objects.create(username="user1"))
+        self.client_2 = self.make_client(User.objects.create(username="user2"))
+
+    def make_client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    def get_databases(self, request):
+        """Выполняет запрос и возвращает код ответа и БД, к которым были запросы"""
+        with CaptureQueriesContext(
+            connections[DEFAULT_DB_ALIAS]
+        ) as primary, CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = request()
+        used = {
+            alias
+            for alias, queries in ((DEFAULT_DB_ALIAS, primary), (REPLICA, replica))
+            if len(queries)
+        }
+        return response.status_code, used
+
+    def test_reads_from_replica(self):
+        for url in (
+            reverse("retail:chain-list"),
+            reverse("retail:chain-retrieve", args=(self.link.pk,)),
+            reverse("retail:products-list"),
+            reverse("retail:contacts-list"),
+            reverse("retail:async-chain-list"),
+        ):
+            code, used = self.get_databases(lambda: self.client_1.get(url))
+            self.assertEqual(code, status.HTTP_200_OK)
+            self.assertEqual(used, {REPLICA}, url)
+
+    def test_read_your_writes(self):
+        code, used = self.get_databases(
+            lambda: self.client_1.post(
+                reverse("retail:chain-create"), {"name": "new"}, format="json"
+            )
+        )
+        self.assertEqual(code, status.HTTP_201_CREATED)
+        self.assertEqual(used, {DEFAULT_DB_ALIAS})
+
+        # Записавший клиент читает из основной БД, остальные - с реплики
+        url = reverse("retail:chain-list")
+        self.assertEqual(
+            self.get_databases(lambda: self.client_1.get(url)),
+            (status.HTTP_200_OK, {DEFAULT_DB_ALIAS}),
+        )
+        self.assertEqual(
+            self.get_databases(lambda: self.client_2.get(url)),
+            (status.HTTP_200_OK, {REPLICA}),
+        )
+
+        # После окончания закрепления клиент снова читает с реплики
+        get_pin_cache().clear()
+        self.assertEqual(
+            self.get_databases(lambda: self.client_1.get(url)),
+            (status.HTTP_200_OK, {REPLICA}),
+        )
+
+    def test_failed_write_not_pinned(self):
+        url = reverse("retail:chain-create")
+        code, _ = self.get_databases(lambda: self.client_1.post(url, {}, format="json"))
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.get_databases(lambda: self.client_1.get(reverse("retail:chain-list"))),
+            (status.HTTP_200_OK, {REPLICA}),
+        )
+
+    @override_settings(CHAIN_CACHE_ENABLED=True)
+    def test_cache_filled_from_primary(self):
+        get_cache().clear()
+        self.client_1.post(
+            reverse("retail:chain-create"), {"name": "new"}, format="json"
+        )
+
+        # Промах кэша у незакрепленного клиента читается из основной БД, поэтому
+        # записавший клиент получает из кэша уже свои изменения
+        url = reverse("retail:chain-list")
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client_2.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertFalse(
+            [i for i in replica.captured_queries if "retail_chainlink" in i["sql"]]
+        )
+
+        response = self.client_1.get(url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertIn("new", [i["name"] for i in response.json()["results"]])
@@ -0,0 +1,304 @@
+from collections import defaultdict
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.admin import helpers
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse as url_reverse
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from retail.models import ChainLink, Contact, DeptRollup, DeptRollupChange
+from retail.rollups import refresh_dept_rollups
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_rollups - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+def expected_rollups():
+    """Сводки, посчитанные обходом всех звеньев по поставщикам"""
+    links = {link.pk: link for link in ChainLink.objects.prefetch_related("contacts")}
+    groups = defaultdict(list)
+    for link in links.values():
+        keys = {("level", str(link.level), "")}
+        node = link
+        while node is not None:
+            keys.add(("subtree", str(node.pk), ""))
+            node = links.get(node.supplier_id)
+        for contact in link.contacts.all():
+            country, city = contact.country.lower(), contact.city.lower()
+            if country:
+                keys.add(("country", country, ""))
+                if city:
+                    keys.add(("city", country, city))
+        for key in keys:
+            groups[key].append(link.dept)
+    return {
+        key: (sum(values), len(values), min(values), max(values))
+        for key, values in groups.items()
+    }
+
+
+def actual_rollups():
+    refresh_dept_rollups()
+    return {
+        (row.kind, row.key, row.city): (
+            row.total,
+            row.count,
+            row.min_dept,
+            row.max_dept,
+        )
+        for row in DeptRollup.objects.all()
+    }
+
+
+class DeptRollupTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        self.contact_1 = Contact.objects.create(
+            email="test_1@test.com", country="Russia", city="Moscow"
+        )
+        self.contact_2 = Contact.objects.create(
+            email="test_2@test.com", country="russia", city="Kazan"
+        )
+        self.contact_3 = Contact.objects.create(
+            email="test_3@test.com", country="USA", city="Boston"
+        )
+
+        self.factory = ChainLink.objects.create(name="factory", dept=0)
+        self.retail = ChainLink.objects.create(
+            name="retail", supplier=self.factory, dept=100
+        )
+        self.trader = ChainLink.objects.create(
+            name="trader", supplier=self.retail, dept=50
+        )
+        self.plant = ChainLink.objects.create(name="plant", dept=10)
+        self.retail.contacts.set([self.contact_1, self.contact_2])
+        self.trader.contacts.set([self.contact_3])
+        refresh_dept_rollups()
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def assertConsistent(self):
+        self.assertEqual(actual_rollups(), expected_rollups())
+
+    def get(self, group):
+        response = self.client.get(reverse("retail:chain-dept", args=(group,)))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_created(self):
+        self.assertConsistent()
+        self.assertEqual(
+            DeptRollup.objects.get(kind="subtree", key=str(self.factory.pk)).total,
+            Decimal("150"),
+        )
+
+    def test_dept_changed(self):
+        self.trader.dept = 500
+        self.trader.save()
+        self.assertConsistent()
+
+        # Ушло единственное звено с максимумом: после фиксации транзакции журнал
+        # переносится в сводки, а группа ждет пересчета командой
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.trader.dept = 1
+            self.trader.save(update_fields=["dept"])
+            self.assertTrue(DeptRollupChange.objects.exists())
+        self.assertTrue(callbacks)
+        self.assertFalse(DeptRollupChange.objects.exists())
+        self.assertTrue(
+            DeptRollup.objects.get(kind="subtree", key=str(self.factory.pk)).stale
+        )
+        self.assertConsistent()
+        self.assertFalse(DeptRollup.objects.filter(stale=True).exists())
+
+    def test_extreme_multiplicity(self):
+        # Минимум 0 остается у другого звена уровня: пересчет не нужен
+        link = ChainLink.objects.create(name="link", dept=0)
+        refresh_dept_rollups()
+        level = DeptRollup.objects.get(kind="level", key="0")
+        self.assertEqual((level.min_dept, level.min_count), (0, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            link.delete()
+        level = DeptRollup.objects.get(kind="level", key="0")
+        self.assertEqual((level.min_dept, level.min_count, level.stale), (0, 1, False))
+        self.assertFalse(DeptRollup.objects.filter(stale=True).exists())
+        self.assertConsistent()
+
+    def test_subtree_move_queries(self):
+        # Поддерево считается одним запросом по уровням, а не снимком каждого звена
+        def move(supplier):
+            self.retail.supplier = supplier
+            with CaptureQueriesContext(connection) as context:
+                self.retail.save()
+            return len(context.captured_queries)
+
+        queries = move(self.plant)
+        for dept in range(5):
+            ChainLink.objects.create(name="buyer", supplier=self.trader, dept=dept)
+        self.assertEqual(move(self.factory), queries)
+        self.assertConsistent()
+
+    def test_read_only(self):
+        self.retail.dept = 1000
+        self.retail.save()
+        url = reverse("retail:chain-link-dept", args=(self.factory.pk,))
+
+        # Чтение не переносит журнал и не блокирует сводки
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.json()["max"], "100.00")
+        self.assertTrue(DeptRollupChange.objects.exists())
+
+        out = StringIO()
+        call_command("refresh_dept_rollups", stdout=out)
+        self.assertIn("Перенесено изменений: 6", out.getvalue())
+        self.assertEqual(self.client.get(url).json()["max"], "1000.00")
+        self.assertConsistent()
+
+    def test_subtree_moved(self):
+        self.retail.supplier = self.plant
+        self.retail.save()
+        self.assertConsistent()
+
+        self.trader.supplier = None
+        self.trader.save()
+        self.assertConsistent()
+
+    def test_deleted(self):
+        self.retail.delete()
+        self.assertConsistent()
+
+        ChainLink.objects.all().delete()
+        self.assertEqual(actual_rollups(), {})
+
+    def test_contacts_changed(self):
+        self.retail.contacts.remove(self.contact_2)
+        self.assertConsistent()
+
+        self.contact_3.chainlink_set.add(self.retail, self.plant)
+        self.assertConsistent()
+
+        self.contact_3.chainlink_set.clear()
+        self.assertConsistent()
+
+        self.contact_1.country = "Belarus"
+        self.contact_1.save()
+        self.assertConsistent()
+
+        Contact.objects.filter(pk__in=[self.contact_1.pk, self.contact_2.pk]).delete()
+        self.assertConsistent()
+
+    def test_bulk(self):
+        response = self.client.post(
+            reverse("retail:chain-bulk"),
+            [
+                {"name": "new", "supplier": self.trader.pk, "dept": "7.50"},
+                {"name": "new_2", "contacts": [self.contact_3.pk], "dept": "3"},
+                {"id": self.retail.pk, "contacts": [self.contact_3.pk]},
+                {"id": self.trader.pk, "supplier": self.plant.pk},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertConsistent()
+
+    def test_admin_reset_dept(self):
+        admin = User.objects.create_superuser(username="admin", password="pass")
+        self.client.force_login(admin)
+        self.client.post(
+            url_reverse("admin:retail_chainlink_changelist"),
+            data={
+                "action": "reset_dept",
+                helpers.ACTION_CHECKBOX_NAME: [self.retail.pk, self.trader.pk],
+            },
+        )
+        self.assertEqual(ChainLink.objects.get(pk=self.retail.pk).dept, 0)
+        self.assertConsistent()
+
+    def test_rebuild(self):
+        expected = actual_rollups()
+        DeptRollup.objects.update(total=0)
+        call_command("rebuild_dept_rollups", chunk_size=2, stdout=StringIO())
+        self.assertEqual(actual_rollups(), expected)
+
+    def test_subtree_list(self):
+        # Только сети заводов
+        self.assertEqual(
+            self.get("subtree"),
+            [
+                {
+                    "link": self.factory.pk,
+                    "total": "150.00",
+                    "count": 3,
+                    "min": "0.00",
+                    "max": "100.00",
+                },
+                {
+                    "link": self.plant.pk,
+                    "total": "10.00",
+                    "count": 1,
+                    "min": "10.00",
+                    "max": "10.00",
+                },
+            ],
+        )
+
+    def test_level_list(self):
+        self.assertEqual(
+            [(i["level"], i["total"], i["count"]) for i in self.get("level")],
+            [(0, "10.00", 2), (1, "100.00", 1), (2, "50.00", 1)],
+        )
+
+    def test_country_and_city_list(self):
+        # Страна считается без учета регистра, звено учитывается в стране один раз
+        self.assertEqual(
+            [(i["country"], i["total"], i["count"]) for i in self.get("country")],
+            [("russia", "100.00", 1), ("usa", "50.00", 1)],
+        )
+        self.assertEqual(
+            [(i["country"], i["city"], i["total"]) for i in self.get("city")],
+            [
+                ("russia", "kazan", "100.00"),
+                ("russia", "moscow", "100.00"),
+                ("usa", "boston", "50.00"),
+            ],
+        )
+
+    def test_list_queries(self):
+        # Один запрос: чтение по строке на группу, без обхода звеньев и пересчета
+        with self.assertNumQueries(1):
+            self.get("level")
+
+    def test_unknown_group(self):
+        response = self.client.get(reverse("retail:chain-dept", args=("unknown",)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_link_dept(self):
+        response = self.client.get(
+            reverse("retail:chain-link-dept", args=(self.retail.pk,))
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                "link": self.retail.pk,
+                "total": "150.00",
+                "count": 2,
+                "min": "50.00",
+                "max": "100.00",
+            },
+        )
+
+        response = self.client.get(reverse("retail:chain-link-dept", args=(0,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
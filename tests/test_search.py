@@ -0,0 +1,119 @@
+from django.db import connection
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from retail.models import ChainLink, Contact, Product
+from users.models import User
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_search - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class SearchTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        self.product_1 = Product.objects.create(
+            name="Телевизор", model="Samsung QE55", release_date="2018-03-09"
+        )
+        self.product_2 = Product.objects.create(
+            name="Samsung Galaxy", model="S24", release_date="2024-01-17"
+        )
+        Product.objects.create(
+            name="Холодильник", model="LG", release_date="2020-01-01"
+        )
+
+        self.contact_1 = Contact.objects.create(
+            email="moscow@shop.ru", city="Санкт-Петербург", street="Невский проспект"
+        )
+        self.contact_2 = Contact.objects.create(email="spb@shop.ru", city="Москва")
+
+        self.factory = ChainLink.objects.create(name="Завод электроники")
+        self.retail = ChainLink.objects.create(
+            name="Розничная сеть электроники", supplier=self.factory
+        )
+        self.trader = ChainLink.objects.create(name="ИП Иванов", supplier=self.retail)
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def ids(self, data):
+        return [item["id"] for item in data]
+
+    def test_chain_list_search(self):
+        url = reverse("retail:chain-list")
+        data = self.get(url, search="электроники")["results"]
+        self.assertEqual(self.ids(data), [self.factory.pk, self.retail.pk])
+
+        # Пустой запрос не фильтрует список
+        data = self.get(url, search=" ")["results"]
+        self.assertEqual(len(data), 3)
+
+    def test_chain_list_search_pages(self):
+        url = reverse("retail:chain-list")
+        ChainLink.objects.create(name="Склад электроники", supplier=self.factory)
+
+        response = self.get(url, search="электроники", page_size=1)
+        ids = self.ids(response["results"])
+        while response["next"]:
+            response = self.client.get(response["next"]).json()
+            ids += self.ids(response["results"])
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(len(set(ids)), 3)
+
+        # Сортировка, заданная явно, сохраняется
+        data = self.get(url, search="электроники", ordering="-id")["results"]
+        self.assertEqual(self.ids(data), sorted(ids, reverse=True))
+
+    def test_chain_list_search_not_modified(self):
+        url = f'{reverse("retail:chain-list")}?search=электроники'
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        ChainLink.objects.create(name="Склад электроники")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_products_search(self):
+        url = reverse("retail:products-list")
+        # По названию одного продукта и модели другого
+        data = self.get(url, search="Samsung")
+        self.assertEqual(
+            sorted(self.ids(data)), sorted([self.product_1.pk, self.product_2.pk])
+        )
+        self.assertEqual(self.get(url, search="нет такого"), [])
+
+    def test_contacts_search(self):
+        url = reverse("retail:contacts-list")
+        self.assertEqual(self.ids(self.get(url, search="Москва")), [self.contact_2.pk])
+        self.assertEqual(self.ids(self.get(url, search="Невский")), [self.contact_1.pk])
+        self.assertEqual(self.ids(self.get(url, search="moscow")), [self.contact_1.pk])
+
+    # Поиск с pg_trgm: опечатки и сортировка по похожести
+
+    def test_typo(self):
+        data = self.get(reverse("retail:contacts-list"), search="Моска")
+        self.assertEqual(self.ids(data), [self.contact_2.pk])
+
+    def test_relevance_ordering(self):
+        ChainLink.objects.create(name="Электроника")
+        data = self.get(reverse("retail:chain-list"), search="Электроника")["results"]
+        self.assertEqual(data[0]["name"], "Электроника")
+
+    def test_index_used(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute(
+                "EXPLAIN SELECT id FROM retail_product WHERE name %> 'Samsung'"
+            )
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        self.assertIn("product_name_trgm_idx", plan)
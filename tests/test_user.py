@@ -2,6 +2,11 @@ from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
+from users.authentication import (
+    USER_CACHE_KEY,
+    CachedJWTAuthentication,
+    get_user_cache,
+)
 from users.models import User
 
 
@@ -163,3 +168,63 @@ class TestJWTTestCase(APITestCase):
 
         resp = self.client.post(token_refresh_url, {"refresh": "abc"}, format="json")
         self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedJWTAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        get_user_cache().clear()
+        self.user = User.objects.create_user(username="user", password="pass")
+        response = self.client.post(
+            reverse("users:token"), {"username": "user", "password": "pass"}
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["access"]}'
+        )
+        self.url = reverse("retail:chain-list")
+
+    def test_user_cached(self):
+        # Пользователь и страница списка
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Повторный запрос не обращается к таблице пользователей
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_password_not_cached(self):
+        self.client.get(self.url)
+        cached = get_user_cache().get(USER_CACHE_KEY.format(self.user.pk))
+        self.assertNotIn("password", cached)
+        self.assertNotIn(self.user.password, cached.values())
+
+        # Пароль восстановленного из кэша пользователя загружается из БД
+        user = CachedJWTAuthentication().user_from_cache(cached)
+        self.assertEqual(user, self.user)
+        self.assertIn("password", user.get_deferred_fields())
+        with self.assertNumQueries(1):
+            self.assertEqual(user.password, self.user.password)
+
+    def test_invalidated_on_save(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidated_on_password_change(self):
+        self.client.get(self.url)
+        self.user.set_password("new_pass")
+        self.user.save()
+
+        self.assertIsNone(get_user_cache().get(USER_CACHE_KEY.format(self.user.pk)))
+
+    def test_invalidated_on_delete(self):
+        self.client.get(self.url)
+        self.user.delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
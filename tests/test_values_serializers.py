@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.utils import timezone as django_timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from retail.models import ChainLink, Contact, Product
+from retail.serializers import (
+    ChainLinkSerializer,
+    ChainLinkValuesSerializer,
+    ContactSerializer,
+    ContactValuesSerializer,
+    ProductSerializer,
+    ProductValuesSerializer,
+)
+from users.models import User
+from users.serializers import UserShortSerializer, UserShortValuesSerializer
+
+
+# python manage.py test - запуск тестов
+# python manage.py test tests.test_values_serializers - запуск конкретного файла
+# coverage run --source='.' manage.py test - запуск проверки покрытия
+# coverage report -m - получение отчета с пропущенными строками
+
+
+class ValuesSerializerTestCase(APITestCase):
+
+    def setUp(self) -> None:
+        self.products = [
+            Product.objects.create(name=f"product_{i}", release_date="2018-03-09")
+            for i in range(3)
+        ]
+        self.contacts = [
+            Contact.objects.create(email=f"test_{i}@test.com", country="Россия")
+            for i in range(3)
+        ]
+
+        self.factory = ChainLink.objects.create(name="factory", dept=0)
+        self.retail = ChainLink.objects.create(
+            name="retail", supplier=self.factory, dept="9999999999999.99"
+        )
+        self.trader = ChainLink.objects.create(
+            name="trader", supplier=self.retail, dept="-0.05"
+        )
+        # Связи добавляются не по порядку id
+        self.retail.products.set(self.products[::-1])
+        self.retail.contacts.set([self.contacts[2], self.contacts[0]])
+        self.trader.products.set([self.products[1]])
+
+        self.user1 = User.objects.create(username="user1")
+        self.client.force_authenticate(user=self.user1)
+
+    def assertSameData(self, serializer_class, values_serializer_class, queryset):
+        self.assertEqual(
+            values_serializer_class(
+                values_serializer_class.values(queryset), many=True
+            ).data,
+            serializer_class(queryset, many=True).data,
+        )
+
+    def test_chain_links(self):
+        self.assertSameData(
+            ChainLinkSerializer,
+            ChainLinkValuesSerializer,
+            ChainLink.objects.with_relations().order_by("id"),
+        )
+
+    def test_contacts_and_products(self):
+        self.assertSameData(ContactSerializer, ContactValuesSerializer, Contact.objects)
+        self.assertSameData(
+            ProductSerializer, ProductValuesSerializer, Product.objects.order_by("id")
+        )
+
+    def test_users(self):
+        User.objects.create(username="user2")
+        queryset = User.objects.order_by("id")
+        self.assertEqual(
+            UserShortValuesSerializer(
+                UserShortValuesSerializer.values(queryset), many=True
+            ).data,
+            UserShortSerializer(queryset, many=True).data,
+        )
+
+    def test_current_timezone(self):
+        # Вне UTC даты переводятся полем сериализатора
+        with django_timezone.override("Europe/Moscow"):
+            self.test_chain_links()
+            row = ChainLinkValuesSerializer(
+                ChainLinkValuesSerializer.values(ChainLink.objects.all()).first()
+            ).data
+        self.assertTrue(row["creation_date"].endswith("+03:00"))
+
+    def test_converters_match_fields(self):
+        # Значения не из БД (другое число знаков, не UTC) дают тот же результат
+        fields = ChainLinkSerializer().fields
+        serializer = ChainLinkValuesSerializer()
+        converters = {name: convert for name, _, convert in serializer.converters}
+        for value in (
+            Decimal("1.5"),
+            Decimal("7"),
+            Decimal("0.005"),
+            Decimal("-10.00"),
+        ):
+            self.assertEqual(
+                converters["dept"](value), fields["dept"].to_representation(value)
+            )
+        for value in (
+            datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=timezone.utc),
+            datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=3))),
+        ):
+            self.assertEqual(
+                converters["creation_date"](value),
+                fields["creation_date"].to_representation(value),
+            )
+
+    def test_api_lists(self):
+        for url, serializer_class, queryset in (
+            (
+                reverse("retail:contacts-list"),
+                ContactSerializer,
+                Contact.objects.all(),
+            ),
+            (
+                reverse("retail:products-list"),
+                ProductSerializer,
+                Product.objects.all(),
+            ),
+            (
+                reverse("retail:chain-ancestors", args=(self.trader.pk,)),
+                ChainLinkSerializer,
+                ChainLink.objects.ancestors_of(self.trader).with_relations(),
+            ),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                response.json(), list(serializer_class(queryset, many=True).data)
+            )
+
+        response = self.client.get(reverse("retail:chain-list"))
+        self.assertEqual(
+            response.json()["results"],
+            list(
+                ChainLinkSerializer(
+                    ChainLink.objects.with_relations().order_by("id"), many=True
+                ).data
+            ),
+        )
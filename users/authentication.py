@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_KEY = "auth:user:{}"
+
+
+def get_user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def invalidate_cached_user(user_id):
+    """Удаляет пользователя из кэша сразу и повторно после фиксации транзакции,
+    чтобы параллельный запрос не успел закэшировать данные до коммита"""
+    key = USER_CACHE_KEY.format(user_id)
+    get_user_cache().delete(key)
+    transaction.on_commit(lambda: get_user_cache().delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация, которая берет пользователя из кэша, а не из БД.
+
+    Кэшируются только поля из CACHED_USER_FIELDS и md5 хэша пароля для проверки
+    отозванных токенов; пароль и остальные поля в кэш не попадают и при обращении
+    загружаются из БД (отложенные поля). Запись удаляется из кэша при сохранении
+    или удалении пользователя (в т.ч. при смене пароля). Проверки, зависящие
+    от токена, выполняются на каждый запрос.
+    """
+
+    # Поля, которые читают проверки доступа и представления
+    CACHED_USER_FIELDS = ("id", "username", "is_active", "is_staff", "is_superuser")
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = USER_CACHE_KEY.format(user_id)
+        cached = get_user_cache().get(key)
+        if cached is None:
+            user = super().get_user(validated_token)
+            cached = {name: getattr(user, name) for name in self.CACHED_USER_FIELDS}
+            cached["password_hash"] = get_md5_hash_password(user.password)
+            get_user_cache().set(key, cached, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        if not cached["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+            != cached["password_hash"]
+        ):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return self.user_from_cache(cached)
+
+    def user_from_cache(self, cached):
+        """Пользователь из закэшированных полей, остальные поля - отложенные"""
+        names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in cached
+        ]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            names,
+            [cached[name] for name in names],
+        )
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from retail.values import ValuesSerializer
 from users.models import User
 
 
@@ -13,3 +14,7 @@ class UserShortSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("id", "username")
+
+
+class UserShortValuesSerializer(ValuesSerializer):
+    serializer_class = UserShortSerializer
@@ -2,16 +2,19 @@ from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.viewsets import ModelViewSet
 
+from retail.values import ValuesListMixin
 from users.models import User
 from users.permissions import IsSelfProfile
 from users.serializers import (
     UserSerializer,
     UserShortSerializer,
+    UserShortValuesSerializer,
 )
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(ValuesListMixin, ModelViewSet):
     queryset = User.objects.all()
+    values_serializer_class = UserShortValuesSerializer
 
     @extend_schema(
         summary="Создание пользователя",